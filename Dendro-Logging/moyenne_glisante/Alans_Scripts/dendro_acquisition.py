@@ -0,0 +1,266 @@
+# Date: October 18, 2026
+# Burst acquisition engine for the ADS1115. Instead of single register reads separated by fixed sleeps,
+# the ADC is run in continuous mode at a configurable data rate and each channel is read back as a
+# burst of conversions paced to the data rate, within a time budget per cycle.
+
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Data rates supported by the ADS1115 (samples per second)
+ADS1115_DATA_RATES = (8, 16, 32, 64, 128, 250, 475, 860)
+
+DEFAULT_DATA_RATE = 860
+DEFAULT_BUDGET = 0.5  # Seconds spent acquiring per cycle, shared by all channels
+SETTLE_CONVERSIONS = 2  # Conversions to discard after switching the multiplexer
+
+ADS1115_ADDRESSES = (0x48, 0x49, 0x4A, 0x4B)  # Selected by wiring ADDR to GND, VDD, SDA or SCL
+PINS_PER_BOARD = 4
+CHANNELS_PER_BUS = len(ADS1115_ADDRESSES) * PINS_PER_BOARD
+
+# An ADS1115 found on one of the I2C buses
+Board = namedtuple('Board', 'bus address ads')
+
+
+def discover_boards(buses, addresses=ADS1115_ADDRESSES):
+    """Probe every address on every I2C bus and return the ADS1115 boards that answer"""
+    from adafruit_ads1x15.ads1115 import ADS1115
+
+    boards = []
+    for bus_index, i2c in enumerate(buses):
+        for address in addresses:
+            try:
+                ads = ADS1115(i2c, address=address)
+            except (OSError, ValueError):
+                continue  # Nothing at this address
+            boards.append(Board(bus_index, address, ads))
+    return boards
+
+
+def board_channel(board, pin):
+    """Channel number of a pin, fixed by bus and address so a missing board does not renumber the others"""
+    return board.bus * CHANNELS_PER_BUS + (board.address - ADS1115_ADDRESSES[0]) * PINS_PER_BOARD + pin
+
+
+class AcquisitionEngine:
+    """Read bursts of conversions from several AnalogIn channels into a preallocated buffer
+
+    `ads` is the ADS1115 the channels belong to, or a list of boards when they are spread over several.
+    """
+
+    def __init__(self, ads, channels, data_rate=DEFAULT_DATA_RATE, budget=DEFAULT_BUDGET,
+                 continuous=True):
+        if data_rate not in ADS1115_DATA_RATES:
+            raise ValueError(f"Unsupported ADS1115 data rate {data_rate}, expected one of {ADS1115_DATA_RATES}")
+        self.boards = list(ads) if isinstance(ads, (list, tuple)) else [ads]
+        self.channels = dict(channels)
+        self.channel_numbers = list(self.channels)
+        self.data_rate = data_rate
+        self.budget = budget
+        self.continuous = continuous
+        self.period = 1.0 / data_rate
+
+        # One row per channel, sized for the most conversions that fit in the budget
+        self.max_samples = int(np.ceil(budget / self._slot_count() * data_rate)) + 1
+        self.buffer = np.zeros((len(self.channels), self.max_samples), dtype=np.int32)
+        self.counts = np.zeros(len(self.channels), dtype=np.int64)
+        self.errors = np.zeros(len(self.channels), dtype=np.int64)  # I2C exceptions, cumulative
+        self.dropped = np.zeros(len(self.channels), dtype=np.int64)  # Out of range readings, cumulative
+
+        self.last_elapsed = 0.0
+        self.read_time = 0.0  # Seconds spent inside register reads in the last cycle
+        self.reads = 0  # Register reads attempted in the last cycle
+        self.total_samples = 0
+        self.total_time = 0.0
+        self.configure()
+
+    def _slot_count(self):
+        """Number of time slots the budget is divided into, one per channel when reading in turn"""
+        return len(self.channels)
+
+    def configure(self):
+        """Set the data rate and conversion mode of every ADC board"""
+        from adafruit_ads1x15.ads1x15 import Mode
+
+        for ads in self.boards:
+            ads.data_rate = self.data_rate
+            ads.mode = Mode.CONTINUOUS if self.continuous else Mode.SINGLE
+
+    def _wait_until(self, deadline):
+        """Sleep until the deadline, spinning only for the last fraction of a millisecond"""
+        remaining = deadline - time.monotonic()
+        if remaining > 0.0005:
+            time.sleep(remaining - 0.0003)
+        while time.monotonic() < deadline:
+            pass
+
+    def _read(self, row, adc_channel):
+        """One register read, returning None after an I2C error or an out of range value"""
+        try:
+            value = adc_channel.value
+        except Exception as e:
+            print(f"I2C error on channel {self.channel_numbers[row]}: {e}")
+            self.errors[row] += 1
+            return None
+        if not (0 <= value <= 65535):
+            self.dropped[row] += 1
+            return None
+        return value
+
+    def _burst(self, row, adc_channel, deadline):
+        """Fill one row of the buffer with conversions until the deadline"""
+        buffer_row = self.buffer[row]
+        count = 0
+        # Let the input settle after the multiplexer switches to this channel
+        next_due = time.monotonic() + SETTLE_CONVERSIONS * self.period if self.continuous else 0.0
+        while count < self.max_samples:
+            if self.continuous:
+                if next_due >= deadline:
+                    break
+                self._wait_until(next_due)
+                next_due += self.period
+            elif time.monotonic() >= deadline:
+                break
+            read_start = time.monotonic()
+            value = self._read(row, adc_channel)
+            self.read_time += time.monotonic() - read_start
+            self.reads += 1
+            if value is None:
+                continue
+            buffer_row[count] = value
+            count += 1
+        self.counts[row] = count
+
+    def acquire(self, budget=None):
+        """Acquire one cycle of samples for every channel and return (buffer, counts)"""
+        budget = self.budget if budget is None else budget
+        start = time.monotonic()
+        self.read_time = 0.0
+        self.reads = 0
+        slot = budget / len(self.channels)
+        for row, chan_num in enumerate(self.channel_numbers):
+            self._burst(row, self.channels[chan_num], start + (row + 1) * slot)
+        self._finish(start)
+        return self.buffer, self.counts
+
+    def _finish(self, start):
+        self.last_elapsed = time.monotonic() - start
+        self.total_samples += int(self.counts.sum())
+        self.total_time += self.last_elapsed
+
+    def samples(self, row):
+        """Return a view of the valid samples acquired for a buffer row in the last cycle"""
+        return self.buffer[row, :self.counts[row]]
+
+    def close(self):
+        """Release what the engine holds, nothing for sequential reads"""
+
+    @property
+    def samples_per_second(self):
+        """Achieved samples per second over the last cycle, all channels combined"""
+        if self.last_elapsed <= 0:
+            return 0.0
+        return float(self.counts.sum()) / self.last_elapsed
+
+    @property
+    def average_samples_per_second(self):
+        """Achieved samples per second since the engine was created"""
+        if self.total_time <= 0:
+            return 0.0
+        return self.total_samples / self.total_time
+
+
+class ConcurrentAcquisitionEngine(AcquisitionEngine):
+    """Acquire from several ADS1115 boards at once, with one worker thread per I2C bus
+
+    Every board converts on its own, so the boards of a bus are switched to the same pin together and
+    their conversions are read in turn during a shared time slot. The budget is divided into one slot per
+    pin instead of one per channel: adding boards adds samples per cycle instead of cycle time. The
+    buffer still has one row per channel, numbered by board_channel().
+    """
+
+    def __init__(self, boards, data_rate=DEFAULT_DATA_RATE, budget=DEFAULT_BUDGET, continuous=True,
+                 pins=PINS_PER_BOARD):
+        from adafruit_ads1x15.analog_in import AnalogIn
+
+        if not boards:
+            raise ValueError("No ADS1115 boards to acquire from")
+        self.layout = sorted(boards, key=lambda b: (b.bus, b.address))
+        self.pins = pins
+        channels = {}
+        for board in self.layout:
+            for pin in range(pins):
+                channels[board_channel(board, pin)] = AnalogIn(board.ads, pin)
+        super().__init__([board.ads for board in self.layout], channels, data_rate=data_rate,
+                         budget=budget, continuous=continuous)
+
+        # Per bus, one group of (row, channel) per pin, read together in the same slot
+        rows = {chan: row for row, chan in enumerate(self.channel_numbers)}
+        self.bus_slots = {}
+        for board in self.layout:
+            slots = self.bus_slots.setdefault(board.bus, [[] for _ in range(pins)])
+            for pin in range(pins):
+                chan = board_channel(board, pin)
+                slots[pin].append((rows[chan], self.channels[chan]))
+        self.pool = ThreadPoolExecutor(max_workers=len(self.bus_slots), thread_name_prefix="i2c-bus")
+
+    def _slot_count(self):
+        return self.pins
+
+    def _group_burst(self, group, deadline):
+        """Read the boards of one slot in turn until the deadline, returning (read time, reads)"""
+        counts = self.counts
+        for row, _ in group:
+            counts[row] = 0
+        read_time = 0.0
+        reads = 0
+        active = list(group)
+        next_due = time.monotonic() + SETTLE_CONVERSIONS * self.period if self.continuous else 0.0
+        while active:
+            if self.continuous:
+                if next_due >= deadline:
+                    break
+                self._wait_until(next_due)
+                next_due += self.period
+            elif time.monotonic() >= deadline:
+                break
+            for row, adc_channel in active:
+                read_start = time.monotonic()
+                value = self._read(row, adc_channel)
+                read_time += time.monotonic() - read_start
+                reads += 1
+                if value is not None:
+                    self.buffer[row, counts[row]] = value
+                    counts[row] += 1
+            active = [entry for entry in active if counts[entry[0]] < self.max_samples]
+        return read_time, reads
+
+    def _bus_cycle(self, slots, start, slot_length):
+        read_time = 0.0
+        reads = 0
+        for index, group in enumerate(slots):
+            t, n = self._group_burst(group, start + (index + 1) * slot_length)
+            read_time += t
+            reads += n
+        return read_time, reads
+
+    def acquire(self, budget=None):
+        """Acquire one cycle of samples on all buses at once and return (buffer, counts)"""
+        budget = self.budget if budget is None else budget
+        start = time.monotonic()
+        slot_length = budget / self.pins
+        if len(self.bus_slots) == 1:
+            totals = [self._bus_cycle(next(iter(self.bus_slots.values())), start, slot_length)]
+        else:
+            futures = [self.pool.submit(self._bus_cycle, slots, start, slot_length)
+                       for slots in self.bus_slots.values()]
+            totals = [future.result() for future in futures]
+        self.read_time = sum(t for t, _ in totals)
+        self.reads = sum(n for _, n in totals)
+        self._finish(start)
+        return self.buffer, self.counts
+
+    def close(self):
+        self.pool.shutdown(wait=True)
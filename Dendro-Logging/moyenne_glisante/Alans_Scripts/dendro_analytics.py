@@ -0,0 +1,287 @@
+# Date: October 18, 2026
+# Daily dendrometer statistics, kept up to date sample by sample from the filtered stream of the monitor,
+# or computed in one vectorized pass over ingested archives (many channels and years at once).
+#
+# Metrics per local day and channel, following the zero-growth-line approach (Zweifel et al. 2016):
+#   min, max, amplitude     extremes of the stem radius and their difference (µm)
+#   mds                     maximum daily shrinkage: largest drop below the highest value reached earlier
+#                           the same day (µm)
+#   zg, growth              zero-growth line (running maximum of the radius) at the end of the day and how
+#                           much it rose during the day (µm)
+#   twd_mean, twd_max       tree water deficit, the distance below the zero-growth line (µm)
+#   shrinkage_s, recovery_s, increment_s
+#                           seconds spent shrinking, recovering below the previous maximum, and growing
+#                           above it (Deslauriers et al. 2007 phases)
+#
+# The monitor appends a row per channel when a day ends and when it stops. On restart each channel picks
+# up its zero-growth line from its last row, and the day in progress from that row if it is the same day,
+# so a day cut by a restart appears again later in the file: the last row of a date is the one that counts.
+#
+#   python dendro_analytics.py /path/to/DD_Dorval-7 --output archive_metrics.csv
+
+import argparse
+import csv
+import os
+import time
+import numpy as np
+
+METRICS = ('count', 'min', 'max', 'amplitude', 'mds', 'zg', 'growth', 'twd_mean', 'twd_max',
+           'shrinkage_s', 'recovery_s', 'increment_s')
+
+
+class ChannelAnalytics:
+    """Daily statistics of one channel, updated in constant time per sample
+
+    `on_day(day)` is called with the statistics dict of each day once the next day starts, and with
+    the day in progress by close(). `resume` is the last row written for the channel (as returned by
+    DailyMetricsLog.last_rows), continued instead of starting from nothing.
+    """
+
+    def __init__(self, on_day=None, resume=None):
+        self.on_day = on_day
+        self.zg = None if resume is None else resume['zg']  # Zero-growth line: highest radius so far
+        self.resume = resume
+        self.previous = None  # Previous (time, value)
+        self.day = None
+        self.day_end = None  # Epoch second at which the current day ends
+
+    def _start_day(self, t):
+        local = time.localtime(t)
+        self.day_end = time.mktime((local.tm_year, local.tm_mon, local.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+        self.day = {
+            'date': time.strftime("%Y-%m-%d", local),
+            'count': 0,
+            'min': float('inf'),
+            'max': float('-inf'),
+            'mds': 0.0,
+            'zg_start': self.zg,
+            'twd_sum': 0.0,
+            'twd_max': 0.0,
+            'shrinkage_s': 0.0,
+            'recovery_s': 0.0,
+            'increment_s': 0.0,
+        }
+        resume, self.resume = self.resume, None
+        if resume is not None and resume['date'] == self.day['date'] and resume['count']:
+            # The same day before a restart: its statistics go on from the row written at shutdown
+            self.day.update(
+                count=int(resume['count']), min=resume['min'], max=resume['max'], mds=resume['mds'],
+                zg_start=resume['zg'] - resume['growth'], twd_sum=resume['twd_mean'] * resume['count'],
+                twd_max=resume['twd_max'], shrinkage_s=resume['shrinkage_s'],
+                recovery_s=resume['recovery_s'], increment_s=resume['increment_s'])
+
+    def update(self, t, value):
+        """Add one filtered value at epoch time `t`"""
+        if self.day is None:
+            self._start_day(t)
+        elif t >= self.day_end:
+            finished = self.current()
+            self._start_day(t)
+            if self.on_day is not None:
+                self.on_day(finished)
+        day = self.day
+
+        # Phase of the interval since the previous sample
+        if self.previous is not None:
+            dt = t - self.previous[0]
+            if value < self.previous[1]:
+                day['shrinkage_s'] += dt
+            elif value > self.zg:
+                day['increment_s'] += dt
+            else:
+                day['recovery_s'] += dt
+        if self.zg is None or value > self.zg:
+            self.zg = value
+        if day['zg_start'] is None:
+            day['zg_start'] = value
+
+        day['count'] += 1
+        if value > day['max']:
+            day['max'] = value
+        if value < day['min']:
+            day['min'] = value
+        day['mds'] = max(day['mds'], day['max'] - value)
+        twd = self.zg - value
+        day['twd_sum'] += twd
+        day['twd_max'] = max(day['twd_max'], twd)
+        self.previous = (t, value)
+
+    def current(self):
+        """Statistics of the day in progress, in the same form as the finished days"""
+        day = self.day
+        if day is None or day['count'] == 0:
+            return None
+        return {
+            'date': day['date'],
+            'count': day['count'],
+            'min': day['min'],
+            'max': day['max'],
+            'amplitude': day['max'] - day['min'],
+            'mds': day['mds'],
+            'zg': self.zg,
+            'growth': self.zg - day['zg_start'],
+            'twd_mean': day['twd_sum'] / day['count'],
+            'twd_max': day['twd_max'],
+            'shrinkage_s': day['shrinkage_s'],
+            'recovery_s': day['recovery_s'],
+            'increment_s': day['increment_s'],
+        }
+
+    def close(self):
+        """Hand the day in progress to on_day, e.g. when the monitor stops"""
+        day = self.current()
+        if day is not None and self.on_day is not None:
+            self.on_day(day)
+        self.day = None
+
+
+class DailyMetricsLog:
+    """Append finished days of every channel to one CSV file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def last_rows(self):
+        """{channel: metrics of its last row}, empty if there is no file yet"""
+        rows = {}
+        if not os.path.exists(self.path):
+            return rows
+        with open(self.path, newline='') as f:
+            for row in csv.DictReader(f):
+                try:
+                    values = {name: float(row[name]) for name in METRICS}
+                    rows[int(row['channel'])] = dict(values, date=row['date'])
+                except (KeyError, TypeError, ValueError):
+                    continue  # Line cut short by a crash
+        return rows
+
+    def write(self, channel, day):
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if new:
+                writer.writerow(('date', 'channel') + METRICS)
+            writer.writerow([day['date'], channel] + [_format(day[name]) for name in METRICS])
+
+
+def _format(value):
+    return value if isinstance(value, (int, np.integer)) else f"{value:.3f}"
+
+
+def channel_analytics(channels, log=None):
+    """One ChannelAnalytics per channel, writing finished days to `log` and resuming from it when given"""
+    def callback(chan):
+        return None if log is None else (lambda day: log.write(chan, day))
+    last = {} if log is None else log.last_rows()
+    return {chan: ChannelAnalytics(on_day=callback(chan), resume=last.get(chan)) for chan in channels}
+
+
+def daily_metrics(times, values):
+    """Daily metrics of whole series in one pass
+
+    `times` are local datetime64 timestamps (sorted) and `values` a (times x channels) array with NaN
+    for missing readings, as produced by dendro_ingest. Returns {'date': datetime64[D] array, metric:
+    (days x channels) array}, NaN where a channel has no reading that day.
+    """
+    times = np.asarray(times).astype('datetime64[s]')
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    days = times.astype('datetime64[D]')
+    starts = np.concatenate(([0], np.flatnonzero(days[1:] != days[:-1]) + 1)) if len(days) else np.zeros(0, int)
+    ends = np.append(starts[1:], len(days))
+    valid = ~np.isnan(values)
+
+    # Zero-growth line and deficit; fmax ignores the NaN of missing readings
+    zg = np.fmax.accumulate(values, axis=0)
+    twd = zg - values
+
+    # Previous valid reading and the zero-growth line before each sample, for the phases
+    index = np.where(valid, np.arange(len(times))[:, None], -1)
+    last_index = np.maximum.accumulate(index, axis=0)
+    previous_index = np.vstack([np.full((1, values.shape[1]), -1), last_index[:-1]])
+    has_previous = valid & (previous_index >= 0)
+    columns = np.arange(values.shape[1])
+    previous_value = values[np.maximum(previous_index, 0), columns]
+    previous_zg = np.vstack([np.full((1, values.shape[1]), np.nan), zg[:-1]])
+    seconds = times.astype(np.int64).astype(np.float64)
+    dt = np.where(has_previous, seconds[:, None] - seconds[np.maximum(previous_index, 0)], 0.0)
+    shrinking = has_previous & (values < previous_value)
+    increasing = has_previous & ~shrinking & (values > previous_zg)
+    recovering = has_previous & ~shrinking & ~increasing
+
+    # Highest value reached earlier in the same day, for the maximum daily shrinkage
+    day_running_max = np.empty_like(values)
+    for start, end in zip(starts, ends):
+        day_running_max[start:end] = np.fmax.accumulate(values[start:end], axis=0)
+
+    count = np.add.reduceat(valid, starts, axis=0) if len(starts) else np.zeros((0, values.shape[1]))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = {
+            'date': days[starts],
+            'count': count,
+            'min': np.fmin.reduceat(values, starts, axis=0),
+            'max': np.fmax.reduceat(values, starts, axis=0),
+            'mds': np.fmax.reduceat(day_running_max - values, starts, axis=0),
+            'zg': zg[ends - 1],
+            'twd_mean': np.add.reduceat(np.where(valid, twd, 0.0), starts, axis=0) / count,
+            'twd_max': np.fmax.reduceat(twd, starts, axis=0),
+            'shrinkage_s': np.add.reduceat(np.where(shrinking, dt, 0.0), starts, axis=0),
+            'recovery_s': np.add.reduceat(np.where(recovering, dt, 0.0), starts, axis=0),
+            'increment_s': np.add.reduceat(np.where(increasing, dt, 0.0), starts, axis=0),
+        }
+    result['amplitude'] = result['max'] - result['min']
+    # Growth: rise of the zero-growth line from the end of the previous day (first reading on day one)
+    first_value = values[np.argmax(valid, axis=0), columns]
+    zg_before = np.vstack([first_value[None, :], result['zg'][:-1]])
+    zg_before = np.where(np.isnan(zg_before), first_value, zg_before)
+    result['growth'] = result['zg'] - zg_before
+    for name in METRICS:
+        if name != 'count':
+            result[name] = np.where(count > 0, result[name], np.nan)
+    return result
+
+
+ARCHIVE_COLUMNS = ('source', 'date', 'channel') + METRICS
+ARCHIVE_FILE = "archive_metrics.csv"  # Not the monitor's daily_metrics.csv, whose rows have no source column
+
+
+def write_metrics_csv(path, dataset, metrics, label=None):
+    """Write daily metrics as CSV rows of source, date, channel and every metric"""
+    new = not os.path.exists(path) or os.path.getsize(path) == 0
+    if not new:
+        with open(path, newline='') as f:
+            header = next(csv.reader(f), None)
+        if tuple(header or ()) != ARCHIVE_COLUMNS:
+            raise ValueError(f"{path} has other columns than the archive metrics, choose another --output")
+    with open(path, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if new:
+            writer.writerow(ARCHIVE_COLUMNS)
+        for col, chan in enumerate(dataset['channels']):
+            for row, date in enumerate(metrics['date']):
+                if metrics['count'][row, col] == 0:
+                    continue
+                writer.writerow([label or "", str(date), int(chan)]
+                                + [_format(metrics[name][row, col]) for name in METRICS])
+
+
+def main():
+    from dendro_ingest import ingest_directory
+
+    parser = argparse.ArgumentParser(description="Daily dendrometer metrics from channel log archives")
+    parser.add_argument('directories', nargs='+', help="Deployment directories holding channel logs")
+    parser.add_argument('--output', default=ARCHIVE_FILE, help="CSV file to append the metrics to")
+    args = parser.parse_args()
+
+    for directory in args.directories:
+        start = time.monotonic()
+        dataset = ingest_directory(directory)
+        metrics = daily_metrics(dataset['time'], dataset['values'])
+        write_metrics_csv(args.output, dataset, metrics, label=os.path.basename(os.path.normpath(directory)))
+        print(f"{directory}: {len(metrics['date'])} days x {len(dataset['channels'])} channels "
+              f"in {(time.monotonic() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
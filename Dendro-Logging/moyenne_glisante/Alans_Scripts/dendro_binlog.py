@@ -0,0 +1,154 @@
+# Date: October 18, 2026
+# Compact binary channel logs. A file is a 64 byte header (channel, value encoding and calibration)
+# followed by fixed-width 8 byte records: epoch seconds as uint32 and the value either as float32
+# microns or as int32 nanometres. Files are append-only and are read back with a memory map into
+# NumPy structured arrays without copying.
+
+import os
+import struct
+import time
+import numpy as np
+from dendro_storage import ChannelWriter, FLUSH_RECORDS, FLUSH_INTERVAL, FSYNC_INTERVAL, MAX_PENDING, write_all
+
+MAGIC = b"DNDR"
+VERSION = 1
+HEADER_SIZE = 64
+# magic, version, header size, channel, encoding, ADC floor, Vref, stroke (µm), creation time, padding
+HEADER_FORMAT = "<4sHHHHIddd"
+HEADER_PAD = HEADER_SIZE - struct.calcsize(HEADER_FORMAT)
+
+ENCODING_FLOAT32 = 0  # float32 microns
+ENCODING_NANOMETRES = 1  # int32 nanometres, ±2.1 m range at 1 nm resolution
+ENCODINGS = {'float32': ENCODING_FLOAT32, 'nanometres': ENCODING_NANOMETRES}
+
+RECORD_DTYPES = {
+    ENCODING_FLOAT32: np.dtype([('time', '<u4'), ('value', '<f4')]),
+    ENCODING_NANOMETRES: np.dtype([('time', '<u4'), ('value', '<i4')]),
+}
+RECORD_STRUCTS = {
+    ENCODING_FLOAT32: struct.Struct("<If"),
+    ENCODING_NANOMETRES: struct.Struct("<Ii"),
+}
+
+DEFAULT_PATTERN = "channel_{channel}_{date}.dbin"
+DEFAULT_CALIBRATION = {'floor': 275, 'vref': 3.3 - 0.012, 'stroke': 25400.0}
+
+
+def pack_header(channel, encoding, calibration=None, created=None):
+    """Build the file header"""
+    calibration = dict(DEFAULT_CALIBRATION, **(calibration or {}))
+    created = time.time() if created is None else created
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, HEADER_SIZE, channel, encoding,
+                         int(calibration['floor']), calibration['vref'], calibration['stroke'], created)
+    return header + b"\0" * HEADER_PAD
+
+
+def unpack_header(data):
+    """Parse a file header into a dict"""
+    if len(data) < HEADER_SIZE:
+        raise ValueError("File too short for a dendrometer log header")
+    (magic, version, header_size, channel, encoding, floor, vref, stroke,
+     created) = struct.unpack_from(HEADER_FORMAT, data)
+    if magic != MAGIC:
+        raise ValueError(f"Not a binary dendrometer log (magic {magic!r})")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary log version {version}")
+    if encoding not in RECORD_DTYPES:
+        raise ValueError(f"Unknown value encoding {encoding}")
+    return {
+        'version': version,
+        'header_size': header_size,
+        'channel': channel,
+        'encoding': encoding,
+        'calibration': {'floor': floor, 'vref': vref, 'stroke': stroke},
+        'created': created,
+    }
+
+
+class BinaryChannelWriter(ChannelWriter):
+    """ChannelWriter producing fixed-width binary records instead of text lines"""
+
+    def __init__(self, directory=".", pattern=DEFAULT_PATTERN, encoding='float32', calibration=None,
+                 flush_records=FLUSH_RECORDS, flush_interval=FLUSH_INTERVAL, fsync_interval=FSYNC_INTERVAL,
+                 index=None, max_pending=MAX_PENDING):
+        super().__init__(directory, pattern, flush_records, flush_interval, fsync_interval, index, max_pending)
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding {encoding!r}, expected one of {list(ENCODINGS)}")
+        self.encoding = ENCODINGS[encoding]
+        self.record = RECORD_STRUCTS[self.encoding]
+        self.calibration = calibration
+
+    def _header_calibration(self, channel):
+        """Header fields of a channel, from a dict shared by all channels or a dendro_calibration.Calibration"""
+        if hasattr(self.calibration, 'header'):
+            return self.calibration.header(channel)
+        return self.calibration
+
+    def _open(self, channel, path):
+        f = open(path, 'ab', buffering=0)
+        if f.tell() < HEADER_SIZE:
+            # New file, or one whose header an earlier failure cut short: write the whole header first
+            if f.tell():
+                f.truncate(0)
+            written, error = write_all(f, pack_header(channel, self.encoding, self._header_calibration(channel)))
+            if error is not None:
+                try:
+                    f.truncate(0)
+                finally:
+                    f.close()
+                raise error
+            self.stats['bytes'] += written
+        else:
+            # A record cut short by a power failure would shift every record appended after it
+            torn = (f.tell() - HEADER_SIZE) % self.record.size
+            if torn:
+                f.truncate(f.tell() - torn)
+        return f
+
+    def _index_seconds(self, timestamp):
+        return int(timestamp)  # Records hold epoch seconds
+
+    def _encode(self, channel, value, timestamp, time_text):
+        # Size of the equivalent text line, so savings() can report the difference
+        self.stats['text_bytes'] += len(time_text) + len(repr(float(value))) + 3
+        if self.encoding == ENCODING_NANOMETRES:
+            return self.record.pack(int(timestamp), int(round(value * 1000.0)))
+        return self.record.pack(int(timestamp), value)
+
+
+def open_channel_log(path):
+    """Memory-map a binary log and return (header, records) without copying the data
+
+    A partial record left at the end of the file by an interrupted write is ignored.
+    """
+    with open(path, 'rb') as f:
+        header = unpack_header(f.read(HEADER_SIZE))
+    dtype = RECORD_DTYPES[header['encoding']]
+    count = (os.path.getsize(path) - header['header_size']) // dtype.itemsize
+    if count == 0:
+        return header, np.zeros(0, dtype=dtype)
+    records = np.memmap(path, dtype=dtype, mode='r', offset=header['header_size'], shape=(count,))
+    return header, records
+
+
+def record_microns(header, records):
+    """Return the record values in microns"""
+    if header['encoding'] == ENCODING_NANOMETRES:
+        return records['value'] / 1000.0
+    return records['value']
+
+
+def load_channel_logs(paths):
+    """Load several binary logs of one channel into (times, microns) arrays sorted by time"""
+    times = []
+    values = []
+    for path in sorted(paths):
+        header, records = open_channel_log(path)
+        times.append(records['time'])
+        values.append(record_microns(header, records))
+    if not times:
+        return np.zeros(0, dtype='<u4'), np.zeros(0, dtype=np.float64)
+    times = np.concatenate(times)
+    values = np.concatenate(values).astype(np.float64)
+    order = np.argsort(times, kind='stable')
+    return times[order], values[order]
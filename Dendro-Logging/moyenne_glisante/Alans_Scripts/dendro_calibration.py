@@ -0,0 +1,115 @@
+# Date: October 18, 2026
+# Per-sensor calibration of the dendrometers. Coefficients come from a JSON file with defaults and
+# per-channel overrides (see calibration.example.json), and are applied in one NumPy pass to a whole
+# channels x samples array of raw ADC readings. Invalid readings (not acquired, or outside the valid raw
+# range of the channel) are reported in a boolean mask instead of None values.
+#
+#   {
+#     "default": {"offset": 275, "vref": 3.288, "stroke": 25400.0},
+#     "channels": {
+#       "2": {"offset": 262, "gain": 1.004},
+#       "5": {"polynomial": [0.00002, 0.998, 1.5]}
+#     }
+#   }
+#
+# microns = polynomial(gain * stroke * (max(raw, offset) - offset) / 65535), where the polynomial
+# (highest power first, as numpy.polyval) defaults to the identity.
+
+import json
+import os
+import numpy as np
+
+ADC_FULL_SCALE = 65535.0
+DEFAULT_COEFFICIENTS = {
+    'offset': 275,  # Raw reading of the fully retracted sensor, lower readings are clipped to it
+    'vref': 3.3 - 0.012,  # Volts at full scale
+    'stroke': 25400.0,  # Sensor travel in µm at full scale
+    'gain': 1.0,  # Correction factor of the stroke
+    'polynomial': None,  # Optional correction applied to the linear microns
+    'min_raw': 0,  # Readings outside [min_raw, max_raw] are invalid
+    'max_raw': 65535,
+}
+
+
+def load_calibration(path, channels):
+    """Calibration of `channels` from a JSON file, or the defaults if the file does not exist"""
+    config = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            config = json.load(f)
+    return Calibration(channels, config.get('channels'), config.get('default'))
+
+
+class Calibration:
+    """Coefficients of a set of channels as column vectors, one row per channel"""
+
+    def __init__(self, channels, coefficients=None, default=None):
+        self.channels = list(channels)
+        default = dict(DEFAULT_COEFFICIENTS, **(default or {}))
+        overrides = {int(chan): values for chan, values in (coefficients or {}).items()}
+        unknown = set(overrides) - set(self.channels)
+        if unknown:
+            print(f"Calibration for unknown channels {sorted(unknown)} ignored")
+        self.per_channel = {chan: dict(default, **overrides.get(chan, {})) for chan in self.channels}
+        for chan, values in self.per_channel.items():
+            bad = set(values) - set(DEFAULT_COEFFICIENTS)
+            if bad:
+                raise ValueError(f"Unknown calibration coefficients {sorted(bad)} for channel {chan}")
+
+        def column(name, dtype=np.float64):
+            return np.array([self.per_channel[chan][name] for chan in self.channels], dtype=dtype)[:, None]
+
+        self.offset = column('offset')
+        self.vref = column('vref')
+        self.stroke = column('stroke')
+        self.gain = column('gain')
+        self.min_raw = column('min_raw', np.int64)
+        self.max_raw = column('max_raw', np.int64)
+        # Polynomials padded with leading zeros to a common degree, identity for channels without one
+        polynomials = [self.per_channel[chan]['polynomial'] or [1.0, 0.0] for chan in self.channels]
+        width = max(len(p) for p in polynomials)
+        self.polynomial = np.array([[0.0] * (width - len(p)) + list(p) for p in polynomials])
+        self.linear = all(self.per_channel[chan]['polynomial'] is None for chan in self.channels)
+
+    def coefficients(self, chan):
+        return dict(self.per_channel[chan])
+
+    def header(self, chan):
+        """Calibration fields stored in binary log headers"""
+        values = self.per_channel[chan]
+        return {'floor': values['offset'], 'vref': values['vref'], 'stroke': values['stroke'] * values['gain']}
+
+    def valid(self, raw, counts=None):
+        """Mask of the usable readings: acquired (column < count of the row) and within range"""
+        mask = (raw >= self.min_raw) & (raw <= self.max_raw)
+        if counts is not None:
+            mask &= np.arange(raw.shape[1]) < np.asarray(counts)[:, None]
+        return mask
+
+    def convert(self, raw, counts=None):
+        """Convert a channels x samples raw array, returning (voltage, microns, valid mask)"""
+        raw = np.asarray(raw)
+        above = np.maximum(raw, self.offset) - self.offset
+        fraction = above / ADC_FULL_SCALE
+        voltage = fraction * self.vref
+        microns = fraction * (self.stroke * self.gain)
+        if not self.linear:
+            result = np.zeros_like(microns)
+            for coefficient in self.polynomial.T:
+                result *= microns
+                result += coefficient[:, None]
+            microns = result
+        return voltage, microns, self.valid(raw, counts)
+
+    def means(self, raw, counts=None):
+        """Mean voltage, mean microns and number of valid readings of each channel, NaN when none"""
+        return masked_means(*self.convert(raw, counts))
+
+
+def masked_means(voltage, microns, valid):
+    """Row means of the valid readings: (mean voltage, mean microns, valid count), NaN when none"""
+    n_valid = valid.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_voltage = np.where(valid, voltage, 0.0).sum(axis=1) / n_valid
+        mean_microns = np.where(valid, microns, 0.0).sum(axis=1) / n_valid
+    return mean_voltage, mean_microns, n_valid
@@ -0,0 +1,259 @@
+# Date: October 18, 2026
+# Compression of the filtered series between the filters and the channel writers. Only the points
+# needed to rebuild a series within a tolerance (µm) are logged, so quiet channels write a few records
+# an hour instead of one per cycle.
+#
+#   deadband       log a value when it moves more than the tolerance from the last logged one;
+#                  read back by holding the last logged value ("previous")
+#   swinging_door  log the points where a straight line from the last logged point can no longer stay
+#                  within the tolerance of every reading since; read back by linear interpolation
+#
+# Both also log a point at least every `max_interval` seconds, so a dead sensor shows as a gap rather
+# than as a flat line. Compress an existing log to choose a tolerance:
+#
+#   python dendro_compression.py channel_0_2025-06-01.txt --mode swinging_door --tolerance 0.5
+
+import argparse
+import time
+import numpy as np
+
+MODES = ('deadband', 'swinging_door')
+DEFAULT_TOLERANCE = 0.5  # µm
+MAX_INTERVAL = 3600.0  # Seconds between logged points, whatever the signal does
+
+
+class DeadbandCompressor:
+    """Emit a point when the value leaves the band of ± tolerance around the last emitted value"""
+
+    interpolation = 'previous'
+
+    def __init__(self, tolerance=DEFAULT_TOLERANCE, max_interval=MAX_INTERVAL):
+        self.tolerance = tolerance
+        self.max_interval = max_interval
+        self.last = None  # Last emitted (time, value)
+        self.pending = None  # Latest suppressed (time, value)
+
+    def update(self, t, value):
+        """Feed one point, return the list of (time, value) points to log"""
+        if (self.last is None or abs(value - self.last[1]) > self.tolerance
+                or t - self.last[0] >= self.max_interval):
+            self.last = (t, value)
+            self.pending = None
+            return [self.last]
+        self.pending = (t, value)
+        return []
+
+    def flush(self):
+        """Points still needed to end the series exactly, e.g. before shutting down"""
+        pending, self.pending = self.pending, None
+        if pending is None:
+            return []
+        self.last = pending
+        return [pending]
+
+
+class SwingingDoorCompressor:
+    """Emit the points where no line from the last emitted point fits within ± tolerance of the readings"""
+
+    interpolation = 'linear'
+
+    def __init__(self, tolerance=DEFAULT_TOLERANCE, max_interval=MAX_INTERVAL):
+        self.tolerance = tolerance
+        self.max_interval = max_interval
+        self.archive = None  # Last emitted (time, value), the hinge of the doors
+        self.previous = None  # Latest point not emitted yet
+        # Slopes from the hinge that keep every reading since within tolerance
+        self.upper = float('inf')
+        self.lower = float('-inf')
+
+    def _open_doors(self, t, value):
+        dt = t - self.archive[0]
+        self.upper = (value + self.tolerance - self.archive[1]) / dt
+        self.lower = (value - self.tolerance - self.archive[1]) / dt
+
+    def update(self, t, value):
+        """Feed one point, return the list of (time, value) points to log"""
+        if self.archive is None:
+            self.archive = (t, value)
+            self.upper, self.lower = float('inf'), float('-inf')
+            return [self.archive]
+        if t <= self.archive[0]:
+            return []  # Same second as the last logged point
+        emitted = []
+        if self.previous is not None and t - self.archive[0] >= self.max_interval:
+            # Heartbeat: log the last point, every reading up to it is already within tolerance
+            self.archive = self.previous
+            emitted.append(self.archive)
+            self._open_doors(t, value)
+            self.previous = (t, value)
+            return emitted
+        slope = (value - self.archive[1]) / (t - self.archive[0])
+        if self.lower <= slope <= self.upper:
+            # A line from the hinge to this point stays within tolerance of every reading since
+            dt = t - self.archive[0]
+            self.upper = min(self.upper, (value + self.tolerance - self.archive[1]) / dt)
+            self.lower = max(self.lower, (value - self.tolerance - self.archive[1]) / dt)
+        else:
+            # The doors closed: the previous point ends the segment and becomes the new hinge
+            self.archive = self.previous
+            emitted.append(self.archive)
+            self._open_doors(t, value)
+        self.previous = (t, value)
+        return emitted
+
+    def flush(self):
+        """Points still needed to end the series exactly, e.g. before shutting down"""
+        previous, self.previous = self.previous, None
+        if previous is None:
+            return []
+        self.archive = previous
+        self.upper, self.lower = float('inf'), float('-inf')
+        return [previous]
+
+
+COMPRESSORS = {'deadband': DeadbandCompressor, 'swinging_door': SwingingDoorCompressor}
+
+
+def make_compressor(mode, tolerance=DEFAULT_TOLERANCE, max_interval=MAX_INTERVAL):
+    if mode not in COMPRESSORS:
+        raise ValueError(f"Unknown compression mode {mode!r}, expected one of {MODES}")
+    return COMPRESSORS[mode](tolerance, max_interval)
+
+
+class CompressedWriter:
+    """Channel writer front end that only passes on the points the compressors keep
+
+    `tolerances` maps channel numbers to their tolerance in µm, other channels use `tolerance`. Every
+    reading still goes to the writer's gap index, so a quiet stretch is not taken for an outage.
+    """
+
+    def __init__(self, writer, mode, tolerance=DEFAULT_TOLERANCE, tolerances=None, max_interval=MAX_INTERVAL):
+        self.writer = writer
+        self.mode = mode
+        self.tolerance = tolerance
+        self.tolerances = dict(tolerances or {})
+        self.max_interval = max_interval
+        make_compressor(mode)  # Validate the mode up front
+        self.compressors = {}
+        self.points_in = 0
+        self.points_out = 0
+
+    def _compressor(self, channel):
+        compressor = self.compressors.get(channel)
+        if compressor is None:
+            tolerance = self.tolerances.get(channel, self.tolerance)
+            compressor = self.compressors[channel] = make_compressor(self.mode, tolerance, self.max_interval)
+        return compressor
+
+    def write(self, channel, value, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        self.points_in += 1
+        self.writer.index_reading(channel, timestamp)
+        for t, v in self._compressor(channel).update(timestamp, value):
+            self.writer.write(channel, v, t, indexed=True)
+            self.points_out += 1
+
+    def flush(self, fsync=None):
+        self.writer.flush(fsync)
+
+    def close(self):
+        """Log the held points of every channel, then close the underlying writer"""
+        for channel, compressor in self.compressors.items():
+            for t, v in compressor.flush():
+                self.writer.write(channel, v, t, indexed=True)
+                self.points_out += 1
+        self.writer.close()
+
+    def savings(self):
+        stats = self.writer.savings()
+        stats['points_in'] = self.points_in
+        stats['points_out'] = self.points_out
+        stats['compression_ratio'] = self.points_in / self.points_out if self.points_out else 0.0
+        return stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def compress_series(times, values, mode, tolerance=DEFAULT_TOLERANCE, max_interval=MAX_INTERVAL):
+    """Compress whole arrays (epoch seconds, values), returning the kept (times, values)"""
+    compressor = make_compressor(mode, tolerance, max_interval)
+    kept = []
+    for t, v in zip(np.asarray(times, dtype=float).tolist(), np.asarray(values, dtype=float).tolist()):
+        kept.extend(compressor.update(t, v))
+    kept.extend(compressor.flush())
+    if not kept:
+        return np.empty(0), np.empty(0)
+    kept_times, kept_values = zip(*kept)
+    return np.array(kept_times), np.array(kept_values)
+
+
+def reconstruct(times, values, query, interpolation='linear'):
+    """Values of a compressed series at the `query` times, NaN outside the logged span
+
+    `interpolation` is 'linear' for swinging-door logs and 'previous' for deadband logs.
+    """
+    times = np.asarray(times, dtype=float)
+    values = np.asarray(values, dtype=float)
+    query = np.asarray(query, dtype=float)
+    if len(times) == 0:
+        return np.full(query.shape, np.nan)
+    if interpolation == 'linear':
+        result = np.interp(query, times, values)
+    elif interpolation == 'previous':
+        index = np.clip(np.searchsorted(times, query, side='right') - 1, 0, len(times) - 1)
+        result = values[index]
+    else:
+        raise ValueError(f"Unknown interpolation {interpolation!r}")
+    return np.where((query < times[0]) | (query > times[-1]), np.nan, result)
+
+
+def read_compressed(path, step=60.0, interpolation='linear', max_gap=None):
+    """Read a compressed channel log back on a regular grid of `step` seconds
+
+    Returns (datetime64[s] times, float64 values). Intervals longer than `max_gap` seconds (default
+    twice MAX_INTERVAL) between logged points are gaps in the recording and come back as NaN.
+    """
+    from dendro_ingest import read_channel_file
+
+    times, values = read_channel_file(path)
+    seconds = times.astype('int64').astype(float)
+    if len(seconds) == 0:
+        return times, values
+    grid = np.arange(seconds[0], seconds[-1] + step / 2.0, step)
+    result = reconstruct(seconds, values, grid, interpolation)
+    max_gap = 2 * MAX_INTERVAL if max_gap is None else max_gap
+    after = np.clip(np.searchsorted(seconds, grid, side='left'), 1, len(seconds) - 1)
+    if len(seconds) > 1:
+        gaps = (seconds[after] - seconds[after - 1]) > max_gap
+        result[gaps & (grid > seconds[after - 1]) & (grid < seconds[after])] = np.nan
+    return grid.astype('int64').astype('datetime64[s]'), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress a channel log to evaluate a tolerance")
+    parser.add_argument('path', help="Channel log (.txt or .dbin)")
+    parser.add_argument('--mode', choices=MODES, default='swinging_door')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Tolerance in µm")
+    parser.add_argument('--max-interval', type=float, default=MAX_INTERVAL,
+                        help="Longest time between logged points (s)")
+    args = parser.parse_args()
+
+    from dendro_ingest import read_channel_file
+
+    times, values = read_channel_file(args.path)
+    seconds = times.astype('int64').astype(float)
+    kept_times, kept_values = compress_series(seconds, values, args.mode, args.tolerance, args.max_interval)
+    rebuilt = reconstruct(kept_times, kept_values, seconds, COMPRESSORS[args.mode].interpolation)
+    error = np.nanmax(np.abs(rebuilt - values)) if len(values) else 0.0
+    ratio = len(values) / len(kept_times) if len(kept_times) else 0.0
+    print(f"{args.path}: {len(values)} readings -> {len(kept_times)} points ({ratio:.1f}x), "
+          f"max reconstruction error {error:.3f} µm")
+
+
+if __name__ == "__main__":
+    main()
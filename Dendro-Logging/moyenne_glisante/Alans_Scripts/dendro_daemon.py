@@ -0,0 +1,160 @@
+# Date: October 18, 2026
+# Resident version of dendro_monitor_scheduled.py. Instead of cron starting a new interpreter for every
+# reading (full start-up, imports and I2C/ADS1115 initialisation each time), this process initialises the
+# hardware once and then wakes on wall-clock boundaries given by a cron-like spec. Each wake-up target is
+# computed from the wall clock, so sleep overshoot never accumulates, and readings are stamped with the
+# boundary they belong to.
+#
+# Start it once from crontab instead of the per-reading entry:
+#   @reboot cd /home/madlab/dendro_logger && python3 /path/to/dendro_daemon.py --schedule "*/15 * * * *"
+#
+# A live daemon can be inspected without stopping it (see dendro_diagnostics.py): kill -USR1 toggles
+# cProfile, kill -USR2 dumps tracemalloc snapshots, and the resident memory is reported every hour.
+
+import time
+
+_IMPORT_START = time.monotonic()
+
+import argparse
+import datetime
+import os
+
+DEFAULT_SCHEDULE = "*/15 * * * *"
+WAKE_MARGIN = 0.02  # Seconds before the target where sleeping switches to short naps
+MAX_SLEEP = 60.0  # Longest single sleep, so wall clock changes (NTP) are noticed
+
+
+def _parse_field(text, low, high):
+    """Expand one cron field ("*", "*/15", "1-5", "0,30", "10-50/20") into a set of values"""
+    values = set()
+    for part in text.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(v) for v in part.split('-', 1))
+        else:
+            start = end = int(part)
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Invalid cron field {text!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Minute-resolution schedule in crontab syntax: minute hour day-of-month month day-of-week"""
+
+    def __init__(self, spec):
+        fields = spec.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 cron fields, got {spec!r}")
+        self.spec = spec
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        weekdays = _parse_field(fields[4], 0, 7)
+        self.weekdays = {d % 7 for d in weekdays}  # 0 and 7 are both Sunday
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def _day_matches(self, when):
+        cron_weekday = (when.weekday() + 1) % 7
+        if self.any_day or self.any_weekday:
+            return when.day in self.days and cron_weekday in self.weekdays
+        # Like cron, a restricted day-of-month and day-of-week match if either does
+        return when.day in self.days or cron_weekday in self.weekdays
+
+    def next_after(self, when):
+        """First scheduled minute strictly after `when`"""
+        candidate = when.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = candidate + datetime.timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = (candidate + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + datetime.timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += datetime.timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Schedule {self.spec!r} never fires")
+
+
+def sleep_until(target):
+    """Sleep until the wall-clock datetime `target` and return the wake-up error in seconds"""
+    while True:
+        remaining = (target - datetime.datetime.now()).total_seconds()
+        if remaining <= 0:
+            break
+        if remaining > WAKE_MARGIN:
+            time.sleep(min(remaining - WAKE_MARGIN, MAX_SLEEP))
+        else:
+            time.sleep(remaining)
+    return (datetime.datetime.now() - target).total_seconds()
+
+
+def process_age():
+    """Seconds since this process was started, from /proc when available"""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORT_START
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident dendrometer logger woken on a cron-like schedule")
+    parser.add_argument('--schedule', default=DEFAULT_SCHEDULE,
+                        help=f"Cron-style minute hour day month weekday (default {DEFAULT_SCHEDULE!r})")
+    parser.add_argument('--diagnostics-dir', default="diagnostics", help="Where profiles and memory snapshots go")
+    parser.add_argument('--rss-limit', type=float, default=200.0,
+                        help="Resident memory in MB above which a memory report is written (0 for none)")
+    args = parser.parse_args()
+    schedule = CronSchedule(args.schedule)
+
+    from dendro_diagnostics import Diagnostics
+    diagnostics = Diagnostics(args.diagnostics_dir, rss_limit=args.rss_limit * 1048576 or None).install()
+
+    # Heavy imports and hardware initialisation happen here, once for the lifetime of the process
+    init_start = time.monotonic()
+    import dendro_monitor_scheduled as monitor
+    init_time = time.monotonic() - init_start
+    print(f"Started in {process_age():.2f} s (hardware and libraries {init_time:.2f} s), "
+          f"schedule {schedule.spec!r}", flush=True)
+
+    readings = 0
+    jitter_total = 0.0
+    jitter_max = 0.0
+    while True:
+        target = schedule.next_after(datetime.datetime.now())
+        jitter = sleep_until(target)
+        readings += 1
+        jitter_total += abs(jitter)
+        jitter_max = max(jitter_max, abs(jitter))
+
+        start = time.monotonic()
+        try:
+            monitor.main(when=target)
+        except Exception as e:
+            # Keep the daemon alive, the next boundary gets a fresh attempt
+            print(f"Reading at {target} failed: {e}", flush=True)
+        print(f"Reading {readings} at {target}: wake-up jitter {jitter * 1000:+.1f} ms "
+              f"(mean {jitter_total / readings * 1000:.1f} ms, max {jitter_max * 1000:.1f} ms), "
+              f"took {time.monotonic() - start:.2f} s", flush=True)
+        diagnostics.tick()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nDaemon stopped by user")
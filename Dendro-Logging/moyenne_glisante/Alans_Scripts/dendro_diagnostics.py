@@ -0,0 +1,191 @@
+# Date: October 18, 2026
+# On-demand diagnostics for the long-running loggers, without stopping acquisition:
+#
+#   kill -USR1 <pid>   start cProfile; the next USR1 stops it and writes the profile
+#   kill -USR2 <pid>   start tracemalloc; every later USR2 writes a snapshot, the top allocations and the
+#                      growth since the previous snapshot
+#
+# Files go to diagnostics/ (profile_*.prof / .txt, memory_*.tracemalloc / .txt), the oldest removed past
+# KEEP_FILES. The resident set size is sampled every minute and reported every RSS_REPORT_INTERVAL with its
+# steady-state level (the median once the start-up allocations are over) and its growth rate, so a leak
+# on a deployed Pi shows as a steady climb in the output long before the memory runs out.
+#
+#   python -m pstats diagnostics/profile_20261018-120000.prof
+
+import cProfile
+import io
+import os
+import pstats
+import signal
+import time
+import tracemalloc
+
+DIAGNOSTICS_DIR = "diagnostics"
+KEEP_FILES = 20  # Dumps kept in the directory, oldest removed first
+TOP_ALLOCATIONS = 30  # Lines listed in the memory and profile reports
+TRACEMALLOC_FRAMES = 5  # Stack depth recorded for each allocation
+RSS_REPORT_INTERVAL = 3600.0  # Seconds between RSS reports, 0 to disable
+RSS_WARMUP = 600.0  # Seconds after start before RSS samples count towards the steady state
+RSS_SAMPLE_INTERVAL = 60.0  # Seconds between RSS samples
+RSS_HISTORY = 1440  # Samples kept for the steady state and growth rate (a day at one a minute)
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_bytes():
+    """Current resident set size, None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes():
+    """Highest resident set size of the process so far"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # kB on Linux
+
+
+def _megabytes(value):
+    return "n/a" if value is None else f"{value / 1048576:.1f} MB"
+
+
+class Diagnostics:
+    """Signal-driven profiler and memory snapshots, and RSS tracking for a monitor loop
+
+    Call install() once from the main thread and tick() once per cycle of the loop.
+    """
+
+    def __init__(self, directory=DIAGNOSTICS_DIR, profile_signal=getattr(signal, 'SIGUSR1', None),
+                 memory_signal=getattr(signal, 'SIGUSR2', None), report_interval=RSS_REPORT_INTERVAL,
+                 rss_limit=None, keep=KEEP_FILES):
+        self.directory = directory
+        self.profile_signal = profile_signal
+        self.memory_signal = memory_signal
+        self.report_interval = report_interval
+        self.rss_limit = rss_limit  # Bytes; above it a memory report is written once
+        self.keep = keep
+        self.profiler = None
+        self.profile_started = None
+        self.snapshot = None  # Previous tracemalloc snapshot, for the growth listing
+        self.started = time.monotonic()
+        self.last_report = self.started
+        self.rss_start = rss_bytes()
+        self.rss_samples = []  # (monotonic time, bytes) after the warm-up, at most RSS_HISTORY
+        self.last_sample = None
+        self.over_limit = False
+
+    def install(self):
+        """Register the signal handlers; the handlers run between two bytecodes of the main thread"""
+        if self.profile_signal is not None:
+            signal.signal(self.profile_signal, lambda signum, frame: self.toggle_profile())
+        if self.memory_signal is not None:
+            signal.signal(self.memory_signal, lambda signum, frame: self.dump_memory())
+        print(f"Diagnostics: kill -USR1 {os.getpid()} toggles profiling, kill -USR2 {os.getpid()} "
+              f"dumps memory to {self.directory}/", flush=True)
+        return self
+
+    def _path(self, prefix, extension):
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{prefix}_{time.strftime('%Y%m%d-%H%M%S')}{extension}")
+
+    def _prune(self, prefix):
+        """Remove the oldest dumps of a kind beyond `keep` (a dump is its files sharing a stem)"""
+        stems = sorted({os.path.splitext(name)[0] for name in os.listdir(self.directory)
+                        if name.startswith(prefix + "_")})
+        for stem in stems[:-self.keep] if self.keep else []:
+            for name in os.listdir(self.directory):
+                if os.path.splitext(name)[0] == stem:
+                    os.remove(os.path.join(self.directory, name))
+
+    def toggle_profile(self):
+        """Start profiling, or stop and write the profile with a cumulative-time report"""
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profile_started = time.monotonic()
+            self.profiler.enable()
+            print("Profiling started", flush=True)
+            return None
+        self.profiler.disable()
+        path = self._path("profile", ".prof")
+        self.profiler.dump_stats(path)
+        text = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=text)
+        stats.sort_stats('cumulative').print_stats(TOP_ALLOCATIONS)
+        with open(os.path.splitext(path)[0] + ".txt", 'w') as f:
+            f.write(f"Profiled for {time.monotonic() - self.profile_started:.1f} s\n")
+            f.write(text.getvalue())
+        self.profiler = None
+        self._prune("profile")
+        print(f"Profile written to {path}", flush=True)
+        return path
+
+    def dump_memory(self, reason="signal"):
+        """Start tracing allocations, or write a snapshot with the top allocations and their growth"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            print(f"Tracing allocations ({reason}), the next dump lists them", flush=True)
+            return None
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        path = self._path("memory", ".tracemalloc")
+        snapshot.dump(path)
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"Reason: {reason}", f"RSS {_megabytes(rss_bytes())}, peak {_megabytes(peak_rss_bytes())}",
+                 f"Traced {_megabytes(current)}, traced peak {_megabytes(peak)}", "",
+                 f"Top {TOP_ALLOCATIONS} allocations by line:"]
+        lines += [str(stat) for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]]
+        if self.snapshot is not None:
+            lines += ["", "Largest growth since the previous snapshot:"]
+            lines += [str(stat) for stat in snapshot.compare_to(self.snapshot, 'lineno')[:TOP_ALLOCATIONS]]
+        with open(os.path.splitext(path)[0] + ".txt", 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        self.snapshot = snapshot
+        self._prune("memory")
+        print(f"Memory snapshot written to {path}", flush=True)
+        return path
+
+    def steady_state(self):
+        """Median RSS after the warm-up and its growth in bytes per hour, None until there are samples"""
+        if len(self.rss_samples) < 2:
+            return None, None
+        values = sorted(rss for _, rss in self.rss_samples)
+        (first_time, first), (last_time, last) = self.rss_samples[0], self.rss_samples[-1]
+        hours = (last_time - first_time) / 3600.0
+        return values[len(values) // 2], (last - first) / hours if hours else None
+
+    def memory(self):
+        """RSS figures for the metrics snapshot and the reports"""
+        steady, growth = self.steady_state()
+        return {'rss_bytes': rss_bytes(), 'rss_start_bytes': self.rss_start, 'rss_peak_bytes': peak_rss_bytes(),
+                'rss_steady_bytes': steady, 'rss_growth_bytes_per_hour': growth}
+
+    def tick(self):
+        """Sample the RSS, report it when due and take a memory report when it crosses the limit"""
+        now = time.monotonic()
+        if self.last_sample is None or now - self.last_sample >= RSS_SAMPLE_INTERVAL:
+            self.last_sample = now
+            rss = rss_bytes()
+            if rss is not None and now - self.started >= RSS_WARMUP:
+                self.rss_samples.append((now, rss))
+                del self.rss_samples[:-RSS_HISTORY]
+            if self.rss_limit and rss is not None and rss > self.rss_limit and not self.over_limit:
+                self.over_limit = True
+                print(f"RSS {_megabytes(rss)} over the {_megabytes(self.rss_limit)} limit", flush=True)
+                # Tracing starts now if it was off, the following report will have the allocations
+                self.dump_memory(reason="RSS limit")
+        if self.report_interval and now - self.last_report >= self.report_interval:
+            self.last_report = now
+            print(self.report(), flush=True)
+
+    def report(self):
+        values = self.memory()
+        growth = values['rss_growth_bytes_per_hour']
+        return (f"RSS {_megabytes(values['rss_bytes'])} (start {_megabytes(values['rss_start_bytes'])}, "
+                f"steady {_megabytes(values['rss_steady_bytes'])}, peak {_megabytes(values['rss_peak_bytes'])}, "
+                f"growth {'n/a' if growth is None else f'{growth / 1024:+.0f} kB/h'})")
@@ -0,0 +1,270 @@
+# Date: October 18, 2026
+# Export of any time range of any channels into one wide table: a timestamp column and a column per
+# channel, written as CSV, XLSX or Parquet. The per-day channel logs are read a chunk of days at a time
+# and written out before the next chunk is read, so memory stays at a few days of data whatever the range.
+#
+# Rows are the union of the channel timestamps, or with --step a regular grid holding the mean of each
+# channel over every step. XLSX needs openpyxl and Parquet needs pyarrow.
+#
+#   python dendro_export.py LoggerData/Test/DD_Dorval-7 dorval.xlsx --channels 0-3 --step 15min
+
+import argparse
+import datetime
+import math
+import os
+import time
+import numpy as np
+from dendro_ingest import CHANNEL_FILE, align_channels, read_channel_file
+
+CHUNK_DAYS = 1
+XLSX_MAX_ROWS = 1048576  # Rows per sheet in Excel, the header included
+ONE_DAY = np.timedelta64(1, 'D')
+
+
+def find_channel_days(directory, channels=None):
+    """Return {channel: {datetime64[D] file date: [paths]}} for the channel logs of a directory"""
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        match = CHANNEL_FILE.match(name)
+        if not match:
+            continue
+        channel = int(match.group(1))
+        if channels is None or channel in channels:
+            day = np.datetime64(match.group(2), 'D')
+            files.setdefault(channel, {}).setdefault(day, []).append(os.path.join(directory, name))
+    return files
+
+
+def parse_channels(text):
+    """'0-3,8' to [0, 1, 2, 3, 8]"""
+    channels = []
+    for part in text.split(','):
+        if '-' in part:
+            first, last = (int(v) for v in part.split('-', 1))
+            channels.extend(range(first, last + 1))
+        else:
+            channels.append(int(part))
+    return sorted(set(channels))
+
+
+def resample(times, values, step):
+    """Mean of each column over consecutive `step` second bins; bins without readings are dropped"""
+    seconds = times.astype(np.int64)
+    bins = seconds - seconds % step
+    order = np.argsort(bins, kind='stable')
+    bins, values = bins[order], values[order]
+    first = np.concatenate(([0], np.flatnonzero(np.diff(bins)) + 1)) if len(bins) else np.zeros(0, int)
+    valid = ~np.isnan(values)
+    count = np.add.reduceat(valid, first, axis=0) if len(first) else np.zeros((0, values.shape[1]))
+    total = np.add.reduceat(np.where(valid, values, 0.0), first, axis=0) if len(first) else count
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(count > 0, total / count, np.nan)
+    return bins[first].astype('datetime64[s]'), means
+
+
+class ChannelChunks:
+    """Aligned (times, values) chunks of a time range, reading each day's logs at most once
+
+    Log files are named after the day they were started but can hold readings of the day before or
+    after, so the files of the neighbouring days are kept loaded while a chunk is assembled.
+    """
+
+    def __init__(self, directory, channels=None, start=None, end=None, step=None, chunk_days=CHUNK_DAYS):
+        self.files = find_channel_days(directory, channels)
+        self.channels = sorted(self.files) if channels is None else list(channels)
+        days = sorted({day for by_day in self.files.values() for day in by_day})
+        self.start = np.datetime64(start, 's') if start is not None else None
+        self.end = np.datetime64(end, 's') if end is not None else None
+        first = days[0] - ONE_DAY if days else None
+        last = days[-1] + 2 * ONE_DAY if days else None
+        if self.start is not None and first is not None:
+            first = max(first, self.start.astype('datetime64[D]'))
+        if self.end is not None and last is not None:
+            last = min(last, (self.end - np.timedelta64(1, 's')).astype('datetime64[D]') + ONE_DAY)
+        self.first_day, self.last_day = first, last
+        self.step = step
+        self.chunk_days = chunk_days
+        self.loaded = {}  # (channel, file date) -> (times, values)
+        self.stats = {'files': 0, 'readings': 0, 'rows': 0, 'chunks': 0}
+
+    def _series(self, channel, day):
+        key = (channel, day)
+        if key not in self.loaded:
+            parts = [read_channel_file(p) for p in self.files.get(channel, {}).get(day, [])]
+            self.stats['files'] += len(parts)
+            if parts:
+                self.loaded[key] = (np.concatenate([t for t, _ in parts]), np.concatenate([v for _, v in parts]))
+            else:
+                self.loaded[key] = (np.zeros(0, dtype='datetime64[s]'), np.zeros(0))
+        return self.loaded[key]
+
+    def chunk(self, first_day, last_day):
+        """Aligned readings with first_day <= time < last_day, within the requested range
+
+        With a step, inner chunk edges move back to a multiple of it, so a bin that spans midnight
+        (a step that does not divide a day) is in one chunk only.
+        """
+        low = first_day.astype('datetime64[s]')
+        high = last_day.astype('datetime64[s]')
+        if self.step:
+            step = np.timedelta64(self.step, 's')
+            if first_day > self.first_day:
+                low -= (low - np.datetime64(0, 's')) % step
+            if last_day < self.last_day:
+                high -= (high - np.datetime64(0, 's')) % step
+        following = high  # Start of the next chunk
+        if self.start is not None:
+            low = max(low, self.start)
+        if self.end is not None:
+            high = min(high, self.end)
+        series = {}
+        for channel in self.channels:
+            parts = [self._series(channel, day) for day in np.arange(low.astype('datetime64[D]') - ONE_DAY, last_day + ONE_DAY)]
+            times = np.concatenate([t for t, _ in parts])
+            values = np.concatenate([v for _, v in parts])
+            keep = (times >= low) & (times < high)
+            order = np.argsort(times[keep], kind='stable')
+            series[channel] = (times[keep][order], values[keep][order])
+            self.stats['readings'] += int(keep.sum())
+        # Files of days that no later chunk reads are released
+        for key in [k for k in self.loaded if k[1] < following.astype('datetime64[D]') - ONE_DAY]:
+            del self.loaded[key]
+        dataset = align_channels(series)
+        times, values = dataset['time'], dataset['values']
+        if self.step:
+            times, values = resample(times, values, self.step)
+        return times, values
+
+    def __iter__(self):
+        if self.first_day is None:
+            return
+        day = self.first_day
+        while day < self.last_day:
+            following = min(day + self.chunk_days * ONE_DAY, self.last_day)
+            times, values = self.chunk(day, following)
+            day = following
+            if len(times):
+                self.stats['rows'] += len(times)
+                self.stats['chunks'] += 1
+                yield times, values
+
+
+def column_names(channels):
+    return ['time'] + [f"channel_{channel}" for channel in channels]
+
+
+class CsvTableWriter:
+    """One format operation per row and one write per chunk; missing readings are empty cells"""
+
+    def __init__(self, path, channels, precision=4):
+        self.file = open(path, 'w', newline='')
+        self.file.write(",".join(column_names(channels)) + "\n")
+        self.row_format = "%s" + f",%.{precision}f" * len(channels) + "\n"
+
+    def write(self, times, values):
+        texts = np.char.replace(np.datetime_as_string(times, unit='s'), 'T', ' ').tolist()
+        rows = "".join([self.row_format % ((text,) + tuple(row)) for text, row in zip(texts, values.tolist())])
+        self.file.write(rows.replace(",nan", ","))
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxTableWriter:
+    """Write-only workbook, rows streamed to disk; a new sheet starts when one is full"""
+
+    def __init__(self, path, channels):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise ImportError("XLSX export needs openpyxl (pip install openpyxl)") from None
+        self.path = path
+        self.header = column_names(channels)
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+        self.rows = XLSX_MAX_ROWS
+
+    def _next_sheet(self):
+        self.sheet = self.workbook.create_sheet(f"data_{len(self.workbook.worksheets) + 1}")
+        self.sheet.append(self.header)
+        self.rows = 1
+
+    def write(self, times, values):
+        stamps = times.astype('datetime64[s]').astype(datetime.datetime)
+        for stamp, row in zip(stamps, values.tolist()):
+            if self.rows >= XLSX_MAX_ROWS:
+                self._next_sheet()
+            self.sheet.append([stamp] + [None if math.isnan(v) else v for v in row])
+            self.rows += 1
+
+    def close(self):
+        if self.sheet is None:
+            self._next_sheet()
+        self.workbook.save(self.path)
+
+
+class ParquetTableWriter:
+    """One row group per chunk"""
+
+    def __init__(self, path, channels):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export needs pyarrow (pip install pyarrow)") from None
+        self.pa = pa
+        names = column_names(channels)
+        self.schema = pa.schema([(names[0], pa.timestamp('s'))] + [(name, pa.float64()) for name in names[1:]])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write(self, times, values):
+        columns = [self.pa.array(times.astype('datetime64[s]'), type=self.pa.timestamp('s'))]
+        columns += [self.pa.array(values[:, col], from_pandas=True) for col in range(values.shape[1])]
+        self.writer.write_table(self.pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {'csv': CsvTableWriter, 'xlsx': XlsxTableWriter, 'parquet': ParquetTableWriter}
+
+
+def export(directory, path, channels=None, start=None, end=None, step=None, fmt=None, chunk_days=CHUNK_DAYS):
+    """Stream the channels of a deployment directory into one wide table; returns the export stats"""
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {', '.join(WRITERS)}")
+    chunks = ChannelChunks(directory, channels, start, end, step, chunk_days)
+    writer = WRITERS[fmt](path, chunks.channels)
+    try:
+        for times, values in chunks:
+            writer.write(times, values)
+    finally:
+        writer.close()
+    return chunks.stats
+
+
+def main():
+    from dendro_rollup import parse_resolution
+
+    parser = argparse.ArgumentParser(description="Export channel logs into one aligned table")
+    parser.add_argument('directory', help="Deployment directory holding channel logs")
+    parser.add_argument('output', help="Output file, .csv, .xlsx or .parquet")
+    parser.add_argument('--channels', help="Channels to export, e.g. 0-3,8 (default all)")
+    parser.add_argument('--from', dest='start', help="Local date/time, e.g. 2025-05-01 or 2025-05-01T06:00")
+    parser.add_argument('--to', dest='end', help="Local date/time, not included")
+    parser.add_argument('--step', help="Resample onto a regular grid, e.g. 1min or 15min (mean per step)")
+    parser.add_argument('--format', choices=sorted(WRITERS), help="Output format (default from the extension)")
+    parser.add_argument('--chunk-days', type=int, default=CHUNK_DAYS, help="Days read per chunk (default 1)")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    stats = export(args.directory, args.output, parse_channels(args.channels) if args.channels else None,
+                   args.start, args.end, parse_resolution(args.step) if args.step else None, args.format,
+                   args.chunk_days)
+    print(f"{args.output}: {stats['rows']} rows from {stats['readings']} readings in {stats['files']} files, "
+          f"{stats['chunks']} chunks in {time.monotonic() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
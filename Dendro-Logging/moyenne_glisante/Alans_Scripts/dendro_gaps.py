@@ -0,0 +1,300 @@
+# Date: October 18, 2026
+# Sidecar index of the channel logs of a directory: the time range and sample count of every file, the
+# gaps between consecutive readings of a channel, and the changes of logging cadence. The writers keep
+# it up to date as they append, it can be rebuilt from the logs in bulk, and outage questions are
+# answered from the index alone:
+#
+#   python dendro_gaps.py build LoggerData/*/*
+#   python dendro_gaps.py missing LoggerData/*/* --from 2025-06-01 --to 2025-07-01
+#
+# A reading interval is a gap when it exceeds both GAP_THRESHOLD and GAP_FACTOR times the cadence, the
+# median of the WINDOW intervals before it, so a second of jitter or a single outage does not move it.
+# The cadence changes listed are moves of that median by more than CADENCE_TOLERANCE. Gaps and changes
+# belong to the file holding the reading that ends them. Times are the ones stored in the logs (local
+# wall-clock seconds for the text logs).
+#
+# With compression (dendro_compression) the writer indexes every reading, logged or not. A compressed log
+# only holds a point every `max_interval` seconds at worst, so a rebuild from it reports the intervals
+# longer than the threshold plus max_interval as gaps, and no cadence changes. max_interval is saved with
+# the index and used by later rebuilds, the command line ones included.
+
+import argparse
+import json
+import os
+import time
+import numpy as np
+
+INDEX_NAME = ".gap_index.json"
+GAP_THRESHOLD = 120  # Seconds; shorter interruptions are never reported
+GAP_FACTOR = 2.5  # An interval this many times the cadence is a gap
+WINDOW = 5  # Intervals whose median is the cadence (odd)
+CADENCE_TOLERANCE = 0.1  # Relative move of the cadence reported as a change
+
+
+def _new_carry():
+    """State of a channel between two readings: last time, last intervals and the reported cadence"""
+    return {'last': None, 'recent': [], 'cadence': None}
+
+
+def _new_entry(channel):
+    return {'channel': channel, 'first': None, 'last': None, 'count': 0, 'size': 0, 'gaps': [],
+            'cadence_changes': []}
+
+
+def is_gap(interval, cadence, threshold=GAP_THRESHOLD, factor=GAP_FACTOR):
+    return interval > threshold and (cadence is None or interval > factor * cadence)
+
+
+def cadence_moved(cadence, reported, tolerance=CADENCE_TOLERANCE):
+    return abs(cadence - reported) > tolerance * reported
+
+
+def analyse(seconds, carry, threshold=GAP_THRESHOLD, factor=GAP_FACTOR, window=WINDOW):
+    """Gaps and cadence changes of sorted int64 `seconds` following a channel's `carry` state
+
+    Vectorized equivalent of feeding the readings one by one to GapIndex.add. Returns gaps as (start,
+    end, index of the end reading), cadence changes as (time, old, new, index of the reading that showed
+    the change) and the new carry.
+    """
+    carry = dict(carry)
+    if len(seconds) == 0:
+        return [], [], carry
+    full = seconds if carry['last'] is None else np.concatenate(([carry['last']], seconds))
+    shift = 0 if carry['last'] is None else 1  # Interval i ends at seconds[i + 1 - shift]
+    carry['last'] = int(full[-1])
+    if len(full) < 2:
+        return [], [], carry
+
+    d = np.diff(full)
+    history = np.concatenate((np.asarray(carry['recent'], dtype=np.int64), d))
+    # Median of the `window` intervals before each interval, NaN until there are that many
+    cadence = np.full(len(d), np.nan)
+    first = window - len(carry['recent'])  # First interval with a full window before it
+    if len(history) > window and first < len(d):
+        medians = np.median(np.lib.stride_tricks.sliding_window_view(history[:-1], window), axis=1)
+        cadence[max(first, 0):] = medians[max(-first, 0):]
+    limit = np.where(np.isnan(cadence), threshold, np.maximum(threshold, factor * np.nan_to_num(cadence)))
+    gaps = [(int(full[i]), int(full[i + 1]), int(i + 1 - shift)) for i in np.flatnonzero(d > limit)]
+
+    changes = []
+    reported = carry['cadence']
+    known = np.flatnonzero(~np.isnan(cadence))
+    if len(known):
+        # Only the intervals where the median moves can change the reported cadence
+        candidates = known[np.concatenate(([True], cadence[known][1:] != cadence[known][:-1]))]
+        for i in candidates:
+            value = float(cadence[i])
+            if reported is None:
+                reported = value
+            elif cadence_moved(value, reported):
+                changes.append((int(full[i]), reported, value, int(i + 1 - shift)))
+                reported = value
+    carry.update(recent=history[-window:].tolist(), cadence=reported)
+    return gaps, changes, carry
+
+
+class GapIndex:
+    """The index of one directory, kept in memory and saved next to the logs"""
+
+    def __init__(self, directory=".", threshold=GAP_THRESHOLD, factor=GAP_FACTOR, window=WINDOW,
+                 max_interval=None):
+        self.directory = directory
+        self.path = os.path.join(directory, INDEX_NAME)
+        self.threshold = threshold
+        self.factor = factor
+        self.window = window
+        self.max_interval = max_interval  # Longest interval between the points of a compressed log, 0 for none
+        self.files = {}  # file name -> entry
+        self.channels = {}  # channel -> carry
+        self.dirty = set()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.files = data.get('files', {})
+        self.channels = {int(channel): carry for channel, carry in data.get('channels', {}).items()}
+        if self.max_interval is None:
+            self.max_interval = data.get('max_interval')
+
+    def save(self):
+        """Record the sizes of the files updated since the last save and rewrite the index"""
+        if not self.dirty:
+            return
+        for name in self.dirty:
+            path = os.path.join(self.directory, name)
+            self.files[name]['size'] = os.path.getsize(path) if os.path.exists(path) else 0
+        self.dirty.clear()
+        data = {'version': 1, 'threshold': self.threshold, 'factor': self.factor, 'window': self.window,
+                'max_interval': self.max_interval, 'files': self.files,
+                'channels': {str(c): carry for c, carry in self.channels.items()}}
+        temporary = self.path + ".tmp"
+        with open(temporary, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(temporary, self.path)
+
+    def add(self, name, channel, seconds):
+        """Account for a reading at `seconds` appended to the file `name`"""
+        seconds = int(seconds)
+        entry = self.files.get(name)
+        if entry is None:
+            entry = self.files[name] = _new_entry(channel)
+        carry = self.channels.get(channel)
+        if carry is None:
+            carry = self.channels[channel] = _new_carry()
+        self.dirty.add(name)
+
+        if carry['last'] is not None:
+            interval = seconds - carry['last']
+            recent = carry['recent']
+            cadence = float(np.median(recent)) if len(recent) == self.window else None
+            if is_gap(interval, cadence, self.threshold, self.factor):
+                entry['gaps'].append([carry['last'], seconds])
+            if cadence is not None:
+                if carry['cadence'] is None:
+                    carry['cadence'] = cadence
+                elif cadence_moved(cadence, carry['cadence']):
+                    entry['cadence_changes'].append([carry['last'], carry['cadence'], cadence])
+                    carry['cadence'] = cadence
+            recent.append(interval)
+            del recent[:-self.window]
+        carry['last'] = seconds
+        entry['first'] = seconds if entry['first'] is None else min(entry['first'], seconds)
+        entry['last'] = seconds if entry['last'] is None else max(entry['last'], seconds)
+        entry['count'] += 1
+
+    def stale(self):
+        """Channels with a log whose size differs from the one indexed, or that is not indexed"""
+        from dendro_ingest import find_channel_files
+
+        channels = set()
+        for channel, paths in find_channel_files(self.directory).items():
+            for path in paths:
+                entry = self.files.get(os.path.basename(path))
+                if entry is None or entry['size'] != os.path.getsize(path):
+                    channels.add(channel)
+        return channels
+
+    def rebuild(self, channels=None):
+        """Index the logs of `channels` (default all) again from the files, in one pass per channel"""
+        from dendro_ingest import find_channel_files, read_channel_file
+
+        files = find_channel_files(self.directory)
+        for channel in sorted(files if channels is None else channels):
+            parts = []
+            for path in files.get(channel, []):
+                times, _ = read_channel_file(path)
+                parts.append((os.path.basename(path), np.sort(times.astype(np.int64))))
+            for name in [n for n, e in self.files.items() if e['channel'] == channel]:
+                del self.files[name]
+            # The channel's files in time order form one series, each reading tagged with its file
+            parts.sort(key=lambda part: part[1][0] if len(part[1]) else 0)
+            seconds = np.concatenate([s for _, s in parts]) if parts else np.zeros(0, dtype=np.int64)
+            owner = np.repeat(np.arange(len(parts)), [len(s) for _, s in parts])
+            if self.max_interval:
+                # Compressed log: the intervals say nothing of the cadence, only a long one is an outage
+                gaps, changes, carry = analyse(seconds, _new_carry(), self.threshold + self.max_interval, 0,
+                                               self.window)
+                changes = []
+                carry.update(recent=[], cadence=None)
+            else:
+                gaps, changes, carry = analyse(seconds, _new_carry(), self.threshold, self.factor, self.window)
+            self.channels[channel] = carry
+            for name, part in parts:
+                entry = self.files[name] = _new_entry(channel)
+                if len(part):
+                    entry.update(first=int(part[0]), last=int(part[-1]), count=len(part))
+                self.dirty.add(name)
+            for start, end, index in gaps:
+                self.files[parts[owner[index]][0]]['gaps'].append([start, end])
+            for at, old, new, index in changes:
+                self.files[parts[owner[index]][0]]['cadence_changes'].append([at, old, new])
+        self.save()
+
+    def refresh(self):
+        """Rebuild the channels whose logs changed behind the index's back (crash, copy, other writer)"""
+        channels = self.stale()
+        if channels:
+            self.rebuild(channels)
+        return channels
+
+    def missing(self, start=None, end=None, channels=None):
+        """(channel, gap start, gap end) of the outages overlapping [start, end), in index time
+
+        Besides the recorded gaps, a channel without readings at the beginning or the end of the range
+        (for longer than the threshold) is missing there too.
+        """
+        by_channel = {}
+        for entry in self.files.values():
+            if entry['count'] and (channels is None or entry['channel'] in channels):
+                by_channel.setdefault(entry['channel'], []).append(entry)
+        result = []
+        for channel, entries in sorted(by_channel.items()):
+            first = min(e['first'] for e in entries)
+            last = max(e['last'] for e in entries)
+            if start is not None and first - start > self.threshold:
+                result.append((channel, start, min(first, end) if end is not None else first))
+            for entry in entries:
+                for gap_start, gap_end in entry['gaps']:
+                    if (end is None or gap_start < end) and (start is None or gap_end > start):
+                        result.append((channel, gap_start, gap_end))
+            if end is not None and end - last > self.threshold:
+                result.append((channel, max(last, start) if start is not None else last, end))
+        result.sort()
+        return result
+
+
+def _to_seconds(text):
+    return None if text is None else int(np.datetime64(text, 's').astype(np.int64))
+
+
+def _format(seconds):
+    return str(np.datetime64(int(seconds), 's')).replace('T', ' ')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gap and cadence index of channel log directories")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="Rebuild the index of each directory from its logs")
+    build.add_argument('directories', nargs='+')
+    build.add_argument('--max-interval', type=float,
+                       help="Logs written with compression: its max_interval in seconds (default: as saved)")
+    missing = commands.add_parser('missing', help="List the outages of a time range")
+    missing.add_argument('directories', nargs='+')
+    missing.add_argument('--from', dest='start', help="Local date/time, e.g. 2025-06-01")
+    missing.add_argument('--to', dest='end', help="Local date/time, not included")
+    missing.add_argument('--refresh', action='store_true', help="Re-index logs changed since the index was saved")
+    missing.add_argument('--cadence', action='store_true', help="Also list the cadence changes")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    if args.command == 'build':
+        for directory in args.directories:
+            index = GapIndex(directory, max_interval=args.max_interval)
+            index.rebuild()
+            gaps = sum(len(e['gaps']) for e in index.files.values())
+            print(f"{directory}: {len(index.files)} files, {gaps} gaps")
+        print(f"Indexed in {time.monotonic() - start:.2f} s")
+        return
+
+    low, high = _to_seconds(args.start), _to_seconds(args.end)
+    for directory in args.directories:
+        index = GapIndex(directory)
+        if args.refresh:
+            index.refresh()
+        for channel, gap_start, gap_end in index.missing(low, high):
+            print(f"{directory}\tchannel {channel}\t{_format(gap_start)} to {_format(gap_end)}\t"
+                  f"{(gap_end - gap_start) / 3600:.2f} h")
+        if args.cadence:
+            for name, entry in sorted(index.files.items()):
+                for at, old, new in entry['cadence_changes']:
+                    if (low is None or at >= low) and (high is None or at < high):
+                        print(f"{directory}\tchannel {entry['channel']}\t{_format(at)}\tcadence {old} s -> {new} s")
+    print(f"Answered from the index in {(time.monotonic() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# Date: October 18, 2026
+# Reader for the Onset HOBO UX120-006M (4 channel analog) .hobo files in LoggerData, so they can be
+# compared with the Pi dendrometer logs without going through HOBOware.
+#
+# The layout was worked out from our own files, it is not a published format:
+#   - "HOBO" magic, then 0x88 <tag> <length> <value> metadata fields (launch time, interval, channel
+#     scaling "um|0.0|2.5|0.0|25000.0", labels...)
+#   - from DATA_OFFSET, records of one big-endian uint16 per channel, one record per logging interval
+#   - event markers (FF FF E0 xx xx xx) can sit between records, anything else starting with FF FF / FF FE
+#     after the records (trailer events, erased flash) ends the data
+# Raw readings are taken as 0..65535 over 0..2.5 V, readings from 0xFFE0 up flag a sensor out of range.
+#
+# Usage: python dendro_hobo.py ../../LoggerData --output hobo_logs
+
+import argparse
+import datetime
+import os
+import struct
+import numpy as np
+
+MAGIC = b"HOBO"
+METADATA_OFFSET = 4
+DATA_OFFSET = 0x1000
+FIELD_MARKER = 0x88
+EVENT_SIZE = 6
+RAW_FULL_SCALE = 65535.0
+VOLTS_FULL_SCALE = 2.5
+INVALID_RAW = 0xFFE0
+CHUNK_RECORDS = 65536
+
+# Metadata tags
+TAG_MODEL = 0x05
+TAG_SERIAL = 0x06
+TAG_LAUNCH_TIME = 0x07
+TAG_INTERVAL = 0x08
+TAG_NAME = 0x0A
+TAG_TIMEZONE = 0x14
+TAG_UTC_OFFSET = 0x12
+TAG_CHANNEL_INDEX = 0x68
+TAG_CHANNEL_LABEL = 0x6A
+TAG_CHANNEL_SCALING = 0x6B
+
+
+def _read_fields(header, offset):
+    """Yield (tag, value bytes) for consecutive metadata fields starting at offset"""
+    while offset + 3 <= len(header) and header[offset] == FIELD_MARKER:
+        tag = header[offset + 1]
+        length = header[offset + 2]
+        yield tag, header[offset + 3:offset + 3 + length]
+        offset += 3 + length
+
+
+def _find_metadata_start(header):
+    """Offset of the first field of the chain of fields holding the logger maker and model"""
+    target = header.find(b"Onset Computer Corp.")
+    if target < 0:
+        raise ValueError("No launch metadata found in HOBO file")
+    offset = header.find(bytes([FIELD_MARKER]), METADATA_OFFSET)
+    while 0 <= offset < target:
+        end = offset
+        for tag, value in _read_fields(header, offset):
+            end += 3 + len(value)
+        if end > target:
+            return offset
+        offset = header.find(bytes([FIELD_MARKER]), offset + 1)
+    raise ValueError("Cannot locate the start of the HOBO metadata fields")
+
+
+def read_metadata(data):
+    """Parse the launch metadata of a HOBO file"""
+    header = bytes(data[:DATA_OFFSET])
+    if header[:4] != MAGIC:
+        raise ValueError("Not a HOBO file")
+    meta = {'channels': []}
+    channel = None
+    for tag, value in _read_fields(header, _find_metadata_start(header)):
+        if tag == TAG_MODEL:
+            meta['model'] = value.decode('ascii', 'replace')
+        elif tag == TAG_SERIAL:
+            meta['serial'] = value.decode('ascii', 'replace')
+        elif tag == TAG_NAME:
+            meta['name'] = value.decode('ascii', 'replace')
+        elif tag == TAG_TIMEZONE:
+            meta['timezone'] = value.decode('ascii', 'replace')
+        elif tag == TAG_UTC_OFFSET:
+            meta['utc_offset'] = struct.unpack(">i", value)[0]
+        elif tag == TAG_INTERVAL:
+            meta['interval'] = struct.unpack(">I", value)[0]
+        elif tag == TAG_LAUNCH_TIME:
+            # Decimal bytes: century, year, month, day, hour, minute, second
+            meta['launch_time'] = datetime.datetime(value[0] * 100 + value[1], *value[2:7])
+        elif tag == TAG_CHANNEL_INDEX:
+            channel = {'index': int(value.decode('ascii')), 'label': '', 'units': 'V', 'scaling': None}
+            meta['channels'].append(channel)
+        elif tag == TAG_CHANNEL_SCALING and channel is not None:
+            units, raw_lo, raw_hi, scaled_lo, scaled_hi = value.decode('ascii').split('|')
+            channel['units'] = units
+            channel['scaling'] = (float(raw_lo), float(raw_hi), float(scaled_lo), float(scaled_hi))
+        elif tag == TAG_CHANNEL_LABEL and channel is not None:
+            channel['label'] = value.decode('ascii', 'replace')
+    if 'launch_time' not in meta or 'interval' not in meta or not meta['channels']:
+        raise ValueError("Incomplete HOBO metadata (launch time, interval or channels missing)")
+    return meta
+
+
+def iter_raw_chunks(data, n_channels, chunk_records=CHUNK_RECORDS):
+    """Yield (first record index, raw uint16 array of shape records x channels) from the data area
+
+    data is usually a memory map, only one chunk is converted at a time.
+    """
+    record_size = 2 * n_channels
+    offset = DATA_OFFSET
+    index = 0
+    while offset + record_size <= len(data):
+        count = min(chunk_records, (len(data) - offset) // record_size)
+        raw = np.frombuffer(data, dtype='>u2', count=count * n_channels, offset=offset)
+        raw = raw.reshape(count, n_channels)
+        # Records never start with 0xFFFE/0xFFFF, those words begin events or the erased area
+        markers = np.flatnonzero(raw[:, 0] >= 0xFFFE)
+        end = markers[0] if len(markers) else count
+        if end:
+            yield index, raw[:end].astype(np.uint16)
+            index += end
+        offset += end * record_size
+        if end == count:
+            continue
+        marker = bytes(data[offset:offset + EVENT_SIZE])
+        if marker[:3] == b"\xff\xff\xe0" and len(marker) == EVENT_SIZE:
+            offset += EVENT_SIZE  # Logger event between records, skip it
+        else:
+            return
+
+
+def raw_to_values(raw, channels):
+    """Convert raw readings to the scaled channel units, NaN where the sensor was out of range"""
+    volts = raw / RAW_FULL_SCALE * VOLTS_FULL_SCALE
+    values = np.empty(raw.shape, dtype=np.float64)
+    for col, channel in enumerate(channels):
+        if channel['scaling'] is None:
+            values[:, col] = volts[:, col]
+            continue
+        raw_lo, raw_hi, scaled_lo, scaled_hi = channel['scaling']
+        values[:, col] = scaled_lo + (volts[:, col] - raw_lo) * (scaled_hi - scaled_lo) / (raw_hi - raw_lo)
+    values[raw >= INVALID_RAW] = np.nan
+    return values
+
+
+def iter_hobo(path, chunk_records=CHUNK_RECORDS):
+    """Memory-map a .hobo file and yield (metadata, times, values) one chunk of records at a time"""
+    with open(path, 'rb') as f:
+        data = np.memmap(f, dtype=np.uint8, mode='r')
+        meta = read_metadata(data)
+        launch = np.datetime64(meta['launch_time'], 's')
+        step = np.timedelta64(meta['interval'], 's')
+        for index, raw in iter_raw_chunks(data, len(meta['channels']), chunk_records):
+            times = launch + (index + np.arange(len(raw))) * step
+            yield meta, times, raw_to_values(raw, meta['channels'])
+
+
+def read_hobo(path):
+    """Read a whole .hobo file into a dataset like the ones built by dendro_ingest"""
+    times = []
+    values = []
+    meta = None
+    for meta, chunk_times, chunk_values in iter_hobo(path):
+        times.append(chunk_times)
+        values.append(chunk_values)
+    if meta is None:
+        with open(path, 'rb') as f:
+            meta = read_metadata(np.memmap(f, dtype=np.uint8, mode='r'))
+        times = [np.zeros(0, dtype='datetime64[s]')]
+        values = [np.zeros((0, len(meta['channels'])))]
+    return {
+        'time': np.concatenate(times),
+        'channels': np.array([c['index'] for c in meta['channels']], dtype=np.int64),
+        'values': np.concatenate(values),
+        'metadata': meta,
+    }
+
+
+def write_channel_logs(path, out_dir):
+    """Convert a .hobo file to per-channel, per-day text logs in the Pi format under out_dir
+
+    Returns the number of lines written. Out of range readings are left out, as the Pi scripts do.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    handles = {}
+    lines = 0
+    try:
+        for meta, times, values in iter_hobo(path):
+            stamps = np.datetime_as_string(times, unit='s')
+            stamps = np.char.replace(stamps, 'T', ' ')
+            days = stamps.astype('U10')
+            for col, channel in enumerate(meta['channels']):
+                good = ~np.isnan(values[:, col])
+                for day in np.unique(days[good]):
+                    rows = good & (days == day)
+                    name = f"channel_{channel['index']}_{day}.txt"
+                    if name not in handles:
+                        handles[name] = open(os.path.join(out_dir, name), 'w')
+                    text = "".join(f"{s}, {v}\n" for s, v in zip(stamps[rows], values[rows, col]))
+                    handles[name].write(text)
+                    lines += int(rows.sum())
+    finally:
+        for f in handles.values():
+            f.close()
+    return lines
+
+
+def convert_directory(directory, out_dir):
+    """Convert every .hobo file of a directory, each logger to its own sub-directory of out_dir"""
+    results = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith('.hobo'):
+            continue
+        target = os.path.join(out_dir, os.path.splitext(name)[0])
+        results[name] = write_channel_logs(os.path.join(directory, name), target)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode HOBO UX120-006M .hobo files")
+    parser.add_argument('path', help=".hobo file, or a directory of them with --output")
+    parser.add_argument('--output', help="Write per-channel daily logs under this directory")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.path):
+        if not args.output:
+            parser.error("--output is needed to convert a directory")
+        for name, lines in convert_directory(args.path, args.output).items():
+            print(f"{name}: {lines} readings")
+        return
+
+    dataset = read_hobo(args.path)
+    meta = dataset['metadata']
+    print(f"{meta.get('name', '')} ({meta.get('model', '')}, serial {meta.get('serial', '')})")
+    print(f"Launched {meta['launch_time']} {meta.get('timezone', '')}, interval {meta['interval']} s")
+    for col, channel in enumerate(meta['channels']):
+        column = dataset['values'][:, col]
+        valid = np.count_nonzero(~np.isnan(column))
+        print(f"  Ch{channel['index']} {channel['label']}: {valid}/{len(column)} valid readings ({channel['units']})")
+    if len(dataset['time']):
+        print(f"Records from {dataset['time'][0]} to {dataset['time'][-1]}")
+    if args.output:
+        print(f"{write_channel_logs(args.path, args.output)} readings written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# Date: October 18, 2026
+# Bulk ingestion of the per-channel logs (micron_values_channel_{n}_{date}.txt, channel_{n}_{date}.txt
+# and the binary .dbin files) into one time-indexed multi-channel dataset per deployment directory.
+# Text files are parsed with NumPy over the whole file at once instead of splitting lines in Python.
+#
+# Usage: python dendro_ingest.py LoggerData/Test/DD_Dorval-7 [--no-cache] [--output dataset.npz]
+
+import argparse
+import os
+import re
+import time
+import numpy as np
+from dendro_binlog import load_channel_logs
+
+CHANNEL_FILE = re.compile(r"^(?:micron_values_)?channel_(\d+)_(\d{4}-\d{2}-\d{2})\.(txt|dbin)$")
+CACHE_NAME = ".dendro_cache.npz"
+TIMESTAMP_WIDTH = 19  # "YYYY-MM-DD HH:MM:SS"
+MAX_VALUE_WIDTH = 32
+
+# Expected character class at each timestamp position: digit, or the literal separator
+_SEPARATORS = {4: b'-', 7: b'-', 10: b' ', 13: b':', 16: b':'}
+_VALUE_CHARS = np.zeros(256, dtype=bool)
+_VALUE_CHARS[list(b"0123456789.-+eE \0")] = True
+_MONTH_DAYS = np.array([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])  # February checked for leap years
+
+
+def _field(stamp, first, last):
+    """Integer value of the digit columns first..last-1 of the timestamp matrix"""
+    value = np.zeros(len(stamp), dtype=np.int64)
+    for col in range(first, last):
+        value = value * 10 + (stamp[:, col].astype(np.int64) - ord('0'))
+    return value
+
+
+def _valid_dates(stamp):
+    """Rows of an all-digit timestamp matrix that hold a real calendar date and time of day"""
+    year, month, day = _field(stamp, 0, 4), _field(stamp, 5, 7), _field(stamp, 8, 10)
+    valid = (month >= 1) & (month <= 12) & (day >= 1)
+    valid &= day <= _MONTH_DAYS[np.clip(month, 0, 12)]
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    valid &= (month != 2) | (day <= 28) | leap
+    valid &= (_field(stamp, 11, 13) < 24) & (_field(stamp, 14, 16) < 60) & (_field(stamp, 17, 19) < 60)
+    return valid
+
+
+def parse_channel_text(data):
+    """Parse the bytes of a text channel log into (datetime64[s] times, float64 microns)
+
+    Lines that are malformed or cut short, such as a partial last line, or whose date does not exist,
+    are skipped.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    if buf.size == 0:
+        return np.zeros(0, dtype='datetime64[s]'), np.zeros(0)
+
+    ends = np.flatnonzero(buf == ord('\n'))
+    if buf[-1] != ord('\n'):
+        ends = np.append(ends, buf.size)  # Last line without newline, validated like the others
+    starts = np.concatenate(([0], ends[:-1] + 1))
+
+    # Lines must hold a timestamp, a comma and at least one value character
+    keep = ends - starts >= TIMESTAMP_WIDTH + 2
+    starts, ends = starts[keep], ends[keep]
+    keep = buf[starts + TIMESTAMP_WIDTH] == ord(',')
+    starts, ends = starts[keep], ends[keep]
+
+    stamp = buf[starts[:, None] + np.arange(TIMESTAMP_WIDTH)]
+    valid = np.ones(len(starts), dtype=bool)
+    for col in range(TIMESTAMP_WIDTH):
+        if col in _SEPARATORS:
+            valid &= stamp[:, col] == _SEPARATORS[col][0]
+        else:
+            valid &= (stamp[:, col] >= ord('0')) & (stamp[:, col] <= ord('9'))
+    # Digits in the right places can still make an impossible date ("2025-02-30")
+    valid[valid] &= _valid_dates(stamp[valid])
+
+    # Gather the value field into a fixed-width, null padded byte matrix
+    value_starts = starts + TIMESTAMP_WIDTH + 1
+    widths = ends - value_starts
+    valid &= (widths > 0) & (widths <= MAX_VALUE_WIDTH)
+    width = int(widths[valid].max()) if valid.any() else 1
+    index = value_starts[:, None] + np.arange(width)
+    inside = index < ends[:, None]
+    chars = np.where(inside, buf[np.minimum(index, buf.size - 1)], 0).astype(np.uint8)
+    chars[chars == ord('\r')] = 0
+    valid &= _VALUE_CHARS[chars].all(axis=1)
+    valid &= ((chars >= ord('0')) & (chars <= ord('9'))).any(axis=1)
+
+    stamp = np.ascontiguousarray(stamp[valid])
+    chars = np.ascontiguousarray(chars[valid])
+    times = stamp.view(f'S{TIMESTAMP_WIDTH}').ravel().astype('datetime64[s]')
+    try:
+        values = chars.view(f'S{width}').ravel().astype(np.float64)
+    except ValueError:
+        # A field made of valid characters can still be malformed ("1.2.3"), fall back per value
+        values = np.array([_to_float(v) for v in chars.view(f'S{width}').ravel()])
+        good = ~np.isnan(values)
+        times, values = times[good], values[good]
+    return times, values
+
+
+def _to_float(text):
+    try:
+        return float(text.strip(b'\0 '))
+    except ValueError:
+        return np.nan
+
+
+def read_channel_file(path):
+    """Read one text or binary channel log into (times, microns)"""
+    if path.endswith('.dbin'):
+        seconds, values = load_channel_logs([path])
+        return seconds.astype('datetime64[s]'), values
+    with open(path, 'rb') as f:
+        return parse_channel_text(f.read())
+
+
+def find_channel_files(directory):
+    """Return {channel: [paths]} for the channel logs in a directory"""
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        match = CHANNEL_FILE.match(name)
+        if match:
+            files.setdefault(int(match.group(1)), []).append(os.path.join(directory, name))
+    return files
+
+
+def align_channels(series):
+    """Merge {channel: (times, values)} into one dataset with a row per distinct timestamp
+
+    Channels without a reading at a timestamp hold NaN there.
+    """
+    channels = sorted(series)
+    all_times = [series[chan][0] for chan in channels]
+    times = np.unique(np.concatenate(all_times)) if all_times else np.zeros(0, dtype='datetime64[s]')
+    values = np.full((len(times), len(channels)), np.nan)
+    for col, chan in enumerate(channels):
+        chan_times, chan_values = series[chan]
+        values[np.searchsorted(times, chan_times), col] = chan_values
+    return {'time': times, 'channels': np.array(channels, dtype=np.int64), 'values': values}
+
+
+def _source_signature(files):
+    """Sizes and modification times of the source files, used to validate the cache"""
+    paths = sorted(p for chan_paths in files.values() for p in chan_paths)
+    stats = [os.stat(p) for p in paths]
+    return np.array([f"{os.path.basename(p)}:{s.st_size}:{s.st_mtime_ns}" for p, s in zip(paths, stats)])
+
+
+def save_dataset(dataset, path, signature=None):
+    """Save a dataset (and optionally the source signature) to an .npz file"""
+    extra = {} if signature is None else {'signature': signature}
+    np.savez_compressed(path, time=dataset['time'].astype(np.int64), channels=dataset['channels'],
+                        values=dataset['values'].astype(np.float32), **extra)
+
+
+def load_dataset(path):
+    """Load a dataset saved by save_dataset"""
+    with np.load(path) as data:
+        dataset = {
+            'time': data['time'].astype('datetime64[s]'),
+            'channels': data['channels'],
+            'values': data['values'].astype(np.float64),
+        }
+        signature = data['signature'] if 'signature' in data.files else None
+    return dataset, signature
+
+
+def ingest_directory(directory, use_cache=True):
+    """Parse every channel log of a deployment directory into one aligned dataset
+
+    With use_cache the result is stored next to the logs and reused until a source file changes.
+    """
+    files = find_channel_files(directory)
+    signature = _source_signature(files)
+    cache_path = os.path.join(directory, CACHE_NAME)
+    if use_cache and os.path.exists(cache_path):
+        dataset, cached_signature = load_dataset(cache_path)
+        if cached_signature is not None and np.array_equal(cached_signature, signature):
+            return dataset
+
+    series = {}
+    for chan, paths in files.items():
+        parts = [read_channel_file(p) for p in paths]
+        times = np.concatenate([t for t, _ in parts])
+        values = np.concatenate([v for _, v in parts])
+        order = np.argsort(times, kind='stable')
+        series[chan] = (times[order], values[order])
+    dataset = align_channels(series)
+
+    if use_cache:
+        save_dataset(dataset, cache_path, signature)
+    return dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest dendrometer channel logs into NumPy datasets")
+    parser.add_argument('directories', nargs='+', help="Deployment directories holding channel logs")
+    parser.add_argument('--no-cache', action='store_true', help="Always re-parse and do not write a cache")
+    parser.add_argument('--output', help="Save the dataset to this .npz file (single directory only)")
+    args = parser.parse_args()
+
+    if args.output and len(args.directories) > 1:
+        parser.error("--output needs a single directory")
+
+    for directory in args.directories:
+        start = time.monotonic()
+        dataset = ingest_directory(directory, use_cache=not args.no_cache)
+        elapsed = time.monotonic() - start
+        n_times = len(dataset['time'])
+        span = f"{dataset['time'][0]} to {dataset['time'][-1]}" if n_times else "no data"
+        print(f"{directory}: {n_times} timestamps x {len(dataset['channels'])} channels ({span}) "
+              f"in {elapsed * 1000:.1f} ms")
+        if args.output:
+            save_dataset(dataset, args.output)
+
+
+if __name__ == "__main__":
+    main()
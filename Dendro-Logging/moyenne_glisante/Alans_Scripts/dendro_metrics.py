@@ -0,0 +1,231 @@
+# Date: October 18, 2026
+# Hot-path metrics for the monitor loop: rolling latency histograms per stage, I2C error and dropped
+# sample counters per channel, cycle overruns and the resident memory. They are served in Prometheus
+# text format on a small local HTTP endpoint and written periodically to a JSON file, so a Pi falling
+# behind its schedule can be spotted remotely:
+#
+#   curl http://localhost:9105/metrics
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from streaming_filters import RingBuffer
+
+HISTORY = 1000  # Observations kept per stage for the rolling histograms
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf'))
+QUANTILES = (0.5, 0.9, 0.99)
+METRICS_PORT = 9105
+METRICS_FILE_INTERVAL = 60.0
+
+
+def _bucket_index(value):
+    for index, bound in enumerate(BUCKETS):
+        if value <= bound:
+            return index
+    return len(BUCKETS) - 1
+
+
+class RollingHistogram:
+    """Latency histogram over the last `history` observations, plus all-time sum and count"""
+
+    def __init__(self, history=HISTORY):
+        self.window = RingBuffer(history)
+        self.buckets = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        evicted = self.window.push(value)
+        if evicted is not None:
+            self.buckets[_bucket_index(evicted)] -= 1
+        self.buckets[_bucket_index(value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        values = sorted(self.window.values())
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): n
+                        for bound, n in zip(BUCKETS, self.buckets)},
+            'quantiles': {str(q): self.quantile(q) for q in QUANTILES},
+        }
+
+
+class _Timer:
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+
+
+class Metrics:
+    """Counters and histograms for the monitor loop"""
+
+    def __init__(self, channels, budget, metrics_file=None, file_interval=METRICS_FILE_INTERVAL, memory=None):
+        self.channels = list(channels)
+        self.budget = budget
+        self.metrics_file = metrics_file
+        self.file_interval = file_interval
+        self.memory = memory  # Callable returning the dendro_diagnostics RSS figures
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.stages = {}
+        self.i2c_errors = {chan: 0 for chan in self.channels}
+        self.dropped = {chan: 0 for chan in self.channels}  # Out of range readings, from the engine
+        self.missing = {chan: 0 for chan in self.channels}  # Cycles that produced no value
+        self.cycles = 0
+        self.overruns = 0
+        self.samples_per_second = 0.0
+        self.last_file_write = time.monotonic()
+        self.server = None
+
+    def timer(self, stage):
+        """Context manager timing one stage: `with metrics.timer('process_samples'): ...`"""
+        return _Timer(self, stage)
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = RollingHistogram()
+            histogram.observe(seconds)
+
+    def end_cycle(self, elapsed, engine=None, results=None):
+        """Record a finished cycle: overrun check, engine counters and channels without a result"""
+        with self.lock:
+            self.cycles += 1
+            if elapsed > self.budget:
+                self.overruns += 1
+            if engine is not None:
+                for row, chan in enumerate(engine.channel_numbers):
+                    self.i2c_errors[chan] = int(engine.errors[row])
+                    self.dropped[chan] = int(engine.dropped[row])
+                self.samples_per_second = engine.samples_per_second
+        if engine is not None and engine.reads:
+            self.observe('read_adc', engine.read_time / engine.reads)
+        if results is not None:
+            with self.lock:
+                for chan, (filtered, _) in results.items():
+                    if filtered is None:
+                        self.missing[chan] = self.missing.get(chan, 0) + 1
+        if self.metrics_file and time.monotonic() - self.last_file_write >= self.file_interval:
+            self.write_file()
+
+    def snapshot(self):
+        memory = self.memory() if self.memory is not None else {}
+        with self.lock:
+            return {
+                'time': time.time(),
+                'uptime': time.time() - self.started,
+                'cycles': self.cycles,
+                'overruns': self.overruns,
+                'budget': self.budget,
+                'samples_per_second': self.samples_per_second,
+                'i2c_errors': dict(self.i2c_errors),
+                'dropped_samples': {chan: self.dropped.get(chan, 0) + self.missing.get(chan, 0)
+                                    for chan in sorted(set(self.dropped) | set(self.missing))},
+                'stages': {stage: h.snapshot() for stage, h in self.stages.items()},
+                'memory': memory,
+            }
+
+    def write_file(self):
+        """Write the current snapshot as JSON, replacing the previous file atomically"""
+        temporary = self.metrics_file + ".tmp"
+        with open(temporary, 'w') as f:
+            json.dump(self.snapshot(), f, indent=1)
+        os.replace(temporary, self.metrics_file)
+        self.last_file_write = time.monotonic()
+
+    def prometheus(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        snap = self.snapshot()
+        lines = [
+            "# HELP dendro_stage_seconds Latency of each monitor loop stage over a rolling window",
+            "# TYPE dendro_stage_seconds summary",
+        ]
+        for stage, h in snap['stages'].items():
+            for q, value in h['quantiles'].items():
+                lines.append(f'dendro_stage_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'dendro_stage_seconds_sum{{stage="{stage}"}} {h["sum"]:.6f}')
+            lines.append(f'dendro_stage_seconds_count{{stage="{stage}"}} {h["count"]}')
+        lines += ["# HELP dendro_i2c_errors_total I2C errors per channel",
+                  "# TYPE dendro_i2c_errors_total counter"]
+        lines += [f'dendro_i2c_errors_total{{channel="{c}"}} {n}' for c, n in snap['i2c_errors'].items()]
+        lines += ["# HELP dendro_dropped_samples_total Out of range or missing readings per channel",
+                  "# TYPE dendro_dropped_samples_total counter"]
+        lines += [f'dendro_dropped_samples_total{{channel="{c}"}} {n}' for c, n in snap['dropped_samples'].items()]
+        lines += ["# HELP dendro_cycles_total Monitor loop cycles",
+                  "# TYPE dendro_cycles_total counter",
+                  f"dendro_cycles_total {snap['cycles']}",
+                  "# HELP dendro_overruns_total Cycles that took longer than the budget",
+                  "# TYPE dendro_overruns_total counter",
+                  f"dendro_overruns_total {snap['overruns']}",
+                  "# HELP dendro_samples_per_second ADC samples per second in the last cycle",
+                  "# TYPE dendro_samples_per_second gauge",
+                  f"dendro_samples_per_second {snap['samples_per_second']:.1f}",
+                  "# HELP dendro_uptime_seconds Seconds since the monitor started",
+                  "# TYPE dendro_uptime_seconds gauge",
+                  f"dendro_uptime_seconds {snap['uptime']:.0f}"]
+        gauges = (('rss_bytes', "Resident set size"),
+                  ('rss_steady_bytes', "Median resident set size since the start-up"),
+                  ('rss_growth_bytes_per_hour', "Growth of the resident set size"))
+        for name, help_text in gauges:
+            if snap['memory'].get(name) is not None:
+                lines += [f"# HELP dendro_{name} {help_text}", f"# TYPE dendro_{name} gauge",
+                          f"dendro_{name} {snap['memory'][name]:.0f}"]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=METRICS_PORT, host="127.0.0.1"):
+        """Serve /metrics (Prometheus text) and /metrics.json from a background thread"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body = metrics.prometheus().encode()
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == '/metrics.json':
+                    body = json.dumps(metrics.snapshot()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the monitor output
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        thread.start()
+        return self.server
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.metrics_file:
+            self.write_file()
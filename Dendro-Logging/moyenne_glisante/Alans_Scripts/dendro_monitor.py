@@ -1,126 +1,185 @@
 # Date: February 22, 2025
-# This script interfaces with dendrometers on 4 channels to collect data and process using moving average filters.
+# This script interfaces with dendrometers on 4 channels per ADS1115 board to collect data and process using moving average filters.
 
-import datetime
+import os
+import signal
+import sys
 import time
 import board
 import busio
-import adafruit_ads1x15.ads1115 as ADS
-from adafruit_ads1x15.analog_in import AnalogIn
-import numpy as np
+from dendro_acquisition import ConcurrentAcquisitionEngine, discover_boards
+from dendro_analytics import DailyMetricsLog, channel_analytics
+from dendro_calibration import load_calibration, masked_means
+from dendro_diagnostics import Diagnostics
+from dendro_storage import ChannelWriter
+from dendro_binlog import BinaryChannelWriter
+from dendro_compression import MAX_INTERVAL, CompressedWriter
+from dendro_gaps import GapIndex
+from dendro_metrics import Metrics
+from dendro_rollup import ROLLUP_DIR, RollupStore
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from streaming_filters import MovingAverage, channel_filters
+
+# I2C buses to scan for ADS1115 boards. For a second bus enable i2c-gpio in /boot/config.txt and add
+# its pins, e.g. (board.D24, board.D23). With several boards per bus raise the bus clock to 400 kHz
+# (dtparam=i2c_arm_baudrate=400000) so it keeps up with the conversions.
+I2C_BUSES = ((board.SCL, board.SDA),)
 
 # Initialize I2C communication
-i2c = busio.I2C(board.SCL, board.SDA)
-# # Initialize the ADC (ADS1115)
-ads = ADS.ADS1115(i2c)
-
-# Initialize all 4 ADC channels
-channels = {
-    0: AnalogIn(ads, ADS.P0),
-    1: AnalogIn(ads, ADS.P1),
-    2: AnalogIn(ads, ADS.P2),
-    3: AnalogIn(ads, ADS.P3)
-}
+buses = [busio.I2C(scl, sda) for scl, sda in I2C_BUSES]
+i2c = buses[0]
+
+# Find the ADCs (ADS1115 at 0x48-0x4B). Channels are numbered 4 per address and 16 per bus, so the
+# board at 0x48 on the first bus still logs channels 0 to 3.
+boards = discover_boards(buses)
+if not boards:
+    raise SystemExit("No ADS1115 found on the I2C buses")
+print("ADS1115 boards: " + ", ".join(f"bus {b.bus} {hex(b.address)}" for b in boards))
 
 # Configuration
 WINDOW_SIZE = 10
-SAMPLE_DELAY = 0.1
 NOISE_FLOOR = 1  # Minimum micron value to consider valid signal
+DATA_RATE = 860  # ADS1115 conversions per second
+SAMPLE_BUDGET = 0.5  # Seconds of acquisition per cycle, shared by all channels
+LOOP_PERIOD = 1.0  # Seconds per cycle
+BINARY_LOGS = False  # Write compact .dbin channel files instead of text lines
+METRICS_PORT = 9105  # Local HTTP port serving /metrics, 0 to disable
+METRICS_FILE = 'monitor_metrics.json'  # Metrics snapshot rewritten every minute
+CALIBRATION_FILE = 'calibration.json'  # Per-sensor coefficients, defaults used if missing
+ANALYTICS_FILE = 'daily_metrics.csv'  # Daily amplitude, MDS, TWD and growth of every channel
+COMPRESSION = None  # 'deadband' or 'swinging_door' to only log the points needed within the tolerance
+COMPRESSION_TOLERANCE = 0.5  # µm
+COMPRESSION_TOLERANCES = {}  # Per-channel tolerances in µm, e.g. {2: 1.0} for a noisy sensor
+DATA_DIRECTORY = '.'  # Channel logs, with their gap index and rollups next to them
+FLUSH_INTERVAL = 60.0  # Seconds between writes of the buffered log records and of the rollups in progress
+# 1 min / 15 min / 1 h / 1 day min, max, mean and count, where dendro_rollup.py queries look for them
+ROLLUP_DIRECTORY = os.path.join(DATA_DIRECTORY, ROLLUP_DIR)
+DIAGNOSTICS_DIRECTORY = 'diagnostics'  # kill -USR1 / -USR2 write profiles and memory snapshots here
+RSS_LIMIT = 200 * 1024 * 1024  # Bytes of resident memory above which a memory report is written
+MAX_PENDING = 20000  # Records buffered at most while the channel logs cannot be written
 
-# Data storage for moving averages
-channel_data = {
-    chan: {'values': [], 'filtered': 0.0}
-    for chan in channels
-}
+# Burst acquisition in continuous mode, all boards converting at once
+engine = ConcurrentAcquisitionEngine(boards, data_rate=DATA_RATE, budget=SAMPLE_BUDGET)
+channels = engine.channels
 
-def read_adc(adc_channel):
-    """Read ADC value with error handling and calibration"""
-    try:
-        adc_value = adc_channel.value
-    except Exception as e:
-        print(f"I2C error on channel {adc_channel}: {e}")
-        return None, None
+# Raw readings to voltage and microns, one row of coefficients per channel
+calibration = load_calibration(CALIBRATION_FILE, engine.channel_numbers)
 
-    if not (0 <= adc_value <= 65535):
-        return None, None
+# Gap and cadence index of the channel files, brought up to date with files changed while stopped; it is
+# given every reading, and told how far apart the points of compressed logs can be for its rebuilds
+gap_index = GapIndex(DATA_DIRECTORY, max_interval=MAX_INTERVAL if COMPRESSION else 0)
+gap_index.refresh()
 
-    # Apply calibration floor
-    adc_value = max(adc_value, 275)
-    
-    # Convert to voltage and microns
-    voltage = ((adc_value - 275) / 65535.0) * (3.3 - 0.012)
-    microns = voltage / (3.3 - 0.012) * 25400
-    
-    return voltage, microns
+# Buffered per-day channel files, flushed every minute or 60 records
+if BINARY_LOGS:
+    writer = BinaryChannelWriter(DATA_DIRECTORY, calibration=calibration, flush_records=60,
+                                 flush_interval=FLUSH_INTERVAL, index=gap_index, max_pending=MAX_PENDING)
+else:
+    writer = ChannelWriter(DATA_DIRECTORY, flush_records=60, flush_interval=FLUSH_INTERVAL, index=gap_index,
+                           max_pending=MAX_PENDING)
+if COMPRESSION:
+    writer = CompressedWriter(writer, COMPRESSION, COMPRESSION_TOLERANCE, COMPRESSION_TOLERANCES)
+
+# Precomputed rollups of the saved values, queried with dendro_rollup.py; the buckets in progress are
+# written every FLUSH_INTERVAL so a crash or power cut loses at most that much of them
+rollups = RollupStore(ROLLUP_DIRECTORY)
+
+# Profiling and memory snapshots on signal, RSS reported every hour
+diagnostics = Diagnostics(DIAGNOSTICS_DIRECTORY, rss_limit=RSS_LIMIT)
+
+# Stage latencies, I2C errors, dropped samples, overruns and memory of the main loop
+metrics = Metrics(channels, budget=LOOP_PERIOD, metrics_file=METRICS_FILE, memory=diagnostics.memory)
+
+# Moving average filter for each channel
+channel_data = channel_filters(channels, lambda: MovingAverage(WINDOW_SIZE))
+
+# Daily statistics of the filtered values, a CSV row per channel once each day is over
+analytics = channel_analytics(channels, DailyMetricsLog(ANALYTICS_FILE))
 
 def sample_all_channels():
-    """Sample all 4 channels in parallel"""
-    samples = {chan: [] for chan in channels}
-    
-    # Take 10 samples for all channels
-    for _ in range(10):
-        for chan_num, adc_channel in channels.items():
-            voltage, microns = read_adc(adc_channel)
-            if voltage is not None and microns is not None:
-                samples[chan_num].append((voltage, microns))
-        time.sleep(SAMPLE_DELAY)
-    
-    return samples
+    """Sample all channels in bursts within the cycle budget and calibrate the readings"""
+    buffer, counts = engine.acquire()
+    return calibration.convert(buffer, counts)
 
 def process_samples(samples):
     """Process samples for all channels"""
+    mean_voltages, mean_microns, n_valid = masked_means(*samples)
     results = {}
-    for chan_num, data in samples.items():
-        if not data:
+    for row, chan_num in enumerate(engine.channel_numbers):
+        if n_valid[row] == 0:
             results[chan_num] = (None, None)
             continue
         
-        # Calculate means
-        voltages, microns = zip(*data)
-        mean_microns = sum(microns) / len(microns)
-        mean_voltage = sum(voltages) / len(voltages)
-        
         # Update moving average
-        channel_data[chan_num]['values'].append(mean_microns)
-        if len(channel_data[chan_num]['values']) > WINDOW_SIZE:
-            channel_data[chan_num]['values'].pop(0)
-        
-        filtered = np.mean(channel_data[chan_num]['values'])
-        results[chan_num] = (filtered, mean_voltage)
+        filtered = channel_data[chan_num].update(float(mean_microns[row]))
+        results[chan_num] = (filtered, float(mean_voltages[row]))
     
     return results
 
 def save_channel_data(chan_num, filtered_value):
     """Save data only if valid signal present"""
     if filtered_value > NOISE_FLOOR:
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(f'micron_values_channel_{chan_num}.txt', 'a') as f:
-            f.write(f"{timestamp}, {filtered_value}\n")
+        timestamp = time.time()
+        writer.write(chan_num, filtered_value, timestamp)
+        rollups.add(chan_num, filtered_value, timestamp)
 
 def main_loop():
     """Main processing loop"""
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+    diagnostics.install()
+    last_rollup_flush = time.monotonic()
     while True:
         start_time = time.monotonic()
         
         # Sample all channels in parallel
-        samples = sample_all_channels()
+        with metrics.timer('sample_all_channels'):
+            samples = sample_all_channels()
         
         # Process samples for all channels
-        results = process_samples(samples)
+        with metrics.timer('process_samples'):
+            results = process_samples(samples)
         
         # Save and print results
-        for chan_num, (filtered, voltage) in results.items():
-            if filtered is not None:
-                save_channel_data(chan_num, filtered)
-                print(f"Ch{chan_num}: {filtered:.2f}µm | {voltage:.4f}V")
+        with metrics.timer('save_channel_data'):
+            for chan_num, (filtered, voltage) in results.items():
+                if filtered is not None:
+                    save_channel_data(chan_num, filtered)
+                    analytics[chan_num].update(time.time(), filtered)
+                    print(f"Ch{chan_num}: {filtered:.2f}µm | {voltage:.4f}V")
+        print(f"Acquired {int(engine.counts.sum())} samples at {engine.samples_per_second:.0f} samples/s")
+        if time.monotonic() - last_rollup_flush >= FLUSH_INTERVAL:
+            try:
+                rollups.flush()
+            except OSError as e:
+                print(f"Rollup write failed: {e}")
+            last_rollup_flush = time.monotonic()
         
         # Control loop timing
         elapsed = time.monotonic() - start_time
-        sleep_time = max(1.0 - elapsed, 0.1)
+        metrics.end_cycle(elapsed, engine, results)
+        diagnostics.tick()
+        sleep_time = max(LOOP_PERIOD - elapsed, 0.1)
         time.sleep(sleep_time)
 
+def stop_on_sigterm(signum, frame):
+    """kill or a service stop ends the loop like Ctrl+C, so the buffered records are written"""
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)  # A second one must not cut the closing short
+    raise KeyboardInterrupt
+
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, stop_on_sigterm)
     try:
         main_loop()
     except KeyboardInterrupt:
-        print("\nMonitoring stopped by user")
\ No newline at end of file
+        print("\nMonitoring stopped")
+    finally:
+        writer.close()
+        rollups.close()
+        for chan_analytics in analytics.values():
+            chan_analytics.close()
+        metrics.close()
+        engine.close()
+        print(f"Storage: {writer.savings()}")
+        print(diagnostics.report())
\ No newline at end of file
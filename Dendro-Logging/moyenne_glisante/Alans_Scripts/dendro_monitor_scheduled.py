@@ -2,12 +2,14 @@
 # This script reads dendrometer data from 4 channels, processes it, and saves the results.
 
 import datetime
-import time
 import board
 import busio
 import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
-import numpy as np
+from dendro_acquisition import AcquisitionEngine
+from dendro_calibration import load_calibration, masked_means
+from dendro_gaps import GapIndex
+from dendro_rollup import RollupStore
 
 # Initialize I2C communication
 i2c = busio.I2C(board.SCL, board.SDA)
@@ -23,69 +25,55 @@ channels = {
 
 # Configuration
 WINDOW_SIZE = 10
-SAMPLE_DELAY = 0.1
 NOISE_FLOOR = 1  # Minimum micron value to consider valid signal
+DATA_RATE = 860  # ADS1115 conversions per second
+SAMPLE_BUDGET = 1.0  # Seconds of acquisition per reading, shared by all channels
+CALIBRATION_FILE = 'calibration.json'  # Per-sensor coefficients, defaults used if missing
+ROLLUP_DIRECTORY = 'rollups'  # 1 min / 15 min / 1 h / 1 day min, max, mean and count for range queries
 
-def read_adc(adc_channel):
-    """Read ADC value with error handling and calibration"""
-    try:
-        adc_value = adc_channel.value
-    except Exception as e:
-        print(f"I2C error on channel {adc_channel}: {e}")
-        return None, None
+# Burst acquisition of all channels in continuous mode
+engine = AcquisitionEngine(ads, channels, data_rate=DATA_RATE, budget=SAMPLE_BUDGET)
 
-    if not (0 <= adc_value <= 65535):
-        return None, None
+# Raw readings to voltage and microns, one row of coefficients per channel
+calibration = load_calibration(CALIBRATION_FILE, engine.channel_numbers)
 
-    # Apply calibration floor
-    adc_value = max(adc_value, 275)
-    
-    # Convert to voltage and microns
-    voltage = ((adc_value - 275) / 65535.0) * (3.3 - 0.012)
-    microns = voltage / (3.3 - 0.012) * 25400
-    
-    return voltage, microns
+# Precomputed rollups of the saved values, queried with dendro_rollup.py
+rollups = RollupStore(ROLLUP_DIRECTORY)
+
+# Gap and cadence index of the channel files
+gap_index = GapIndex(".")
 
 def sample_all_channels():
-    """Sample all 4 channels in parallel"""
-    samples = {chan: [] for chan in channels}
-    
-    # Take 10 samples for all channels
-    for _ in range(10):
-        for chan_num, adc_channel in channels.items():
-            voltage, microns = read_adc(adc_channel)
-            if voltage is not None and microns is not None:
-                samples[chan_num].append((voltage, microns))
-        time.sleep(SAMPLE_DELAY)
-    
-    return samples
+    """Sample all channels in bursts within the sampling budget and calibrate the readings"""
+    buffer, counts = engine.acquire()
+    return calibration.convert(buffer, counts)
 
 def process_samples(samples):
     """Process samples for all channels"""
+    mean_voltages, mean_microns, n_valid = masked_means(*samples)
     results = {}
-    for chan_num, data in samples.items():
-        if not data:
+    for row, chan_num in enumerate(engine.channel_numbers):
+        if n_valid[row] == 0:
             results[chan_num] = (None, None)
             continue
-        
-        # Calculate means
-        voltages, microns = zip(*data)
-        mean_microns = sum(microns) / len(microns)
-        mean_voltage = sum(voltages) / len(voltages)
-        
-        results[chan_num] = (mean_microns, mean_voltage)
+        results[chan_num] = (float(mean_microns[row]), float(mean_voltages[row]))
     
     return results
 
-def save_channel_data(chan_num, mean_microns):
-    """Save data only if valid signal present"""
+def save_channel_data(chan_num, mean_microns, when=None):
+    """Save data only if valid signal present, stamped with `when` (default: now)"""
     if mean_microns > NOISE_FLOOR:
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        datestamp = datetime.date.today().strftime("%Y-%m-%d")
-        with open(f'channel_{chan_num}_{datestamp}.txt', 'a') as f:
+        when = when or datetime.datetime.now()
+        timestamp = when.strftime("%Y-%m-%d %H:%M:%S")
+        datestamp = when.strftime("%Y-%m-%d")
+        name = f'channel_{chan_num}_{datestamp}.txt'
+        with open(name, 'a') as f:
             f.write(f"{timestamp}, {mean_microns}\n")
+        # Indexed in wall-clock seconds, the time written in the line
+        gap_index.add(name, chan_num, when.replace(tzinfo=datetime.timezone.utc).timestamp())
+        rollups.add(chan_num, mean_microns, when.timestamp())
 
-def main():
+def main(when=None):
     """Main function to sample, process, and save data"""
     # Sample all channels
     samples = sample_all_channels()
@@ -96,8 +84,11 @@ def main():
     # Save and print results
     for chan_num, (mean_microns, mean_voltage) in results.items():
         if mean_microns is not None:
-            save_channel_data(chan_num, mean_microns)
+            save_channel_data(chan_num, mean_microns, when)
             print(f"Ch{chan_num}: {mean_microns:.2f}µm | {mean_voltage:.4f}V")
+    rollups.flush()
+    gap_index.save()
+    print(f"Acquired {int(engine.counts.sum())} samples at {engine.samples_per_second:.0f} samples/s")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,263 @@
+# Date: October 18, 2026
+# Recompute archived channel logs with another calibration and filter chain, one channel-day file per
+# task over a process pool. Results go to a new versioned directory (the name ends with a digest of the
+# settings) with a manifest of those settings; finished files are journaled, so an interrupted run started
+# again with the same settings only does what is left.
+#
+#   python dendro_reprocess.py LoggerData/*/* --output reprocessed --label floor262 \
+#       --source-calibration calibration_2024.json --calibration calibration.json --filter hampel:7 --filter mean:10
+#
+# The logs hold calibrated, filtered microns, not raw readings. A linear calibration is undone exactly
+# (the moving average of an affine function is the affine function of the moving average), back to the
+# raw ADC scale, and the new calibration applied from there; a polynomial source calibration cannot be
+# undone and is refused. The filter chain then runs over the stored values, each file continuing from
+# the end of the channel's previous file, as the live monitor does across midnight.
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from dendro_binlog import ENCODING_FLOAT32, RECORD_DTYPES, pack_header
+from dendro_calibration import ADC_FULL_SCALE, load_calibration
+from dendro_ingest import CHANNEL_FILE, find_channel_files, read_channel_file
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from streaming_filters import (ExponentialMovingAverage, FilterChain, HampelFilter, MovingAverage,
+                               RunningMedian)
+
+MANIFEST_NAME = "manifest.json"
+JOURNAL_NAME = "done.jsonl"
+NOISE_FLOOR = 1  # Values at or below are not written, as in the monitors
+EMA_WARMUP = 10.0  # Previous values fed to an EMA per unit of 1 / alpha
+
+
+FILTERS = {
+    'mean': lambda window: MovingAverage(int(window)),
+    'median': lambda window: RunningMedian(int(window)),
+    'hampel': lambda window, sigmas=3.0: HampelFilter(int(window), float(sigmas)),
+    'ema': lambda alpha: ExponentialMovingAverage(alpha=float(alpha)),
+}
+
+
+def parse_filters(specs):
+    """['hampel:7', 'mean:10'] to [('hampel', ['7']), ('mean', ['10'])], checking each can be built"""
+    chain = []
+    for spec in specs:
+        name, *arguments = spec.split(':')
+        if name not in FILTERS:
+            raise ValueError(f"Unknown filter {name!r}, expected one of {', '.join(FILTERS)}")
+        FILTERS[name](*arguments)
+        chain.append((name, arguments))
+    return chain
+
+
+def warmup_length(chain):
+    """Previous values needed for the chain to be in the state it would have on a continuous series"""
+    total = 0
+    for name, arguments in chain:
+        if name == 'ema':
+            total += math.ceil(EMA_WARMUP / float(arguments[0]))
+        else:
+            total += int(arguments[0]) - 1
+    return total
+
+
+def apply_filters(values, chain):
+    """Run values through the chain, vectorized for a lone moving average"""
+    if not chain:
+        return values
+    if len(chain) == 1 and chain[0][0] == 'mean':
+        window = int(chain[0][1][0])
+        total = np.cumsum(values)
+        total[window:] = total[window:] - total[:-window]
+        return total / np.minimum(np.arange(1, len(values) + 1), window)
+    stages = FilterChain(*(FILTERS[name](*arguments) for name, arguments in chain))
+    return np.array([stages.update(x) for x in values.tolist()])
+
+
+def _scale(coefficients):
+    return coefficients['gain'] * coefficients['stroke'] / ADC_FULL_SCALE
+
+
+def recalibrate(microns, old, new):
+    """Microns computed with the `old` coefficients of a channel, converted to the `new` ones"""
+    if old == new:
+        return microns
+    if old['polynomial'] is not None:
+        raise ValueError("Values calibrated with a polynomial cannot be converted back to raw readings")
+    raw = microns / _scale(old) + old['offset']
+    result = (np.maximum(raw, new['offset']) - new['offset']) * _scale(new)
+    if new['polynomial'] is not None:
+        result = np.polyval(new['polynomial'], result)
+    return result
+
+
+def process_file(task):
+    """Worker: reprocess one channel-day file; returns (source, its signature, values written)"""
+    source, previous, output, channel, settings = task
+    times, values = read_channel_file(source)
+    # Continue the filters from the end of the channel's previous file
+    warmup = settings['warmup']
+    if previous and warmup:
+        _, before = read_channel_file(previous)
+        before = before[-warmup:]
+    else:
+        before = np.zeros(0)
+    old, new = settings['source_coefficients'], settings['coefficients']
+    series = recalibrate(np.concatenate((before, values)), old, new)
+    result = apply_filters(series, settings['chain'])[len(before):]
+
+    keep = result > settings['noise_floor']
+    temporary = output + ".tmp"
+    if output.endswith('.dbin'):
+        records = np.zeros(int(keep.sum()), dtype=RECORD_DTYPES[ENCODING_FLOAT32])
+        records['time'] = times[keep].astype(np.int64)
+        records['value'] = result[keep]
+        with open(temporary, 'wb') as f:
+            f.write(pack_header(channel, ENCODING_FLOAT32, settings['header']))
+            f.write(records.tobytes())
+    else:
+        texts = np.char.replace(np.datetime_as_string(times[keep], unit='s'), 'T', ' ').tolist()
+        with open(temporary, 'w') as f:
+            f.write("".join(f"{text}, {value}\n" for text, value in zip(texts, result[keep].tolist())))
+    os.replace(temporary, output)
+    return source, signature(source), int(keep.sum())
+
+
+def signature(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class Reprocessing:
+    """A versioned reprocessing run: settings, output directory, journal of finished files"""
+
+    def __init__(self, sources, output, chain, calibration=None, source_calibration=None,
+                 noise_floor=NOISE_FLOOR, label="reprocessed"):
+        self.sources = [os.path.abspath(s) for s in sources]
+        self.chain = chain
+        self.calibration = calibration  # Path of the new calibration JSON, None for the defaults
+        self.source_calibration = source_calibration
+        self.noise_floor = noise_floor
+        self.settings = {
+            'filters': [[name] + arguments for name, arguments in chain],
+            'calibration': self._read_config(calibration),
+            'source_calibration': self._read_config(source_calibration),
+            'noise_floor': noise_floor,
+        }
+        digest = hashlib.sha256(json.dumps(self.settings, sort_keys=True).encode()).hexdigest()[:10]
+        self.directory = os.path.join(output, f"{label}-{digest}")
+        self.journal_path = os.path.join(self.directory, JOURNAL_NAME)
+
+    @staticmethod
+    def _read_config(path):
+        if not path:
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _site_name(self, source):
+        """Output sub-directory of a source directory: its path below the common parent"""
+        if len(self.sources) == 1:
+            return os.path.basename(source)
+        return os.path.relpath(source, os.path.commonpath(self.sources))
+
+    def done(self):
+        """{source path: signature} of the files finished by earlier runs"""
+        finished = {}
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Line cut by an interruption
+                    finished[entry['source']] = entry['signature']
+        return finished
+
+    def tasks(self):
+        """One task per channel file, skipping files finished with the same content"""
+        finished = self.done()
+        warmup = warmup_length(self.chain)
+        for source in self.sources:
+            site = os.path.join(self.directory, self._site_name(source))
+            os.makedirs(site, exist_ok=True)
+            files = find_channel_files(source)
+            channels = sorted(files)
+            new = load_calibration(self.calibration, channels)
+            old = load_calibration(self.source_calibration, channels)
+            for channel, paths in files.items():
+                settings = {
+                    'chain': self.chain,
+                    'warmup': warmup,
+                    'noise_floor': self.noise_floor,
+                    'coefficients': new.coefficients(channel),
+                    'source_coefficients': old.coefficients(channel),
+                    'header': new.header(channel),
+                }
+                # Files of a channel sort by date, the previous one primes the filters
+                paths = sorted(paths, key=lambda p: CHANNEL_FILE.match(os.path.basename(p)).group(2))
+                for number, path in enumerate(paths):
+                    if finished.get(path) == signature(path):
+                        continue
+                    output = os.path.join(site, os.path.basename(path))
+                    previous = paths[number - 1] if number else None
+                    yield path, previous, output, channel, settings
+
+    def run(self, workers=None, progress=None):
+        """Process what is left; returns the files done now, the values written and the files pending at start"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, MANIFEST_NAME), 'w') as f:
+            json.dump(dict(self.settings, sources=self.sources, created=time.strftime("%Y-%m-%d %H:%M:%S")),
+                      f, indent=2)
+        tasks = list(self.tasks())
+        stats = {'files': 0, 'values': 0, 'pending': len(tasks)}
+        if not tasks:
+            return stats
+        with ProcessPoolExecutor(max_workers=workers) as pool, open(self.journal_path, 'a+') as journal:
+            # Start on a new line after a line cut by an interruption
+            if journal.tell():
+                journal.seek(journal.tell() - 1)
+                if journal.read(1) != "\n":
+                    journal.write("\n")
+            futures = [pool.submit(process_file, task) for task in tasks]
+            for future in as_completed(futures):
+                source, source_signature, written = future.result()
+                journal.write(json.dumps({'source': source, 'signature': source_signature}) + "\n")
+                journal.flush()
+                stats['files'] += 1
+                stats['values'] += written
+                if progress and stats['files'] % progress == 0:
+                    print(f"{stats['files']}/{len(tasks)} files", flush=True)
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprocess channel log archives with a new calibration and filters")
+    parser.add_argument('sources', nargs='+', help="Deployment directories holding channel logs")
+    parser.add_argument('--output', default="reprocessed", help="Directory receiving the versioned runs")
+    parser.add_argument('--label', default="reprocessed", help="Name of the run, before the settings digest")
+    parser.add_argument('--calibration', help="Calibration JSON to apply (default coefficients if omitted)")
+    parser.add_argument('--source-calibration', help="Calibration JSON the logs were made with (default coefficients)")
+    parser.add_argument('--filter', action='append', default=[],
+                        help="Filter stage, in order: mean:W, median:W, hampel:W[:SIGMAS], ema:ALPHA")
+    parser.add_argument('--noise-floor', type=float, default=NOISE_FLOOR, help="Drop values at or below (µm)")
+    parser.add_argument('--workers', type=int, help="Processes (default: all CPU cores)")
+    args = parser.parse_args()
+
+    run = Reprocessing(args.sources, args.output, parse_filters(args.filter), args.calibration,
+                       args.source_calibration, args.noise_floor, args.label)
+    start = time.monotonic()
+    stats = run.run(args.workers, progress=500)
+    elapsed = time.monotonic() - start
+    print(f"{run.directory}: {stats['files']} files, {stats['values']} values in {elapsed:.1f} s "
+          f"({stats['values'] / elapsed if elapsed else 0:.0f} values/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# Date: October 18, 2026
+# Precomputed min/max/mean/count of every channel at 1 minute, 15 minutes, 1 hour and 1 day, kept next to
+# the raw channel logs and updated as values are saved. A range query reads the coarsest tier that gives
+# the requested resolution, so a season at 15 minutes is a few thousand records instead of millions of
+# raw lines.
+#
+# Each tier of a channel is a file of fixed-size records sorted by bucket start (local wall-clock seconds,
+# as in dendro_ingest), found by binary search:
+#   rollups/channel_{channel}_{tier}.roll
+#
+#   python dendro_rollup.py build /path/to/DD_Dorval-7          # backfill from existing channel logs
+#   python dendro_rollup.py query /path/to/DD_Dorval-7 --channel 0 --from 2025-05-01 --to 2025-09-01 --res 15min
+
+import argparse
+import os
+import struct
+import sys
+import time
+import numpy as np
+
+TIERS = (('1min', 60), ('15min', 900), ('1h', 3600), ('1d', 86400))
+ROLLUP_DIR = "rollups"
+ROLLUP_PATTERN = "channel_{channel}_{tier}.roll"
+RECORD = struct.Struct("<qdddI")  # Bucket start, min, max, mean, count
+RECORD_DTYPE = np.dtype([('start', '<i8'), ('min', '<f8'), ('max', '<f8'), ('mean', '<f8'), ('count', '<u4')])
+UNITS = {'s': 1, 'sec': 1, 'min': 60, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_resolution(text):
+    """'30s', '15min', '1h' or '1d' to seconds"""
+    digits = text.rstrip("abcdefghijklmnopqrstuvwxyz")
+    unit = text[len(digits):] or 's'
+    if unit not in UNITS or not digits:
+        raise ValueError(f"Invalid resolution {text!r}")
+    return int(digits) * UNITS[unit]
+
+
+def local_seconds(timestamp):
+    """Epoch time to local wall-clock seconds, the time axis of the channel logs"""
+    return int(timestamp) + time.localtime(timestamp).tm_gmtoff
+
+
+def rollup_path(directory, channel, tier):
+    return os.path.join(directory, ROLLUP_PATTERN.format(channel=channel, tier=tier))
+
+
+def _whole_records(f):
+    """Cut off a record left partly written by an interruption; returns the file size"""
+    size = f.seek(0, os.SEEK_END)
+    torn = size % RECORD.size
+    if torn:
+        size -= torn
+        f.truncate(size)
+    return size
+
+
+class RollupStore:
+    """Incremental rollups of the saved channel values
+
+    The bucket in progress is kept in memory and rewritten in place at each flush, so a process that
+    restarts (or the cron-started scheduled script) continues the last bucket instead of splitting it.
+    """
+
+    def __init__(self, directory=ROLLUP_DIR, tiers=TIERS):
+        self.directory = directory
+        self.tiers = tiers
+        self.buckets = {}  # (channel, tier) -> [start, min, max, sum, count, persisted]
+        self.stats = {'values': 0, 'records': 0}
+
+    def _resume(self, channel, tier, start):
+        """Bucket `start` of a tier, continued from the file if it is its last record"""
+        path = rollup_path(self.directory, channel, tier)
+        last_start = None
+        try:
+            with open(path, 'r+b') as f:
+                size = _whole_records(f)
+                if size:
+                    f.seek(size - RECORD.size)
+                    last_start, low, high, mean, count = RECORD.unpack(f.read(RECORD.size))
+        except OSError:
+            pass
+        if last_start == start:
+            return [start, low, high, mean * count, count, True]
+        return [start, float('inf'), float('-inf'), 0.0, 0, False]
+
+    def _write(self, channel, tier, bucket):
+        start, low, high, total, count, persisted = bucket
+        os.makedirs(self.directory, exist_ok=True)
+        with open(rollup_path(self.directory, channel, tier), 'r+b' if persisted else 'ab') as f:
+            size = _whole_records(f)
+            if persisted:
+                f.seek(size - RECORD.size)
+            f.write(RECORD.pack(start, low, high, total / count, count))
+        if not persisted:
+            self.stats['records'] += 1
+        bucket[5] = True
+
+    def add(self, channel, value, timestamp=None):
+        """Fold one saved value into the bucket of every tier, writing the buckets it closes"""
+        local = local_seconds(time.time() if timestamp is None else timestamp)
+        self.stats['values'] += 1
+        for tier, width in self.tiers:
+            start = local - local % width
+            key = (channel, tier)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = self._resume(channel, tier, start)
+            elif start > bucket[0]:
+                self._write(channel, tier, bucket)
+                bucket = self.buckets[key] = [start, float('inf'), float('-inf'), 0.0, 0, False]
+            # A clock stepping back lands in the current bucket, keeping the files sorted
+            bucket[1] = min(bucket[1], value)
+            bucket[2] = max(bucket[2], value)
+            bucket[3] += value
+            bucket[4] += 1
+
+    def flush(self):
+        """Write the buckets in progress; later values still update them"""
+        for (channel, tier), bucket in self.buckets.items():
+            if bucket[4]:
+                self._write(channel, tier, bucket)
+
+    def close(self):
+        self.flush()
+        self.buckets.clear()
+
+
+def _bisect(f, count, start):
+    """Index of the first record whose bucket starts at or after `start`"""
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        f.seek(middle * RECORD.size)
+        if struct.unpack("<q", f.read(8))[0] < start:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def read_tier(path, start=None, end=None):
+    """Records of a tier file with start <= bucket start < end (local seconds), as a structured array"""
+    try:
+        count = os.path.getsize(path) // RECORD.size
+    except OSError:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    with open(path, 'rb') as f:
+        first = 0 if start is None else _bisect(f, count, start)
+        last = count if end is None else _bisect(f, count, end)
+        f.seek(first * RECORD.size)
+        return np.frombuffer(f.read((last - first) * RECORD.size), dtype=RECORD_DTYPE)
+
+
+def aggregate(starts, low, high, mean, count, width):
+    """Combine sorted buckets (or raw values, with count 1) into buckets of `width` seconds"""
+    records = np.zeros(0, dtype=RECORD_DTYPE)
+    if len(starts) == 0:
+        return records
+    buckets = starts - starts % width
+    first = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    records = np.zeros(len(first), dtype=RECORD_DTYPE)
+    records['start'] = buckets[first]
+    records['min'] = np.minimum.reduceat(low, first)
+    records['max'] = np.maximum.reduceat(high, first)
+    records['count'] = np.add.reduceat(count, first)
+    records['mean'] = np.add.reduceat(mean * count, first) / records['count']
+    return records
+
+
+def choose_tier(resolution, tiers=TIERS):
+    """Coarsest tier whose buckets divide the resolution, None when only the raw data can give it"""
+    chosen = None
+    for tier, width in tiers:
+        if width <= resolution and resolution % width == 0:
+            chosen = tier
+    return chosen
+
+
+def _raw_records(data_directory, channel, start, end):
+    from dendro_ingest import find_channel_files, read_channel_file
+
+    parts = [read_channel_file(p) for p in find_channel_files(data_directory).get(channel, [])]
+    if not parts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    times = np.concatenate([t for t, _ in parts]).astype(np.int64)
+    values = np.concatenate([v for _, v in parts])
+    keep = np.ones(len(times), dtype=bool)
+    if start is not None:
+        keep &= times >= start
+    if end is not None:
+        keep &= times < end
+    order = np.argsort(times[keep], kind='stable')
+    return times[keep][order], values[keep][order]
+
+
+def query(data_directory, channel, start=None, end=None, resolution=900, tiers=TIERS):
+    """Buckets of `resolution` seconds for a channel between local datetime64 `start` and `end`
+
+    Reads the coarsest rollup tier that can give the resolution and combines its buckets, or the raw
+    logs for resolutions finer than the smallest tier. Returns (records, source tier or 'raw').
+    """
+    start = None if start is None else int(np.datetime64(start, 's').astype(np.int64))
+    end = None if end is None else int(np.datetime64(end, 's').astype(np.int64))
+    tier = choose_tier(resolution, tiers)
+    if tier is None:
+        times, values = _raw_records(data_directory, channel, start, end)
+        return aggregate(times, values, values, values, np.ones(len(times), dtype=np.uint32), resolution), 'raw'
+    records = read_tier(rollup_path(os.path.join(data_directory, ROLLUP_DIR), channel, tier), start, end)
+    if dict(tiers)[tier] == resolution:
+        return records, tier
+    return aggregate(records['start'], records['min'], records['max'], records['mean'], records['count'],
+                     resolution), tier
+
+
+def build_rollups(data_directory, tiers=TIERS):
+    """Rewrite every tier of every channel from the channel logs of a deployment directory"""
+    from dendro_ingest import find_channel_files
+
+    directory = os.path.join(data_directory, ROLLUP_DIR)
+    os.makedirs(directory, exist_ok=True)
+    written = {}
+    for channel in find_channel_files(data_directory):
+        times, values = _raw_records(data_directory, channel, None, None)
+        records = aggregate(times, values, values, values, np.ones(len(times), dtype=np.uint32), tiers[0][1])
+        for tier, width in tiers:
+            records = aggregate(records['start'], records['min'], records['max'], records['mean'],
+                                records['count'], width)
+            with open(rollup_path(directory, channel, tier), 'wb') as f:
+                f.write(records.tobytes())
+            written[(channel, tier)] = len(records)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dendrometer rollups: backfill them or query a time range")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="Rebuild the rollups from the channel logs")
+    build.add_argument('directory', help="Deployment directory holding channel logs")
+    search = commands.add_parser('query', help="Print min/max/mean/count buckets of a channel as CSV")
+    search.add_argument('directory', help="Deployment directory holding channel logs and rollups/")
+    search.add_argument('--channel', type=int, required=True)
+    search.add_argument('--from', dest='start', help="Local date/time, e.g. 2025-05-01 or 2025-05-01T06:00")
+    search.add_argument('--to', dest='end', help="Local date/time, not included")
+    search.add_argument('--res', default="15min", help="Bucket size: 30s, 1min, 15min, 1h, 1d, ... (default 15min)")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    if args.command == 'build':
+        written = build_rollups(args.directory)
+        print(f"{len(written)} rollup files, {sum(written.values())} records in "
+              f"{(time.monotonic() - start) * 1000:.1f} ms")
+        return
+
+    records, source = query(args.directory, args.channel, args.start, args.end, parse_resolution(args.res))
+    elapsed = time.monotonic() - start
+    out = sys.stdout
+    out.write("time,min,max,mean,count\n")
+    for record in records:
+        out.write(f"{np.datetime64(int(record['start']), 's')},{record['min']:.3f},{record['max']:.3f},"
+                  f"{record['mean']:.3f},{record['count']}\n")
+    print(f"{len(records)} buckets from {source} in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# Date: October 18, 2026
+# Buffered writer for the per-channel log files. File handles stay open between cycles, records are
+# batched in memory and written with one call per file, and files rotate to a new name every day.
+# Flushes happen after a number of records or an amount of time, and fsync runs on its own interval.
+# When the card cannot be written or a file cannot be opened, the records stay queued for the next
+# attempt, up to MAX_PENDING, so a failing disk costs the oldest records instead of the process. A short
+# write keeps the unwritten end of the batch queued, so lines and binary records are never torn.
+
+import errno
+import os
+import time
+
+DEFAULT_PATTERN = "channel_{channel}_{date}.txt"
+FLUSH_RECORDS = 60  # Write pending records once this many are buffered
+FLUSH_INTERVAL = 30.0  # ... or once this many seconds passed since the last write
+FSYNC_INTERVAL = 300.0  # Seconds between fsync calls, 0 to fsync on every flush
+MAX_PENDING = 50000  # Records kept in memory while writes fail (a few MB of text lines); oldest dropped
+BASELINE_SYSCALLS_PER_RECORD = 3  # open, write and close for every line in the unbuffered scripts
+
+
+def write_all(f, data):
+    """Write data to an unbuffered file, continuing after short writes
+
+    Returns (bytes written, None) or, when the write fails part way, (bytes written before, the error).
+    """
+    view = memoryview(data)
+    written = 0
+    while written < len(data):
+        try:
+            count = f.write(view[written:])
+        except OSError as e:
+            return written, e
+        if not count:
+            return written, OSError(errno.EIO, "Write made no progress")
+        written += count
+    return written, None
+
+
+class ChannelWriter:
+    """Append timestamped values to per-channel, per-day text files
+
+    Subclasses change the on-disk format by overriding _open and _encode.
+    """
+
+    def __init__(self, directory=".", pattern=DEFAULT_PATTERN, flush_records=FLUSH_RECORDS,
+                 flush_interval=FLUSH_INTERVAL, fsync_interval=FSYNC_INTERVAL, index=None,
+                 max_pending=MAX_PENDING):
+        self.directory = directory
+        self.pattern = pattern
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.index = index  # dendro_gaps.GapIndex told about every record, saved at each flush
+        self.max_pending = max_pending
+
+        self.handles = {}  # channel -> (path, file)
+        self.paths = {}  # channel -> file the pending records belong to
+        self.torn = set()  # Channels whose first pending record is the end of a partly written one
+        self.pending = {}  # channel -> list of formatted lines
+        self.pending_count = 0
+        self.last_flush = time.monotonic()
+        self.last_fsync = time.monotonic()
+        self.retry_at = None  # After a failed flush, no automatic flush before this monotonic time
+
+        # Cached timestamp strings, reformatted only when the second or the day changes
+        self._second = None
+        self._second_text = ""
+        self._day = None
+        self._date_text = ""
+
+        self.stats = {
+            'records': 0,
+            'bytes': 0,
+            'encoded_bytes': 0,  # Bytes queued so far
+            'text_bytes': 0,  # Bytes the same records take as text lines
+            'opens': 0,
+            'closes': 0,
+            'writes': 0,
+            'fsyncs': 0,
+            'rotations': 0,
+            'write_errors': 0,
+            'dropped': 0,  # Records discarded to stay within max_pending
+        }
+
+    def _format_time(self, timestamp):
+        """Return (timestamp text, date text) for an epoch time"""
+        second = int(timestamp)
+        if second != self._second:
+            local = time.localtime(second)
+            self._second = second
+            self._second_text = time.strftime("%Y-%m-%d %H:%M:%S", local)
+            day = (local.tm_year, local.tm_yday)
+            if day != self._day:
+                self._day = day
+                self._date_text = self._second_text[:10]
+        return self._second_text, self._date_text
+
+    def path_for(self, channel, date_text):
+        return os.path.join(self.directory, self.pattern.format(channel=channel, date=date_text))
+
+    def index_reading(self, channel, timestamp):
+        """Tell the gap index about a reading, logged or not (a compressing front end drops most)"""
+        if self.index is not None:
+            _, date_text = self._format_time(timestamp)
+            self.index.add(os.path.basename(self.path_for(channel, date_text)), channel,
+                           self._index_seconds(timestamp))
+
+    def write(self, channel, value, timestamp=None, indexed=False):
+        """Buffer one record and flush if the record count or time limit is reached
+
+        `indexed` when the reading was already given to the gap index with index_reading().
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        time_text, date_text = self._format_time(timestamp)
+
+        path = self.path_for(channel, date_text)
+        previous = self.paths.get(channel)
+        if previous is not None and previous != path:
+            # The day changed: write what belongs to the old file before switching
+            try:
+                self._flush_channel(channel)
+            except OSError as e:
+                # They cannot go to the new day's file
+                records = self.pending.pop(channel)
+                self.pending_count -= len(records)
+                self.torn.discard(channel)
+                self.stats['write_errors'] += 1
+                self.stats['dropped'] += len(records)
+                print(f"Channel log write failed, {len(records)} records of {previous} lost: {e}")
+            if channel in self.handles:
+                try:
+                    self._close_channel(channel)
+                except OSError:
+                    pass  # Handle already released, its unwritten bytes counted above
+            self.stats['rotations'] += 1
+        self.paths[channel] = path
+
+        record = self._encode(channel, value, timestamp, time_text)
+        if self.index is not None and not indexed:
+            self.index.add(os.path.basename(path), channel, self._index_seconds(timestamp))
+        self.pending.setdefault(channel, []).append(record)
+        self.pending_count += 1
+        self.stats['encoded_bytes'] += len(record)
+        self.stats['records'] += 1
+
+        now = time.monotonic()
+        if self.retry_at is not None and now < self.retry_at:
+            self._enforce_cap()
+        elif self.pending_count >= self.flush_records or now - self.last_flush >= self.flush_interval:
+            try:
+                self.flush()
+                self.retry_at = None
+            except OSError as e:
+                # Keep acquiring: the records wait for the next attempt, one flush interval later
+                self.stats['write_errors'] += 1
+                self.retry_at = now + self.flush_interval
+                print(f"Channel log write failed, {self.pending_count} records queued: {e}")
+                self._enforce_cap()
+
+    def _enforce_cap(self):
+        """Drop the oldest records of the longest queues while more than max_pending are buffered
+
+        The end of a partly written record is kept, the file would hold a torn record without it.
+        """
+        while self.max_pending and self.pending_count > self.max_pending:
+            channel, longest = max(self.pending.items(), key=lambda item: len(item[1]))
+            first = 1 if channel in self.torn else 0
+            excess = min(len(longest) - first, self.pending_count - self.max_pending)
+            if excess <= 0:
+                break
+            del longest[first:first + excess]
+            self.pending_count -= excess
+            self.stats['dropped'] += excess
+
+    def _open(self, channel, path):
+        # Unbuffered: records are already batched, and a failed write leaves nothing behind to repeat
+        return open(path, 'ab', buffering=0)
+
+    def _index_seconds(self, timestamp):
+        """The record's time as stored in the file: local wall-clock seconds for text lines"""
+        return int(timestamp) + time.localtime(timestamp).tm_gmtoff
+
+    def _encode(self, channel, value, timestamp, time_text):
+        """Return the bytes stored for one record"""
+        line = f"{time_text}, {value}\n".encode()
+        self.stats['text_bytes'] += len(line)
+        return line
+
+    def _handle(self, channel):
+        """Open file of the channel's pending records, opened on first use"""
+        path = self.paths[channel]
+        current = self.handles.get(channel)
+        if current is None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            current = self.handles[channel] = (path, self._open(channel, path))
+            self.stats['opens'] += 1
+        return current[1]
+
+    def _flush_channel(self, channel):
+        records = self.pending.get(channel)
+        if not records:
+            return
+        data = b"".join(records)
+        written, error = write_all(self._handle(channel), data)
+        self.stats['writes'] += 1
+        self.stats['bytes'] += written
+        if error is None:
+            self.pending_count -= len(records)
+            records.clear()
+            self.torn.discard(channel)
+            return
+        # Keep what was not written, starting with the end of the record the write stopped in
+        done = 0
+        complete = 0
+        while complete < len(records) and done + len(records[complete]) <= written:
+            done += len(records[complete])
+            complete += 1
+        del records[:complete]
+        self.pending_count -= complete
+        if written > done:
+            records[0] = records[0][written - done:]
+            self.torn.add(channel)
+        raise error
+
+    def _close_channel(self, channel):
+        path, f = self.handles.pop(channel)
+        f.close()
+        self.stats['closes'] += 1
+
+    def flush(self, fsync=None):
+        """Write every pending record; fsync as well if the interval elapsed or fsync is True
+
+        A channel that cannot be written does not hold up the others; the first error is raised once
+        they are all tried.
+        """
+        error = None
+        for channel in list(self.pending):
+            try:
+                self._flush_channel(channel)
+            except OSError as e:
+                error = error or e
+        self.last_flush = time.monotonic()
+        if error is not None:
+            raise error
+        if self.index is not None:
+            self.index.save()
+
+        if fsync is None:
+            fsync = self.last_flush - self.last_fsync >= self.fsync_interval
+        if fsync:
+            for path, f in self.handles.values():
+                os.fsync(f.fileno())
+                self.stats['fsyncs'] += 1
+            self.last_fsync = self.last_flush
+
+    def close(self):
+        """Flush, fsync and close every file"""
+        self.flush(fsync=True)
+        for channel in list(self.handles):
+            self._close_channel(channel)
+
+    def savings(self):
+        """Compare the syscalls made so far with opening, writing and closing the file for every record"""
+        syscalls = (self.stats['opens'] + self.stats['writes'] + self.stats['closes']
+                    + self.stats['fsyncs'])
+        baseline = self.stats['records'] * BASELINE_SYSCALLS_PER_RECORD
+        return {
+            'records': self.stats['records'],
+            'bytes_written': self.stats['bytes'],
+            'bytes_saved': self.stats['text_bytes'] - self.stats['encoded_bytes'],
+            'syscalls': syscalls,
+            'baseline_syscalls': baseline,
+            'syscalls_saved': baseline - syscalls,
+            'bytes_per_write': self.stats['bytes'] / self.stats['writes'] if self.stats['writes'] else 0.0,
+            'write_errors': self.stats['write_errors'],
+            'dropped': self.stats['dropped'],
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
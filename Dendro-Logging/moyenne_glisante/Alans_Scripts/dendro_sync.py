@@ -0,0 +1,354 @@
+# Date: October 18, 2026
+# Incremental collection of the channel logs of many loggers. The agent on each Pi remembers how many
+# bytes of every channel file the collector already holds and sends only what was appended since, as
+# complete lines (or complete records of .dbin files), batched and zlib compressed. The collector keeps
+# a mirror of every site's files, which dendro_ingest, dendro_export and dendro_rollup read directly.
+#
+# The collector's file sizes are the acknowledged offsets: a batch resent after a lost reply is trimmed
+# to the bytes the collector does not have yet, and an agent that lost its state (or a link) asks the
+# collector where to resume. Every piece carries a SHA-256 of its bytes and the file's first bytes, so a
+# corrupted transfer is rejected and a file rewritten on the Pi is sent again from the start.
+#
+# The collector has no authentication: it listens on localhost unless given --host, and should only be
+# opened to the loggers' own network (or reached through a VPN or SSH tunnel). Request bodies and their
+# decompressed size are capped.
+#
+#   python dendro_sync.py collector --directory /srv/dendro --host 10.0.0.1 --port 9106
+#   python dendro_sync.py agent /home/madlab/dendro_logger --site dorval-7 --url http://collector:9106
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dendro_binlog import HEADER_SIZE, RECORD_DTYPES
+from dendro_ingest import CHANNEL_FILE
+
+SYNC_PORT = 9106
+STATE_FILE = ".sync_state.json"
+MAX_BATCH_BYTES = 512 * 1024  # Raw bytes per batch, before compression
+MAX_DECODED_BYTES = 4 * MAX_BATCH_BYTES  # Largest batch the collector decompresses, manifest included
+MAX_REQUEST_BYTES = MAX_DECODED_BYTES  # Largest request body the collector reads
+HEAD_BYTES = 64  # Leading bytes identifying a file (the .dbin header, or the first line of a text log)
+SYNC_INTERVAL = 300.0
+RETRY_DELAY = 10.0
+MAX_RETRY_DELAY = 600.0
+SITE_NAME = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+DBIN_RECORD = RECORD_DTYPES[0].itemsize  # Both encodings use 8 byte records
+
+
+def complete_length(name, data, offset):
+    """Length of `data` (read from `offset`) that ends on a complete line or binary record"""
+    if name.endswith('.dbin'):
+        end = offset + len(data)
+        if end < HEADER_SIZE:
+            return 0
+        return HEADER_SIZE + (end - HEADER_SIZE) // DBIN_RECORD * DBIN_RECORD - offset
+    return data.rfind(b"\n") + 1
+
+
+def read_head(path):
+    with open(path, 'rb') as f:
+        return f.read(HEAD_BYTES).hex()
+
+
+def same_file(held_head, head):
+    """True if two file heads agree over the bytes both have, i.e. one file is a prefix of the other"""
+    common = min(len(held_head), len(head))
+    return held_head[:common] == head[:common]
+
+
+def encode_batch(site, pieces):
+    """Compress a batch: a JSON manifest line followed by the bytes of every piece"""
+    manifest = {'site': site, 'files': [
+        {'name': name, 'offset': offset, 'length': len(data), 'sha256': hashlib.sha256(data).hexdigest(),
+         'head': head, 'reset': reset}
+        for name, offset, data, head, reset in pieces]}
+    return zlib.compress(json.dumps(manifest).encode() + b"\n" + b"".join(p[2] for p in pieces), 6)
+
+
+def decode_batch(body, max_size=MAX_DECODED_BYTES):
+    """Manifest and (entry, bytes) pieces of a batch, ValueError if it is malformed or over `max_size`"""
+    decompressor = zlib.decompressobj()
+    raw = decompressor.decompress(body, max_size + 1)
+    if len(raw) > max_size:
+        raise ValueError(f"Batch larger than {max_size} bytes once decompressed")
+    if not decompressor.eof:
+        raise ValueError("Incomplete batch")
+    manifest_line, _, data = raw.partition(b"\n")
+    manifest = json.loads(manifest_line)
+    pieces = []
+    position = 0
+    for entry in manifest['files']:
+        piece = data[position:position + entry['length']]
+        position += entry['length']
+        if len(piece) != entry['length'] or hashlib.sha256(piece).hexdigest() != entry['sha256']:
+            raise ValueError(f"Checksum mismatch for {entry['name']}")
+        pieces.append((entry, piece))
+    return manifest, pieces
+
+
+class Collector:
+    """Per-site mirrors of the logger files, appended only with bytes they do not hold yet"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.stats = {'batches': 0, 'bytes_received': 0, 'bytes_appended': 0, 'bytes_duplicate': 0,
+                      'resets': 0}
+
+    def site_directory(self, site):
+        if not SITE_NAME.match(site):
+            raise ValueError(f"Invalid site name {site!r}")
+        return os.path.join(self.directory, site)
+
+    def offsets(self, site):
+        """Bytes held of every file of a site"""
+        directory = self.site_directory(site)
+        if not os.path.isdir(directory):
+            return {}
+        return {name: os.path.getsize(os.path.join(directory, name))
+                for name in os.listdir(directory) if CHANNEL_FILE.match(name)}
+
+    def apply(self, site, body):
+        """Merge a compressed batch; returns the offsets of its files after the merge"""
+        directory = self.site_directory(site)
+        manifest, pieces = decode_batch(body)
+        result = {}
+        with self.lock:
+            os.makedirs(directory, exist_ok=True)
+            self.stats['batches'] += 1
+            self.stats['bytes_received'] += len(body)
+            for entry, piece in pieces:
+                name = entry['name']
+                if not CHANNEL_FILE.match(name):
+                    raise ValueError(f"Not a channel log: {name!r}")
+                path = os.path.join(directory, name)
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                replaced = size and not same_file(read_head(path), entry['head'])
+                if entry['reset'] or (replaced and entry['offset'] == 0):
+                    # Rewritten on the logger: start the mirror over
+                    size = 0
+                    open(path, 'wb').close()
+                    self.stats['resets'] += 1
+                elif replaced:
+                    result[name] = 0  # Another file under the same name, ask for it from the start
+                    continue
+                if entry['offset'] > size:
+                    result[name] = size  # Gap: the agent resumes from what is held
+                    continue
+                skip = size - entry['offset']
+                new = piece[skip:]
+                self.stats['bytes_duplicate'] += min(skip, len(piece))
+                if new:
+                    with open(path, 'ab') as f:
+                        f.write(new)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    self.stats['bytes_appended'] += len(new)
+                result[name] = size + len(new)
+        return result
+
+    def serve(self, port=SYNC_PORT, host="127.0.0.1"):
+        """GET /offsets/<site> and POST /batch/<site> from a background thread"""
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parts = self.path.strip('/').split('/')
+                if len(parts) != 2 or parts[0] != 'offsets':
+                    self.send_error(404)
+                    return
+                try:
+                    self._reply({'offsets': collector.offsets(parts[1])})
+                except ValueError as e:
+                    self._reply({'error': str(e)}, 400)
+
+            def do_POST(self):
+                parts = self.path.strip('/').split('/')
+                if len(parts) != 2 or parts[0] != 'batch':
+                    self.send_error(404)
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_REQUEST_BYTES:
+                    self.close_connection = True  # The body is not read
+                    self._reply({'error': f"Body must be 0 to {MAX_REQUEST_BYTES} bytes"}, 413 if length > 0 else 400)
+                    return
+                body = self.rfile.read(length)
+                try:
+                    self._reply({'offsets': collector.apply(parts[1], body)})
+                except (ValueError, KeyError, TypeError, zlib.error) as e:
+                    # A manifest missing fields or with fields of the wrong type is malformed as well
+                    self._reply({'error': f"Malformed batch: {e!r}"}, 400)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        thread = threading.Thread(target=self.server.serve_forever, name="collector", daemon=True)
+        thread.start()
+        return self.server
+
+
+class SyncAgent:
+    """Send the new bytes of the channel logs of a directory to a collector"""
+
+    def __init__(self, directory, site, url, state_file=STATE_FILE, max_batch=MAX_BATCH_BYTES, timeout=30.0):
+        if not SITE_NAME.match(site):
+            raise ValueError(f"Invalid site name {site!r}")
+        self.directory = directory
+        self.site = site
+        self.url = url.rstrip('/')
+        self.state_path = os.path.join(directory, state_file)
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.offsets = self._load_state()
+        self.confirmed = False  # Offsets checked against the collector since start or the last failure
+        self.stats = {'batches': 0, 'bytes_new': 0, 'bytes_sent': 0, 'failures': 0}
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        temporary = self.state_path + ".tmp"
+        with open(temporary, 'w') as f:
+            json.dump(self.offsets, f)
+        os.replace(temporary, self.state_path)
+
+    def _request(self, path, body=None):
+        request = urllib.request.Request(self.url + path, data=body, method='POST' if body else 'GET')
+        if body:
+            request.add_header("Content-Type", "application/octet-stream")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.load(response)['offsets']
+
+    def pending(self):
+        """(name, offset, size) of the files with bytes the collector does not have"""
+        files = []
+        for name in sorted(os.listdir(self.directory)):
+            if not CHANNEL_FILE.match(name):
+                continue
+            size = os.path.getsize(os.path.join(self.directory, name))
+            offset = self.offsets.get(name, 0)
+            if size != offset:
+                files.append((name, offset, size))
+        return files
+
+    def next_batch(self):
+        pieces = []
+        budget = self.max_batch
+        for name, offset, size in self.pending():
+            if budget <= 0:
+                break
+            path = os.path.join(self.directory, name)
+            reset = size < offset  # Truncated or replaced on this logger
+            if reset:
+                offset = 0
+            with open(path, 'rb') as f:
+                head = f.read(HEAD_BYTES).hex()
+                f.seek(offset)
+                data = f.read(min(size - offset, budget))
+            data = data[:complete_length(name, data, offset)]
+            if data or reset:
+                pieces.append((name, offset, data, head, reset))
+                budget -= len(data)
+        return pieces
+
+    def sync_once(self):
+        """Send batches until nothing new is left; returns the number of new bytes acknowledged"""
+        if not self.confirmed:
+            held = self._request(f"/offsets/{self.site}")
+            self.offsets = {name: held.get(name, 0) for name in set(self.offsets) | set(held)}
+            self.confirmed = True
+        acknowledged = 0
+        while True:
+            pieces = self.next_batch()
+            if not pieces:
+                break
+            body = encode_batch(self.site, pieces)
+            before = {name: self.offsets.get(name, 0) for name, *_ in pieces}
+            offsets = self._request(f"/batch/{self.site}", body)
+            self.offsets.update(offsets)
+            self._save_state()
+            gained = sum(max(offsets.get(name, 0) - offset, 0) for name, offset in before.items())
+            self.stats['batches'] += 1
+            self.stats['bytes_sent'] += len(body)
+            self.stats['bytes_new'] += gained
+            acknowledged += gained
+            if all(offsets.get(name) == offset for name, offset in before.items()):
+                break  # No progress (the collector asked for what was sent); try again at the next round
+        return acknowledged
+
+    def run(self, interval=SYNC_INTERVAL):
+        delay = RETRY_DELAY
+        while True:
+            try:
+                sent = self.sync_once()
+                delay = RETRY_DELAY
+                print(f"Synced {sent} bytes, {self.stats}", flush=True)
+                time.sleep(interval)
+            except (OSError, ValueError) as e:
+                # Link down or collector unreachable: back off, then confirm the offsets again
+                self.stats['failures'] += 1
+                self.confirmed = False
+                print(f"Sync failed: {e}, retrying in {delay:.0f} s", flush=True)
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental sync of channel logs to a collector")
+    commands = parser.add_subparsers(dest='command', required=True)
+    collector = commands.add_parser('collector', help="Receive batches from the loggers")
+    collector.add_argument('--directory', default="collected", help="One sub-directory per site is kept here")
+    collector.add_argument('--host', default="127.0.0.1",
+                           help="Address to listen on, e.g. the one on the loggers' network (no authentication)")
+    collector.add_argument('--port', type=int, default=SYNC_PORT)
+    agent = commands.add_parser('agent', help="Send the new data of a logger directory")
+    agent.add_argument('directory', help="Directory holding the channel logs")
+    agent.add_argument('--site', required=True, help="Site name, the collector's directory for this logger")
+    agent.add_argument('--url', required=True, help="Collector URL, e.g. http://collector:9106")
+    agent.add_argument('--interval', type=float, default=SYNC_INTERVAL, help="Seconds between syncs")
+    agent.add_argument('--once', action='store_true', help="Sync once and exit")
+    args = parser.parse_args()
+
+    if args.command == 'collector':
+        service = Collector(args.directory)
+        service.serve(args.port, args.host)
+        print(f"Collecting into {os.path.abspath(args.directory)} on port {args.port}", flush=True)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print(f"\nCollector stopped, {service.stats}")
+        return
+
+    sync = SyncAgent(args.directory, args.site, args.url)
+    if args.once:
+        print(f"Synced {sync.sync_once()} bytes, {sync.stats}")
+    else:
+        sync.run(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,19 @@
 # This script interfaces with a dendrometer to collect data and process it using a moving average filter.
 
 # Import necessary libraries for communication and sensor operation
+import atexit
+import os
+import sys
 import time
 import board
 import busio
 import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
-import numpy as np
+from dendro_storage import ChannelWriter
+from dendro_diagnostics import Diagnostics
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from streaming_filters import MovingAverage
 
 # Initialize I2C communication
 i2c = busio.I2C(board.SCL, board.SDA)
@@ -22,11 +29,18 @@ adc_channel_3 = AnalogIn(ads, ADS.P3)  # Use channel 3 of the ADS1115
 # Define the window size for the moving average filter
 window_size = 10
 
-# Create a list to store ADC values for each channel
-adc_values_0 = []
-adc_values_1 = []
-adc_values_2 = []
-adc_values_3 = []
+# Buffered writer for the per-day channel files, flushed on exit too
+writer = ChannelWriter(pattern="micron_values_channel_{channel}_{date}.txt")
+atexit.register(writer.close)
+
+# kill -USR1 / -USR2 to profile or snapshot the memory of the running script, RSS printed every hour
+diagnostics = Diagnostics().install()
+
+# Create a moving average filter for each channel
+adc_values_0 = MovingAverage(window_size)
+adc_values_1 = MovingAverage(window_size)
+adc_values_2 = MovingAverage(window_size)
+adc_values_3 = MovingAverage(window_size)
 
 # Function to read ADC value, apply calibration, and convert to voltage and microns
 def read_adc(adc_channel):
@@ -51,19 +65,13 @@ def mean_adc(adc_channel, adc_values):
         time.sleep(0.08)  # Wait for a short period before taking the next sample
     mean_microns = sum(microns_values) / len(microns_values)
     mean_voltage = sum(voltage_values) / len(voltage_values)
-    adc_values.append(mean_microns)
-    # If enough values are collected, apply the moving average filter
-    if len(adc_values) > window_size:
-        adc_values.pop(0)  # Remove the oldest value
-    filtered_value = np.mean(adc_values)  # Calculate the average of the values in the window
+    filtered_value = adc_values.update(mean_microns)  # Average of the values in the window
     return filtered_value, mean_voltage
 
 # Function to save the mean microns value to a file
 def save_mean_microns(mean_microns, channel):
-    # Open a file in append mode
-    with open(f'micron_values_channel_{channel}.txt', 'a') as file:
-        # Write the mean micron value to the file
-        file.write(str(mean_microns) + '\n')
+    # Buffer the timestamped value, the writer appends it to today's file for the channel
+    writer.write(channel, mean_microns)
 
 # Main loop to continuously read sensors and process data
 while True:
@@ -86,6 +94,7 @@ while True:
     save_mean_microns(filtered_value_1, 1)
     save_mean_microns(filtered_value_2, 2)
     save_mean_microns(filtered_value_3, 3)
+    diagnostics.tick()
 
        
     # end_time = time.monotonic()  # Get the end time
@@ -2,13 +2,19 @@
 # Date: June 11, 2024
 # This script interfaces with a dendrometer to collect data and process it using a moving average filter.
 
-import datetime
+import atexit
+import os
+import sys
 import time
 import board
 import busio
 import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
-import numpy as np
+from dendro_storage import ChannelWriter
+from dendro_diagnostics import Diagnostics
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from streaming_filters import MovingAverage
 
 # # Initialize I2C communication
 i2c = busio.I2C(board.SCL, board.SDA)
@@ -19,8 +25,15 @@ adc_channel = AnalogIn(ads, ADS.P0)  # Use channel 0 of the ADS1115
 # Define the window size for the moving average filter
 window_size = 10
 
-# Create a list to store ADC values
-adc_values = []
+# Buffered writer for the per-day micron value files, flushed on exit too
+writer = ChannelWriter(pattern="micron_values_{date}.txt")
+atexit.register(writer.close)
+
+# kill -USR1 / -USR2 to profile or snapshot the memory of the running script, RSS printed every hour
+diagnostics = Diagnostics().install()
+
+# Create the moving average filter
+adc_values = MovingAverage(window_size)
 
 # Function to read ADC value, apply calibration, and convert to voltage and microns
 def read_adc():
@@ -64,12 +77,8 @@ def mean_adc():
 
 # Function to save the mean microns value to a file
 def save_mean_microns(mean_microns):
-    # Get the current timestamp
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    # Open a file in append mode
-    with open('micron_values.txt', 'a') as file:
-        # Write the mean micron value to the file
-        file.write(f"{timestamp}, {mean_microns}\n")
+    # Buffer the timestamped value, the writer appends it to today's file
+    writer.write(0, mean_microns)
 
 # Main loop to continuously read sensors and process data
 while True:
@@ -82,17 +91,11 @@ while True:
         time.sleep(1)
         continue
 
-    # Add the ADC value to the list for moving average calculation
-    adc_values.append(mean_microns)
-
-    # If enough values are collected, apply the moving average filter
-    if len(adc_values) > window_size:
-        # Remove the oldest value
-        adc_values.pop(0)
+    # Add the ADC value to the moving average filter
+    filtered_value = adc_values.update(mean_microns)
 
-        # Calculate the average of the values in the window
-        filtered_value = np.mean(adc_values)
-        
+    # Once the window is full, use the filtered value
+    if adc_values.ready:
         print(f"Filtered Microns: {filtered_value}, Mean Voltage: {mean_voltage}")
         # Save the filtered value to a file
         save_mean_microns(filtered_value)
@@ -102,4 +105,5 @@ while True:
     # Calculate and print the elapsed time for each loop iteration
     elapsed_time = end_time - start_time
     print(f"Elapsed time: {elapsed_time} seconds")
+    diagnostics.tick()
 
@@ -0,0 +1,251 @@
+# Date: October 18, 2026
+# ADS1115 / AnalogIn simulator to develop and benchmark the acquisition scripts without a Pi.
+# install() registers fake board, busio and adafruit_ads1x15 modules in sys.modules, so the scripts
+# in Alans_Scripts import it unchanged:
+#
+#   import ads_simulator
+#   sim = ads_simulator.install(noise=3.0, i2c_error_rate=0.01)
+#   import dendro_monitor  # now talks to the simulator
+#
+# The simulated ADC models the conversion time at the configured data rate (single-shot reads block,
+# continuous mode waits for the next conversion and for two when the multiplexer switches), the I2C
+# transfer time of each read at the bus frequency, Gaussian noise,
+# slow drift, a diurnal stem shrinkage curve, I2C exceptions and out of range readings. It can also
+# replay recorded channel logs, optionally faster than real time (speed=1000).
+
+import math
+import os
+import random
+import sys
+import time
+import types
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alans_Scripts"))
+
+ADC_FLOOR = 275
+STROKE = 25400.0
+GAIN_ONE_FULL_SCALE = 4.096  # Volts at full scale for the default gain
+ADDRESSES = (0x48, 0x49, 0x4A, 0x4B)
+DATA_RATES = (8, 16, 32, 64, 128, 250, 475, 860)
+I2C_READ_BITS = 45  # Pointer write then a two byte read: five bytes of 9 bits, start and stop aside
+
+
+class Mode:
+    CONTINUOUS = 0x0000
+    SINGLE = 0x0100
+
+
+def microns_to_raw(microns):
+    """Inverse of the read_adc calibration"""
+    return int(round(microns / STROKE * 65535.0 + ADC_FLOOR))
+
+
+class SignalModel:
+    """Stem radius signal of one channel, in microns, as a function of simulated epoch time"""
+
+    def __init__(self, base=1500.0, amplitude=40.0, drift=2.0, noise=1.0, phase_hour=14.0, seed=None):
+        self.base = base
+        self.amplitude = amplitude  # Half of the daily shrinkage, µm
+        self.drift = drift  # Growth, µm per day
+        self.noise = noise  # Standard deviation of the Gaussian noise, µm
+        self.phase_hour = phase_hour  # Local hour of maximum shrinkage
+        self.rng = random.Random(seed)
+        self.start = None
+
+    def microns(self, t):
+        if self.start is None:
+            self.start = t
+        local = time.localtime(t)
+        hour = local.tm_hour + local.tm_min / 60.0 + local.tm_sec / 3600.0
+        days = (t - self.start) / 86400.0
+        shrinkage = -self.amplitude * math.cos(2 * math.pi * (hour - self.phase_hour) / 24.0)
+        return self.base + self.drift * days + shrinkage + self.rng.gauss(0.0, self.noise)
+
+
+class ReplaySignal:
+    """Signal read from a recorded channel log, interpolated at the simulated time"""
+
+    def __init__(self, path):
+        import numpy as np
+        from dendro_ingest import read_channel_file
+
+        times, values = read_channel_file(path)
+        if len(times) == 0:
+            raise ValueError(f"No readings in {path}")
+        self.np = np
+        # Recorded timestamps are local time: shift them to epoch seconds with the offset of the first one
+        naive = times.astype('int64').astype(float)
+        first = times[0].astype(object)
+        self.times = naive + (time.mktime(first.timetuple()) - naive[0])
+        self.values = values
+        self.start = float(self.times[0])
+        self.end = float(self.times[-1])
+
+    def microns(self, t):
+        return float(self.np.interp(t, self.times, self.values))
+
+
+class Simulator:
+    """Shared state of the simulated hardware: clock, signals and fault injection"""
+
+    def __init__(self, channels=4, boards=1, base=1500.0, amplitude=40.0, drift=2.0, noise=1.0,
+                 i2c_error_rate=0.0, out_of_range_rate=0.0, speed=1.0, start_time=None,
+                 latency=True, replay=None, seed=None):
+        self.rng = random.Random(seed)
+        self.i2c_error_rate = i2c_error_rate
+        self.out_of_range_rate = out_of_range_rate
+        self.speed = speed
+        self.latency = latency
+        self.t0 = time.monotonic()
+        self.start_time = time.time() if start_time is None else start_time
+
+        # One signal per (board address, pin)
+        self.signals = {}
+        replay = list(replay or [])
+        for board_index in range(boards):
+            for pin in range(channels):
+                key = (ADDRESSES[board_index], pin)
+                flat = board_index * channels + pin
+                if flat < len(replay):
+                    self.signals[key] = ReplaySignal(replay[flat])
+                else:
+                    self.signals[key] = SignalModel(base + 100.0 * flat, amplitude, drift, noise,
+                                                    seed=None if seed is None else seed + flat)
+        if replay and start_time is None:
+            self.start_time = min(s.start for s in self.signals.values() if isinstance(s, ReplaySignal))
+
+        self.stats = {'conversions': 0, 'i2c_errors': 0, 'out_of_range': 0}
+
+    def now(self):
+        """Simulated epoch time, running `speed` times faster than real time"""
+        return self.start_time + (time.monotonic() - self.t0) * self.speed
+
+    def wait(self, seconds):
+        """Block for a conversion time, unless latency modelling is off"""
+        if self.latency and seconds > 0:
+            time.sleep(seconds)
+
+    def convert(self, address, pin):
+        """Produce one raw conversion, raising or corrupting it as configured"""
+        self.stats['conversions'] += 1
+        if self.i2c_error_rate and self.rng.random() < self.i2c_error_rate:
+            self.stats['i2c_errors'] += 1
+            raise OSError(121, "Remote I/O error")
+        if self.out_of_range_rate and self.rng.random() < self.out_of_range_rate:
+            self.stats['out_of_range'] += 1
+            return self.rng.choice((-1, 70000))
+        signal = self.signals.get((address, pin))
+        if signal is None:
+            return 0
+        return max(0, min(65535, microns_to_raw(signal.microns(self.now()))))
+
+
+SIMULATOR = None
+
+
+class I2C:
+    def __init__(self, scl, sda, frequency=100000):
+        self.scl = scl
+        self.sda = sda
+        self.frequency = frequency
+
+    def deinit(self):
+        pass
+
+
+class ADS1115:
+    """Simulated ADS1115 with the attributes the Adafruit driver exposes"""
+
+    def __init__(self, i2c, gain=1, data_rate=128, mode=Mode.SINGLE, address=0x48):
+        if address not in ADDRESSES:
+            raise ValueError(f"No ADS1115 at address {hex(address)}")
+        if SIMULATOR is not None and (address, 0) not in SIMULATOR.signals:
+            raise OSError(19, f"No I2C device at address {hex(address)}")
+        self.i2c_device = i2c
+        self.gain = gain
+        self.data_rate = data_rate
+        self.mode = mode
+        self.address = address
+        self._last_pin_read = None
+        self._next_ready = 0.0  # Monotonic time of the next continuous conversion
+        self._transfer = I2C_READ_BITS / getattr(i2c, 'frequency', 100000)
+
+    @property
+    def rates(self):
+        return DATA_RATES
+
+    def read(self, pin, is_differential=False):
+        sim = SIMULATOR
+        period = 1.0 / self.data_rate
+        if self.mode == Mode.CONTINUOUS and self._last_pin_read == pin:
+            # A new conversion is ready every period: wait for it rather than reread the last one
+            sim.wait(self._next_ready - time.monotonic())
+        elif self.mode == Mode.CONTINUOUS:
+            sim.wait(2 * period)  # The driver waits two conversions after switching the multiplexer
+        else:
+            sim.wait(period)  # Single shot: one full conversion
+        self._next_ready = max(self._next_ready, time.monotonic()) + period
+        sim.wait(self._transfer)
+        self._last_pin_read = pin
+        return sim.convert(self.address, pin)
+
+
+class AnalogIn:
+    def __init__(self, ads, positive_pin, negative_pin=None):
+        self._ads = ads
+        self._pin_setting = positive_pin
+
+    @property
+    def value(self):
+        # Corrupted transfers come back out of range, for the caller to reject
+        return self._ads.read(self._pin_setting)
+
+    @property
+    def voltage(self):
+        return self.value / 65535.0 * GAIN_ONE_FULL_SCALE / self._ads.gain
+
+    def __repr__(self):
+        return f"AnalogIn(P{self._pin_setting})"
+
+
+def _module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+
+def install(**config):
+    """Create the simulator and register the fake hardware modules in sys.modules"""
+    global SIMULATOR
+    SIMULATOR = Simulator(**config)
+
+    board = _module('board', SCL='SCL', SDA='SDA')
+    board.__getattr__ = lambda name: name  # Any other pin name, e.g. board.D1 for a second bus
+    busio = _module('busio', I2C=I2C)
+    ads1x15 = _module('adafruit_ads1x15.ads1x15', Mode=Mode, ADS1x15=ADS1115)
+    ads1115 = _module('adafruit_ads1x15.ads1115', ADS1115=ADS1115, P0=0, P1=1, P2=2, P3=3)
+    analog_in = _module('adafruit_ads1x15.analog_in', AnalogIn=AnalogIn)
+    package = _module('adafruit_ads1x15', ads1x15=ads1x15, ads1115=ads1115, analog_in=analog_in)
+    package.__path__ = []
+
+    sys.modules.update({
+        'board': board,
+        'busio': busio,
+        'adafruit_ads1x15': package,
+        'adafruit_ads1x15.ads1x15': ads1x15,
+        'adafruit_ads1x15.ads1115': ads1115,
+        'adafruit_ads1x15.analog_in': analog_in,
+    })
+    return SIMULATOR
+
+
+if __name__ == "__main__":
+    # Quick look at the simulated signal: one reading per simulated hour over two days
+    sim = install(speed=36000.0, latency=False, noise=0.5, seed=1)
+    import adafruit_ads1x15.ads1115 as ADS
+    from adafruit_ads1x15.analog_in import AnalogIn as SimAnalogIn
+
+    channel = SimAnalogIn(ADS.ADS1115(I2C('SCL', 'SDA')), ADS.P0)
+    for _ in range(48):
+        print(time.strftime("%Y-%m-%d %H:%M", time.localtime(sim.now())), channel.value)
+        time.sleep(0.1)
@@ -0,0 +1,223 @@
+# Date: October 18, 2026
+# Benchmark of the dendro_monitor pipeline (sample_all_channels -> process_samples -> save_channel_data)
+# against the simulated ADS1115 of ads_simulator, for 1, 4 and 16 channels.
+#
+# Reports per-stage timings, samples/second, loop jitter percentiles, allocations per cycle and the
+# bytes the logs grow by per hour, and saves everything to a JSON file named after the git commit so
+# runs can be compared:
+#
+#   python benchmark_pipeline.py
+#   python benchmark_pipeline.py --compare benchmark_results/<older run>.json
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import ads_simulator
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(HERE, "benchmark_results")
+CHANNEL_COUNTS = (1, 4, 16)
+PINS_PER_BOARD = 4
+
+
+def percentiles(values, points=(50, 95, 99)):
+    """Nearest-rank percentiles of a list of numbers"""
+    if not values:
+        return {f"p{p}": 0.0 for p in points}
+    ordered = sorted(values)
+    return {f"p{p}": ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+            for p in points}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def setup_channels(monitor, n_channels, args, directory):
+    """Point the dendro_monitor module at n simulated channels spread over as many boards as needed"""
+    from dendro_acquisition import (AcquisitionEngine, ConcurrentAcquisitionEngine, board_channel,
+                                    discover_boards)
+    from dendro_calibration import Calibration
+    from dendro_storage import ChannelWriter
+    from dendro_binlog import BinaryChannelWriter
+    from dendro_rollup import ROLLUP_DIR, RollupStore
+    from streaming_filters import MovingAverage, channel_filters
+
+    n_boards = (n_channels + PINS_PER_BOARD - 1) // PINS_PER_BOARD
+    boards = discover_boards(monitor.buses, ads_simulator.ADDRESSES[:n_boards])
+    pins = min(n_channels, PINS_PER_BOARD)
+    if args.sequential:
+        from adafruit_ads1x15.analog_in import AnalogIn
+        channels = {board_channel(board, pin): AnalogIn(board.ads, pin) for board in boards for pin in range(pins)}
+        monitor.engine = AcquisitionEngine([board.ads for board in boards], channels,
+                                           data_rate=args.data_rate, budget=args.budget)
+    else:
+        monitor.engine = ConcurrentAcquisitionEngine(boards, data_rate=args.data_rate, budget=args.budget,
+                                                     pins=pins)
+    monitor.channels = monitor.engine.channels
+    monitor.calibration = Calibration(monitor.engine.channel_numbers)
+    monitor.channel_data = channel_filters(monitor.channels, lambda: MovingAverage(monitor.WINDOW_SIZE))
+    writer_class = BinaryChannelWriter if args.binary else ChannelWriter
+    monitor.writer = writer_class(directory)
+    # Rollups next to the benchmark's logs rather than in the caller's directory
+    monitor.rollups = RollupStore(os.path.join(directory, ROLLUP_DIR))
+
+
+def run_cycle(monitor, timings):
+    """One pass of the monitor loop body, recording the time spent in each stage"""
+    t0 = time.perf_counter()
+    samples = monitor.sample_all_channels()
+    t1 = time.perf_counter()
+    results = monitor.process_samples(samples)
+    t2 = time.perf_counter()
+    for chan_num, (filtered, voltage) in results.items():
+        if filtered is not None:
+            monitor.save_channel_data(chan_num, filtered)
+    t3 = time.perf_counter()
+    timings['sample_all_channels'].append(t1 - t0)
+    timings['process_samples'].append(t2 - t1)
+    timings['save_channel_data'].append(t3 - t2)
+    timings['cycle'].append(t3 - t0)
+
+
+def benchmark(monitor, n_channels, args):
+    with tempfile.TemporaryDirectory() as directory:
+        setup_channels(monitor, n_channels, args, directory)
+        timings = {'sample_all_channels': [], 'process_samples': [], 'save_channel_data': [], 'cycle': []}
+        jitter = []
+        rates = []
+
+        # Timed loop paced like main_loop, measuring how late each cycle starts
+        run_cycle(monitor, {k: [] for k in timings})  # Warm-up
+        next_start = time.monotonic()
+        for _ in range(args.cycles):
+            now = time.monotonic()
+            if next_start > now:
+                time.sleep(next_start - now)
+            jitter.append(time.monotonic() - next_start)
+            run_cycle(monitor, timings)
+            rates.append(monitor.engine.samples_per_second)
+            next_start += args.period
+
+        # Separate pass with tracemalloc on, so tracing does not distort the timings above
+        gc.collect()
+        tracemalloc.start()
+        peaks = []
+        blocks_before = sys.getallocatedblocks()
+        for _ in range(args.alloc_cycles):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            run_cycle(monitor, {k: [] for k in timings})
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        blocks_after = sys.getallocatedblocks()
+        tracemalloc.stop()
+
+        monitor.writer.close()
+        monitor.rollups.close()
+        monitor.engine.close()
+        stats = monitor.writer.savings()
+        total_cycles = args.cycles + args.alloc_cycles + 1
+        bytes_per_cycle = stats['bytes_written'] / total_cycles
+
+    return {
+        'channels': n_channels,
+        'cycles': args.cycles,
+        'stages_ms': {stage: {k: v * 1000.0 for k, v in percentiles(values).items()}
+                      for stage, values in timings.items()},
+        'samples_per_second': sum(rates) / len(rates) if rates else 0.0,
+        'jitter_ms': {k: v * 1000.0 for k, v in percentiles(jitter).items()},
+        'peak_bytes_per_cycle': max(peaks) if peaks else 0,
+        'net_blocks_per_cycle': (blocks_after - blocks_before) / max(args.alloc_cycles, 1),
+        # Log growth at the deployed cadence of one record per channel per LOOP_PERIOD
+        'bytes_written_per_hour': bytes_per_cycle * 3600.0 / monitor.LOOP_PERIOD,
+        'syscalls_saved': stats['syscalls_saved'],
+    }
+
+
+def print_result(result):
+    stages = ", ".join(f"{stage} {v['p50']:.2f}/{v['p95']:.2f}" for stage, v in result['stages_ms'].items())
+    print(f"{result['channels']:>2} channels: {stages} ms (p50/p95)")
+    print(f"   {result['samples_per_second']:.0f} samples/s, jitter p50 {result['jitter_ms']['p50']:.2f} "
+          f"p95 {result['jitter_ms']['p95']:.2f} p99 {result['jitter_ms']['p99']:.2f} ms, "
+          f"peak {result['peak_bytes_per_cycle']} B/cycle, {result['net_blocks_per_cycle']:+.1f} blocks/cycle, "
+          f"{result['bytes_written_per_hour'] / 1024:.1f} KiB/h written")
+
+
+def compare(current, previous_path):
+    """Print the relative change of the main figures against a saved run"""
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nCompared with {previous['revision']} ({previous['date']}):")
+    old = {r['channels']: r for r in previous['results']}
+    for result in current['results']:
+        before = old.get(result['channels'])
+        if before is None:
+            continue
+        changes = []
+        for label, new, prev in (
+                ('cycle p50', result['stages_ms']['cycle']['p50'], before['stages_ms']['cycle']['p50']),
+                ('samples/s', result['samples_per_second'], before['samples_per_second']),
+                ('jitter p95', result['jitter_ms']['p95'], before['jitter_ms']['p95']),
+                ('bytes/h', result['bytes_written_per_hour'], before['bytes_written_per_hour'])):
+            change = (new - prev) / prev * 100.0 if prev else 0.0
+            changes.append(f"{label} {change:+.1f}%")
+        print(f"{result['channels']:>2} channels: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the acquisition -> filter -> storage pipeline")
+    parser.add_argument('--cycles', type=int, default=20, help="Timed cycles per channel count")
+    parser.add_argument('--alloc-cycles', type=int, default=5, help="Cycles traced for allocations")
+    parser.add_argument('--budget', type=float, default=0.2, help="Acquisition budget per cycle (s)")
+    parser.add_argument('--period', type=float, default=0.25, help="Loop period of the timed cycles (s)")
+    parser.add_argument('--data-rate', type=int, default=860, help="ADS1115 data rate")
+    parser.add_argument('--channels', type=int, nargs='+', default=list(CHANNEL_COUNTS))
+    parser.add_argument('--binary', action='store_true', help="Benchmark the binary log writer")
+    parser.add_argument('--sequential', action='store_true',
+                        help="Read the channels one after another instead of all boards at once")
+    parser.add_argument('--output', help="Result file (default benchmark_results/<date>_<commit>.json)")
+    parser.add_argument('--compare', help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    boards = (max(args.channels) + PINS_PER_BOARD - 1) // PINS_PER_BOARD
+    ads_simulator.install(boards=boards, noise=2.0, seed=1)
+    import dendro_monitor as monitor
+
+    run = {
+        'revision': git_revision(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'settings': vars(args),
+        'results': [],
+    }
+    for n_channels in args.channels:
+        result = benchmark(monitor, n_channels, args)
+        run['results'].append(result)
+        print_result(result)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{run['revision']}.json")
+    with open(output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        compare(run, args.compare)
+
+
+if __name__ == "__main__":
+    main()
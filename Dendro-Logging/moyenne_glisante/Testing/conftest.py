@@ -0,0 +1,2 @@
+# The *_test.py scripts are acquisition loops run by hand against the mock hardware, not test modules
+collect_ignore = ["moyenne_glisante_2_test.py", "moyenne_glisante_2_pi_test.py"]
@@ -0,0 +1,180 @@
+# Date: October 18, 2026
+# In-memory stand-in for adafruit_rfm9x, to exercise radio_packets and moyenne_glisante.py without
+# radios. Every RFM9x created after install() shares one "ether": a packet sent by one node is received
+# by the node it is addressed to, acknowledgements included, with optional packet loss.
+#
+#   import rfm9x_loopback
+#   ether = rfm9x_loopback.install(loss_rate=0.2)
+#   import adafruit_rfm9x  # now the loopback
+#
+# Running the module compares the airtime of the former text lines with batched binary packets.
+
+import math
+import os
+import random
+import sys
+import time
+import types
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+BROADCAST = 0xFF
+RADIOHEAD_HEADER = 4  # destination, node, identifier, flags
+
+
+def airtime(payload_bytes, spreading_factor=7, bandwidth=125000, coding_rate=5, preamble=8, crc=True):
+    """Seconds on air of one LoRa packet with an explicit header (Semtech AN1200.13)"""
+    symbol = 2 ** spreading_factor / bandwidth
+    low_data_rate = 1 if symbol > 0.016 else 0
+    payload_symbols = 8 + max(math.ceil(
+        (8 * payload_bytes - 4 * spreading_factor + 28 + 16 * crc)
+        / (4 * (spreading_factor - 2 * low_data_rate))) * coding_rate, 0)
+    return (preamble + 4.25) * symbol + payload_symbols * symbol
+
+
+class Ether:
+    """Packets in flight between the loopback radios"""
+
+    def __init__(self, loss_rate=0.0, seed=None):
+        self.loss_rate = loss_rate
+        self.rng = random.Random(seed)
+        self.inboxes = {}  # node -> list of (header, payload)
+        self.log = []  # (sender, destination, length) of every transmission
+        self.airtime = 0.0
+
+    def transmit(self, sender, destination, identifier, flags, payload):
+        self.log.append((sender, destination, len(payload)))
+        self.airtime += airtime(len(payload) + RADIOHEAD_HEADER)
+        if self.loss_rate and self.rng.random() < self.loss_rate:
+            return
+        for node, inbox in self.inboxes.items():
+            if node != sender and (destination == BROADCAST or destination == node):
+                inbox.append((bytes([destination, sender, identifier, flags]), bytes(payload)))
+
+
+ETHER = None
+
+
+class RFM9x:
+    """Loopback radio with the attributes and calls of adafruit_rfm9x.RFM9x used by the scripts"""
+
+    def __init__(self, spi, cs, reset, frequency, *, preamble_length=8, high_power=True, baudrate=5000000,
+                 agc=False, crc=True):
+        self.frequency_mhz = frequency
+        self.tx_power = 13
+        self.destination = BROADCAST
+        self.identifier = 0
+        self.flags = 0
+        self.ack_retries = 5
+        self.ack_wait = 0.5
+        self.ack_delay = None
+        self.last_rssi = 0.0
+        self.ether = ETHER
+        self._node = BROADCAST
+        self.ether.inboxes.setdefault(self._node, [])
+
+    @property
+    def node(self):
+        return self._node
+
+    @node.setter
+    def node(self, value):
+        inbox = self.ether.inboxes.pop(self._node, [])
+        self._node = value
+        self.ether.inboxes.setdefault(value, []).extend(inbox)
+
+    def send(self, data, *, keep_listening=False, destination=None, node=None, identifier=None, flags=None):
+        if len(data) > 252:
+            raise AssertionError("Data must be 252 bytes or less")
+        self.ether.transmit(self.node if node is None else node,
+                            self.destination if destination is None else destination,
+                            self.identifier if identifier is None else identifier,
+                            self.flags if flags is None else flags, data)
+        return True
+
+    def send_with_ack(self, data):
+        """Send and wait for the receiver's acknowledgement, retrying like the driver does"""
+        self.identifier = (self.identifier + 1) & 0xFF
+        for _ in range(self.ack_retries + 1):
+            self.send(data)
+            inbox = self.ether.inboxes[self.node]
+            for index, (header, payload) in enumerate(inbox):
+                if header[3] & 0x80 and header[2] == self.identifier and header[1] == self.destination:
+                    del inbox[index]
+                    return True
+        return False
+
+    def receive(self, *, keep_listening=True, with_header=False, with_ack=False, timeout=None):
+        inbox = self.ether.inboxes[self.node]
+        deadline = time.monotonic() + (0.5 if timeout is None else timeout)
+        while True:
+            for index, (header, payload) in enumerate(inbox):
+                if header[3] & 0x80:
+                    continue  # Acknowledgements are picked up by send_with_ack
+                del inbox[index]
+                if with_ack and header[0] != BROADCAST:
+                    self.send(b"!", destination=header[1], identifier=header[2], flags=header[3] | 0x80)
+                self.last_rssi = -40.0
+                return header + payload if with_header else payload
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.001)
+
+
+class AutoAckReceiver:
+    """Receiving node that acknowledges every packet as soon as it arrives, for send_with_ack tests"""
+
+    def __init__(self, node):
+        self.radio = RFM9x(None, None, None, 915.0)
+        self.radio.node = node
+        self.packets = []
+        ether = self.radio.ether
+        transmit = ether.transmit
+
+        def transmit_and_ack(sender, destination, identifier, flags, payload):
+            before = len(ether.inboxes[node])
+            transmit(sender, destination, identifier, flags, payload)
+            if destination == node and len(ether.inboxes[node]) > before and not flags & 0x80:
+                self.packets.append(self.radio.receive(with_ack=True, timeout=0))
+
+        ether.transmit = transmit_and_ack
+
+
+def install(loss_rate=0.0, seed=None):
+    """Create the shared ether and register the loopback as adafruit_rfm9x"""
+    global ETHER
+    ETHER = Ether(loss_rate, seed)
+    sys.modules['adafruit_rfm9x'] = types.SimpleNamespace(RFM9x=RFM9x, __name__='adafruit_rfm9x')
+    return ETHER
+
+
+if __name__ == "__main__":
+    from radio_packets import RadioSender, SequenceTracker, decode_packet
+
+    ether = install(loss_rate=0.1, seed=1)
+    sender_radio = RFM9x(None, None, None, 915.0)
+    sender_radio.node = 1
+    sender_radio.destination = 2
+    receiver = AutoAckReceiver(2)
+    sender = RadioSender(sender_radio, 1, batch_size=8, with_ack=True)
+
+    readings = 96
+    text_airtime = 0.0
+    start = int(time.time())
+    for i in range(readings):
+        reading = (start + 60 * i, 1500.0 + i * 0.01, 0.19, 21.5, 1013.2, 21.2, 55.0)
+        line = (f"Filtered Microns: {reading[1]}, Mean Tensions: {reading[2]}, DPS310 Temperature: "
+                f"{reading[3]}, Pressure: {reading[4]}, SHT41 Temperature: {reading[5]}, Humidity: {reading[6]}")
+        text_airtime += airtime(len(line.encode()) + RADIOHEAD_HEADER)
+        sender.add(reading)
+        sender.service()
+    sender.flush_batch()
+    sender.service()
+
+    tracker = SequenceTracker()
+    packets = [decode_packet(packet) for packet in receiver.packets]
+    decoded = [r for packet in packets if tracker.accept(packet) for r in packet['readings']]
+    print(f"{readings} readings: text lines {text_airtime:.2f} s on air, binary packets {ether.airtime:.2f} s "
+          f"with acks and retries at 10% loss")
+    print(f"Sender stats {sender.stats}, decoded {len(decoded)} readings "
+          f"({tracker.duplicates} duplicate packets, {tracker.missed} missed)")
@@ -0,0 +1,79 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alans_Scripts"))
+import numpy as np
+from dendro_binlog import (ENCODING_NANOMETRES, HEADER_SIZE, BinaryChannelWriter, load_channel_logs,
+                           open_channel_log, pack_header, unpack_header)
+
+START = 1760000000
+
+
+def test_header_round_trip():
+    header = unpack_header(pack_header(5, ENCODING_NANOMETRES, {'stroke': 12700.0}, created=START))
+    assert (header['channel'], header['encoding'], header['created']) == (5, ENCODING_NANOMETRES, START)
+    assert header['calibration']['stroke'] == 12700.0
+
+
+def test_float32_round_trip(tmp_path):
+    values = [1500.25, 1501.5, 1499.75, 1502.0]
+    writer = BinaryChannelWriter(str(tmp_path), flush_records=2)
+    for i, value in enumerate(values):
+        writer.write(3, value, START + 60 * i)
+    writer.close()
+    (path,) = tmp_path.iterdir()
+    header, records = open_channel_log(str(path))
+    assert header['channel'] == 3
+    assert list(records['time']) == [START + 60 * i for i in range(4)]
+    assert list(records['value']) == values  # Exact in float32
+
+
+def test_nanometre_round_trip(tmp_path):
+    writer = BinaryChannelWriter(str(tmp_path), encoding='nanometres')
+    for i in range(10):
+        writer.write(0, 1234.567 + i * 0.001, START + i)
+    writer.close()
+    (path,) = tmp_path.iterdir()
+    seconds, microns = load_channel_logs([str(path)])
+    np.testing.assert_allclose(microns, [1234.567 + i * 0.001 for i in range(10)], atol=5e-4)
+
+
+def test_reopened_file_keeps_one_header(tmp_path):
+    for i in range(2):
+        writer = BinaryChannelWriter(str(tmp_path))
+        writer.write(1, 10.0 + i, START + i)
+        writer.close()
+    (path,) = tmp_path.iterdir()
+    assert os.path.getsize(path) == HEADER_SIZE + 2 * 8
+    seconds, microns = load_channel_logs([str(path)])
+    assert list(microns) == [10.0, 11.0]
+
+
+def test_partial_record_is_ignored(tmp_path):
+    writer = BinaryChannelWriter(str(tmp_path))
+    for i in range(3):
+        writer.write(2, 100.0 + i, START + i)
+    writer.close()
+    (path,) = tmp_path.iterdir()
+    with open(path, 'ab') as f:
+        f.write(b"\x01\x02\x03")  # Interrupted write
+    header, records = open_channel_log(str(path))
+    assert len(records) == 3
+
+
+def test_append_after_torn_tail(tmp_path):
+    writer = BinaryChannelWriter(str(tmp_path))
+    for i in range(3):
+        writer.write(2, 100.0 + i, START + i)
+    writer.close()
+    (path,) = tmp_path.iterdir()
+    with open(path, 'ab') as f:
+        f.write(b"\x01\x02\x03")  # Power cut in the middle of a record
+    writer = BinaryChannelWriter(str(tmp_path))
+    for i in range(3, 6):
+        writer.write(2, 100.0 + i, START + i)
+    writer.close()
+    assert os.path.getsize(path) == HEADER_SIZE + 6 * 8
+    seconds, microns = load_channel_logs([str(path)])
+    assert list(seconds) == [START + i for i in range(6)]
+    assert list(microns) == [100.0 + i for i in range(6)]
@@ -0,0 +1,86 @@
+import math
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alans_Scripts"))
+from dendro_compression import CompressedWriter
+from dendro_gaps import INDEX_NAME, GapIndex
+from dendro_rollup import local_seconds
+from dendro_storage import ChannelWriter
+
+START = 1760000000
+
+
+def outages(index):
+    """Lengths of the outages of channel 0 longer than the cadence change, whose first intervals are gaps too"""
+    return [end - start for _, start, end in index.missing(channels=[0]) if end - start >= 3600]
+
+
+def reading_times():
+    """A minute cadence over three days with two outages and a move to a five minute cadence"""
+    times = [START + 60 * i for i in range(1500)]
+    times += [times[-1] + 3600 + 60 * i for i in range(1000)]  # One hour outage
+    times += [times[-1] + 300 * (i + 1) for i in range(400)]  # Cadence changes
+    times += [times[-1] + 7200 + 300 * i for i in range(200)]  # Two hour outage
+    return times
+
+
+def write_logs(directory, times, channels=(0, 1)):
+    writer = ChannelWriter(directory, flush_records=50, index=GapIndex(directory))
+    for t in times:
+        for channel in channels:
+            writer.write(channel, 1000.0 + channel, t)
+    writer.close()
+    return writer.index
+
+
+def test_incremental_index_matches_rebuild(tmp_path):
+    incremental = write_logs(str(tmp_path), reading_times())
+    assert len(incremental.files) > 2  # Split across days
+    os.remove(tmp_path / INDEX_NAME)
+    rebuilt = GapIndex(str(tmp_path))
+    rebuilt.rebuild()
+    assert rebuilt.files == incremental.files
+    assert rebuilt.channels == incremental.channels
+    assert outages(rebuilt) == [3600, 7200]
+    assert sum(len(entry['cadence_changes']) for entry in rebuilt.files.values()) == 2
+
+
+def test_index_is_reloaded_from_disk(tmp_path):
+    index = write_logs(str(tmp_path), reading_times(), channels=(0,))
+    assert GapIndex(str(tmp_path)).files == index.files
+    assert GapIndex(str(tmp_path)).stale() == set()
+
+
+def test_refresh_picks_up_files_written_elsewhere(tmp_path):
+    times = reading_times()
+    write_logs(str(tmp_path), times, channels=(0,))
+    # Another writer appends without telling the index
+    writer = ChannelWriter(str(tmp_path))
+    writer.write(0, 1000.0, times[-1] + 3 * 3600)
+    writer.close()
+    index = GapIndex(str(tmp_path))
+    assert index.refresh() == {0}
+    assert outages(index) == [3600, 7200, 3 * 3600]
+
+
+def test_compressed_logs_are_indexed_from_every_reading(tmp_path):
+    index = GapIndex(str(tmp_path), max_interval=3600)
+    writer = CompressedWriter(ChannelWriter(str(tmp_path), index=index), 'swinging_door', 0.5, max_interval=3600)
+    # Six hours at 1 Hz of a slow daily swing, with a two hour outage in the middle
+    times = [START + i for i in range(3 * 3600)] + [START + 5 * 3600 + i for i in range(3 * 3600)]
+    for t in times:
+        writer.write(0, 1000.0 + 20.0 * math.sin(2 * math.pi * (t - START) / 86400), t)
+    writer.close()
+    assert writer.points_out < len(times) / 100
+    outage = [(0, local_seconds(START + 3 * 3600 - 1), local_seconds(START + 5 * 3600))]
+    assert index.missing(channels=[0]) == outage
+    assert not any(entry['cadence_changes'] for entry in index.files.values())
+
+    # Rebuilt from the logged points only, with the max_interval saved in the index
+    rebuilt = GapIndex(str(tmp_path))
+    rebuilt.rebuild()
+    assert rebuilt.max_interval == 3600
+    # The outage runs between the logged points around it
+    ((_, start, end),) = rebuilt.missing(channels=[0])
+    assert start <= outage[0][1] and end == outage[0][2]
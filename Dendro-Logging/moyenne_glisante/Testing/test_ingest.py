@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alans_Scripts"))
+import numpy as np
+from dendro_ingest import parse_channel_text
+
+
+def test_malformed_lines_are_skipped():
+    data = (b"2025-02-22 15:24:04, 1500.5\n"
+            b"2025-02-22 15:24:05 1500.6\n"  # No comma
+            b"2025-02-22 15:24:06, 1.2.3\n"
+            b"2025-02-22 15:24:07, 1500.8\r\n"
+            b"2025-02-22 15:2")  # Cut short
+    times, values = parse_channel_text(data)
+    assert list(values) == [1500.5, 1500.8]
+
+
+def test_impossible_dates_are_skipped():
+    data = (b"2025-02-32 15:24:04, 3\n"
+            b"2025-02-29 00:00:00, 4\n"  # Not a leap year
+            b"2024-02-29 00:00:00, 5\n"
+            b"2025-04-31 12:00:00, 6\n"
+            b"2025-13-01 12:00:00, 7\n"
+            b"2025-06-01 24:00:00, 8\n"
+            b"2025-06-01 23:59:59, 9\n")
+    times, values = parse_channel_text(data)
+    assert list(times) == [np.datetime64('2024-02-29T00:00:00'), np.datetime64('2025-06-01T23:59:59')]
+    assert list(values) == [5.0, 9.0]
@@ -0,0 +1,76 @@
+import importlib.util
+import os
+import struct
+import sys
+import types
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import radio_packets
+from radio_packets import SequenceTracker, decode_packet, encode_packet
+
+START = 1760000000
+
+
+def packet(node, sequence, base):
+    return decode_packet(encode_packet(node, sequence, [(base, 1500.0, 0.19, 21.5, 1013.2, 21.2, 55.0)]))
+
+
+def test_round_trip():
+    decoded = packet(3, 7, START)
+    assert (decoded['node'], decoded['sequence'], decoded['base']) == (3, 7, START)
+    assert decoded['readings'][0]['microns'] == 1500.0
+
+
+def test_resent_packet_is_a_duplicate():
+    tracker = SequenceTracker()
+    assert tracker.accept(packet(1, 0, START))
+    assert tracker.accept(packet(1, 1, START + 60))
+    assert not tracker.accept(packet(1, 1, START + 60))
+    assert (tracker.duplicates, tracker.missed) == (1, 0)
+
+
+def test_missed_packets_are_counted():
+    tracker = SequenceTracker()
+    for sequence in (0, 1, 4):
+        assert tracker.accept(packet(1, sequence, START + 60 * sequence))
+    assert tracker.missed == 2
+
+
+def test_reboot_restarts_the_sequence():
+    tracker = SequenceTracker(history=64)
+    for sequence in range(100):
+        assert tracker.accept(packet(1, sequence, START + 60 * sequence))
+    # After the reboot the sequence starts again at 0 with later base times
+    rebooted = START + 60 * 100
+    accepted = [tracker.accept(packet(1, sequence, rebooted + 60 * sequence)) for sequence in range(10)]
+    assert all(accepted)
+    assert (tracker.duplicates, tracker.restarts, tracker.missed) == (0, 1, 0)
+
+
+def test_short_lived_reboot_is_not_a_duplicate():
+    tracker = SequenceTracker(history=64)
+    for sequence in range(5):
+        assert tracker.accept(packet(1, sequence, START + 60 * sequence))
+    # Fewer packets than the history before the reboot: the base times tell the packets apart
+    assert all(tracker.accept(packet(1, sequence, START + 3600 + 60 * sequence)) for sequence in range(5))
+    assert tracker.duplicates == 0
+
+
+def test_nodes_are_tracked_separately():
+    tracker = SequenceTracker()
+    assert tracker.accept(packet(1, 0, START))
+    assert tracker.accept(packet(2, 0, START))
+
+
+def test_circuitpython_struct_is_enough(monkeypatch):
+    # CircuitPython's struct module has these functions and no Struct class
+    board_struct = types.ModuleType("struct")
+    for name in ('calcsize', 'pack', 'pack_into', 'unpack', 'unpack_from'):
+        setattr(board_struct, name, getattr(struct, name))
+    monkeypatch.setitem(sys.modules, "struct", board_struct)
+    spec = importlib.util.spec_from_file_location("board_radio_packets", radio_packets.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    data = module.encode_packet(2, 9, [(START, 1500.0, None, 21.5, 1013.2, 21.2, 55.0)])
+    assert data == encode_packet(2, 9, [(START, 1500.0, None, 21.5, 1013.2, 21.2, 55.0)])
+    assert module.decode_packet(data)['readings'][0]['tension'] is None
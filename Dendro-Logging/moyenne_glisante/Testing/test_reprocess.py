@@ -0,0 +1,115 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alans_Scripts"))
+import numpy as np
+import dendro_reprocess
+from dendro_ingest import read_channel_file
+from dendro_reprocess import Reprocessing, parse_filters
+from dendro_storage import ChannelWriter
+
+START = 1760000000
+DAY = 86400
+
+
+class SerialExecutor:
+    """ProcessPoolExecutor stand-in running each task in the test process when its result is asked for"""
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, function, *args):
+        return Task(function, args)
+
+
+class Task:
+    def __init__(self, function, args):
+        self.function = function
+        self.args = args
+
+    def result(self):
+        return self.function(*self.args)
+
+
+def serial(monkeypatch):
+    """Run the tasks one at a time, in submission order"""
+    monkeypatch.setattr(dendro_reprocess, 'ProcessPoolExecutor', SerialExecutor)
+    monkeypatch.setattr(dendro_reprocess, 'as_completed', iter)
+
+
+def write_site(directory, days=3, channels=(0, 1)):
+    os.makedirs(directory)
+    writer = ChannelWriter(directory, flush_records=1000)
+    for i in range(0, days * DAY, 600):
+        for channel in channels:
+            writer.write(channel, 1000.0 + channel + (i // 600) % 7, START + i)
+    writer.close()
+
+
+def run(tmp_path, workers=1):
+    reprocessing = Reprocessing([str(tmp_path / "site")], str(tmp_path / "out"), parse_filters(["mean:3"]))
+    return reprocessing, reprocessing.run(workers)
+
+
+def test_interrupted_run_resumes(tmp_path, monkeypatch):
+    write_site(str(tmp_path / "site"))
+    total = len(list((tmp_path / "site").iterdir()))
+    # The first run stops after two files
+    original = dendro_reprocess.process_file
+    done = []
+
+    def failing(task):
+        if len(done) == 2:
+            raise KeyboardInterrupt
+        done.append(task[0])
+        return original(task)
+
+    serial(monkeypatch)
+    monkeypatch.setattr(dendro_reprocess, 'process_file', failing)
+    try:
+        run(tmp_path)
+    except KeyboardInterrupt:
+        pass
+    monkeypatch.setattr(dendro_reprocess, 'process_file', original)
+
+    reprocessing, stats = run(tmp_path)
+    assert (stats['pending'], stats['files']) == (total - 2, total - 2)
+    with open(reprocessing.journal_path) as f:
+        journaled = [json.loads(line)['source'] for line in f]
+    assert sorted(journaled) == sorted(str(p) for p in (tmp_path / "site").iterdir())
+    # Nothing left for a third run
+    assert run(tmp_path)[1]['pending'] == 0
+
+
+def test_resumed_output_matches_a_single_run(tmp_path, monkeypatch):
+    serial(monkeypatch)
+    write_site(str(tmp_path / "site"))
+    reprocessing, _ = run(tmp_path)
+    site = os.path.join(reprocessing.directory, "site")
+    first = {name: read_channel_file(os.path.join(site, name))[1] for name in os.listdir(site)}
+    # Lose one output and its journal entry, as if the run had stopped before it
+    lost = sorted(first)[1]
+    os.remove(os.path.join(site, lost))
+    with open(reprocessing.journal_path) as f:
+        entries = [line for line in f if not json.loads(line)['source'].endswith(lost)]
+    with open(reprocessing.journal_path, 'w') as f:
+        f.write("".join(entries) + '{"source": "cut')  # Last line cut short
+    assert run(tmp_path)[1]['files'] == 1
+    np.testing.assert_array_equal(read_channel_file(os.path.join(site, lost))[1], first[lost])
+
+
+def test_changed_source_is_redone(tmp_path, monkeypatch):
+    serial(monkeypatch)
+    write_site(str(tmp_path / "site"), days=1, channels=(0,))
+    run(tmp_path)
+    writer = ChannelWriter(str(tmp_path / "site"))
+    writer.write(0, 2000.0, START + DAY - 1)
+    writer.close()
+    assert run(tmp_path)[1]['files'] == 1
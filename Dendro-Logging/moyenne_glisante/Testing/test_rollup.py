@@ -0,0 +1,41 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alans_Scripts"))
+from dendro_rollup import RECORD, RollupStore, local_seconds, read_tier, rollup_path
+
+START = 1760000000 - local_seconds(1760000000) % 3600  # On the hour, local time
+TIERS = (('1min', 60), ('1h', 3600))
+
+
+def test_restart_continues_the_open_bucket(tmp_path):
+    store = RollupStore(str(tmp_path), TIERS)
+    for i in range(30):
+        store.add(0, float(i), START + 60 * i)
+    store.close()
+    store = RollupStore(str(tmp_path), TIERS)
+    for i in range(30, 60):
+        store.add(0, float(i), START + 60 * i)
+    store.close()
+    (hour,) = read_tier(rollup_path(str(tmp_path), 0, '1h'))
+    assert (hour['count'], hour['min'], hour['max'], hour['mean']) == (60, 0.0, 59.0, 29.5)
+    assert len(read_tier(rollup_path(str(tmp_path), 0, '1min'))) == 60
+
+
+def test_torn_record_is_cut_before_resuming(tmp_path):
+    store = RollupStore(str(tmp_path), TIERS)
+    for i in range(10):
+        store.add(1, 5.0, START + 60 * i)
+    store.close()
+    for tier, _ in TIERS:
+        with open(rollup_path(str(tmp_path), 1, tier), 'ab') as f:
+            f.write(b"\x07" * 5)  # Power cut in the middle of a record
+    store = RollupStore(str(tmp_path), TIERS)
+    for i in range(10, 20):
+        store.add(1, 7.0, START + 60 * i)
+    store.close()
+    minutes = read_tier(rollup_path(str(tmp_path), 1, '1min'))
+    assert list(minutes['start']) == [local_seconds(START + 60 * i) for i in range(20)]
+    assert os.path.getsize(rollup_path(str(tmp_path), 1, '1min')) == 20 * RECORD.size
+    (hour,) = read_tier(rollup_path(str(tmp_path), 1, '1h'))
+    assert (hour['count'], hour['min'], hour['max'], hour['mean']) == (20, 5.0, 7.0, 6.0)
@@ -0,0 +1,183 @@
+import errno
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alans_Scripts"))
+import dendro_binlog
+from dendro_binlog import BinaryChannelWriter, load_channel_logs
+from dendro_ingest import read_channel_file
+from dendro_storage import ChannelWriter
+
+START = 1760000000
+
+
+class FlakyFile:
+    """Unbuffered file writing at most `chunk` bytes per call and failing while `budget` is exhausted"""
+
+    def __init__(self, path, chunk=5, budget=None):
+        self.file = open(path, 'ab', buffering=0)
+        self.chunk = chunk
+        self.budget = budget  # Bytes accepted before writes fail, None for no limit
+
+    def write(self, data):
+        if self.budget is not None and self.budget <= 0:
+            raise OSError(errno.ENOSPC, "No space left on device")
+        size = min(len(data), self.chunk, len(data) if self.budget is None else self.budget)
+        if self.budget is not None:
+            self.budget -= size
+        return self.file.write(bytes(data[:size]))
+
+    def tell(self):
+        return self.file.tell()
+
+    def truncate(self, size):
+        return self.file.truncate(size)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+class FlakyWriter(ChannelWriter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.files = []
+        self.open_error = None
+
+    def _open(self, channel, path):
+        if self.open_error is not None:
+            raise self.open_error
+        f = FlakyFile(path)
+        self.files.append(f)
+        return f
+
+
+def lines(path):
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+def test_flush_by_record_count(tmp_path):
+    writer = ChannelWriter(str(tmp_path), flush_records=3, flush_interval=3600)
+    for i in range(5):
+        writer.write(0, float(i), START + i)
+    (path,) = tmp_path.iterdir()
+    assert len(lines(path)) == 3
+    writer.close()
+    assert [float(line.split(', ')[1]) for line in lines(path)] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_short_writes_are_completed(tmp_path):
+    writer = FlakyWriter(str(tmp_path), flush_records=4, flush_interval=3600)
+    for i in range(8):
+        writer.write(1, 1000.0 + i, START + i)
+    writer.close()
+    (path,) = tmp_path.iterdir()
+    times, values = read_channel_file(str(path))
+    assert list(values) == [1000.0 + i for i in range(8)]
+    assert writer.stats['write_errors'] == 0
+
+
+def test_failed_write_keeps_the_rest_of_the_batch(tmp_path):
+    writer = FlakyWriter(str(tmp_path), flush_records=4, flush_interval=3600)
+    writer.write(0, 1.5, START)
+    writer.flush()  # Opens the file
+    writer.write(0, 2.5, START + 1)
+    writer.files[0].budget = 30  # The card fills up part way through the first line
+    for i in range(2, 5):
+        writer.write(0, 1.5 + i, START + i)
+    assert writer.stats['write_errors'] == 1
+    assert writer.retry_at is not None
+    assert 0 in writer.torn
+
+    writer.files[0].budget = None
+    writer.retry_at = 0  # Retry now rather than a flush interval later
+    writer.write(0, 6.5, START + 5)
+    writer.close()
+    (path,) = tmp_path.iterdir()
+    assert [float(line.split(', ')[1]) for line in lines(path)] == [1.5, 2.5, 3.5, 4.5, 5.5, 6.5]
+
+
+def test_open_failure_is_retried(tmp_path):
+    writer = FlakyWriter(str(tmp_path), flush_records=2, flush_interval=3600)
+    writer.open_error = OSError(errno.EROFS, "Read-only file system")
+    for i in range(4):
+        writer.write(2, float(i + 10), START + i)
+    assert writer.stats['write_errors'] == 1
+    assert writer.pending_count == 4
+
+    writer.open_error = None
+    writer.retry_at = 0
+    writer.write(2, 14.0, START + 4)
+    writer.close()
+    (path,) = tmp_path.iterdir()
+    assert len(lines(path)) == 5
+
+
+def test_pending_records_are_capped(tmp_path):
+    writer = FlakyWriter(str(tmp_path), flush_records=2, flush_interval=3600, max_pending=10)
+    writer.open_error = OSError(errno.EIO, "Input/output error")
+    for i in range(50):
+        writer.write(i % 2, float(i), START + i)
+        writer.retry_at = 0
+    assert writer.pending_count == 10
+    assert writer.stats['dropped'] == 40
+
+    writer.open_error = None
+    writer.close()
+    kept = sorted(v for path in tmp_path.iterdir() for v in read_channel_file(str(path))[1])
+    assert kept == [float(i) for i in range(40, 50)]
+
+
+def test_cap_keeps_the_end_of_a_torn_record(tmp_path):
+    writer = FlakyWriter(str(tmp_path), flush_records=2, flush_interval=3600, max_pending=3)
+    writer.write(0, 1.0, START)
+    writer.flush()
+    writer.files[0].budget = 10
+    for i in range(1, 12):
+        writer.write(0, 1.0 + i, START + i)
+        writer.retry_at = 0
+    writer.files[0].budget = None
+    writer.close()
+    (path,) = tmp_path.iterdir()
+    # Every line in the file is whole, whatever was dropped
+    for line in lines(path):
+        text, value = line.split(', ')
+        assert len(text) == 19 and float(value) >= 1.0
+
+
+def test_binary_log_short_writes_stay_aligned(tmp_path, monkeypatch):
+    files = []
+
+    def flaky_open(path, mode, buffering):
+        files.append(FlakyFile(path, chunk=3))
+        return files[-1]
+
+    monkeypatch.setattr(dendro_binlog, 'open', flaky_open, raising=False)
+    writer = BinaryChannelWriter(str(tmp_path), flush_records=3, flush_interval=3600)
+    for i in range(7):
+        writer.write(4, 100.0 + i, START + i)
+    assert writer.pending_count == 1
+    files[0].budget = 5  # Stops inside a record
+    writer.write(4, 107.0, START + 7)
+    writer.write(4, 108.0, START + 8)
+    assert writer.stats['write_errors'] == 1
+    files[0].budget = None
+    writer.close()
+    monkeypatch.undo()
+    (path,) = tmp_path.iterdir()
+    seconds, values = load_channel_logs([str(path)])
+    assert list(seconds) == [START + i for i in range(9)]
+    assert list(values) == [100.0 + i for i in range(9)]
+
+
+def test_day_rotation(tmp_path):
+    writer = ChannelWriter(str(tmp_path), flush_records=100)
+    day = 86400
+    for i in range(3):
+        writer.write(0, float(i), START + i * day)
+    writer.close()
+    assert len(list(tmp_path.iterdir())) == 3
+    assert writer.stats['rotations'] == 2
@@ -0,0 +1,151 @@
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+import zlib
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Alans_Scripts"))
+from dendro_storage import ChannelWriter
+import dendro_sync
+from dendro_sync import Collector, SyncAgent, decode_batch
+
+START = 1760000000
+
+
+class LocalAgent(SyncAgent):
+    """Agent calling the collector directly; `lose_replies` batches are applied but their reply is lost"""
+
+    def __init__(self, directory, collector, **kwargs):
+        super().__init__(directory, "site-1", "http://collector", **kwargs)
+        self.collector = collector
+        self.lose_replies = 0
+
+    def _request(self, path, body=None):
+        if body is None:
+            return self.collector.offsets(self.site)
+        offsets = self.collector.apply(self.site, body)
+        if self.lose_replies:
+            self.lose_replies -= 1
+            raise OSError("Connection reset by peer")
+        return offsets
+
+
+def log(directory, first, count, channel=0):
+    writer = ChannelWriter(directory, flush_records=count)
+    for i in range(first, first + count):
+        writer.write(channel, 1000.0 + i, START + 60 * i)
+    writer.close()
+
+
+def mirror(collector, logger, name):
+    with open(os.path.join(collector.directory, "site-1", name), 'rb') as f:
+        held = f.read()
+    with open(os.path.join(logger, name), 'rb') as f:
+        return held == f.read()
+
+
+def test_sync_sends_only_new_lines(tmp_path):
+    logger, collector = str(tmp_path / "logger"), Collector(str(tmp_path / "collector"))
+    os.makedirs(logger)
+    agent = LocalAgent(logger, collector)
+    log(logger, 0, 100)
+    first = agent.sync_once()
+    log(logger, 100, 10)
+    second = agent.sync_once()
+    (name,) = os.listdir(os.path.join(collector.directory, "site-1"))
+    assert mirror(collector, logger, name)
+    assert second < first / 5
+    assert collector.stats['bytes_duplicate'] == 0
+
+
+def test_resume_after_lost_reply(tmp_path):
+    logger, collector = str(tmp_path / "logger"), Collector(str(tmp_path / "collector"))
+    os.makedirs(logger)
+    agent = LocalAgent(logger, collector)
+    log(logger, 0, 50)
+    agent.sync_once()
+    log(logger, 50, 50)
+    agent.lose_replies = 1
+    try:
+        agent.sync_once()
+    except OSError:
+        agent.confirmed = False  # As SyncAgent.run does after a failure
+    else:
+        raise AssertionError("The lost reply was not noticed")
+    # The collector kept the batch: the agent resumes from its offsets and sends nothing twice
+    log(logger, 100, 5)
+    agent.sync_once()
+    (name,) = os.listdir(os.path.join(collector.directory, "site-1"))
+    assert mirror(collector, logger, name)
+    assert collector.stats['bytes_duplicate'] == 0
+
+
+def test_resent_batch_is_trimmed(tmp_path):
+    logger, collector = str(tmp_path / "logger"), Collector(str(tmp_path / "collector"))
+    os.makedirs(logger)
+    agent = LocalAgent(logger, collector)
+    log(logger, 0, 50)
+    agent.sync_once()
+    log(logger, 50, 50)
+    agent.lose_replies = 1
+    try:
+        agent.sync_once()
+    except OSError:
+        pass
+    # Resent without asking the collector first: the bytes it already holds are dropped
+    agent.sync_once()
+    (name,) = os.listdir(os.path.join(collector.directory, "site-1"))
+    assert mirror(collector, logger, name)
+    assert collector.stats['bytes_duplicate'] > 0
+
+
+def test_state_lost_on_the_logger(tmp_path):
+    logger, collector = str(tmp_path / "logger"), Collector(str(tmp_path / "collector"))
+    os.makedirs(logger)
+    log(logger, 0, 50)
+    LocalAgent(logger, collector).sync_once()
+    os.remove(os.path.join(logger, ".sync_state.json"))
+    log(logger, 50, 20)
+    agent = LocalAgent(logger, collector)
+    agent.sync_once()
+    (name,) = [n for n in os.listdir(logger) if not n.startswith('.')]
+    assert mirror(collector, logger, name)
+    assert collector.stats['bytes_duplicate'] == 0
+
+
+def post(server, body):
+    """Status and JSON reply of a batch POST to a running collector"""
+    host, port = server.server_address
+    request = urllib.request.Request(f"http://{host}:{port}/batch/site-1", data=body, method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_collector_rejects_bad_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr(dendro_sync, 'MAX_REQUEST_BYTES', 1000)
+    collector = Collector(str(tmp_path))
+    server = collector.serve(port=0)
+    try:
+        assert server.server_address[0] == "127.0.0.1"
+        assert post(server, zlib.compress(b'{"site": "site-1"}\n'))[0] == 400  # No files
+        assert post(server, zlib.compress(b'{"files": [{"name": 5}]}\n'))[0] == 400
+        assert post(server, b"not zlib")[0] == 400
+        assert post(server, b"\0" * 2000)[0] == 413
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_decompression_is_capped():
+    bomb = zlib.compress(b"\0" * (10 * 1024 * 1024))
+    try:
+        decode_batch(bomb, max_size=1024 * 1024)
+    except ValueError as e:
+        assert "larger" in str(e)
+    else:
+        raise AssertionError("The batch was decompressed in full")
@@ -3,8 +3,8 @@
 # This script interfaces with various sensors to collect environmental 
 #data such as temperature, pressure, and humidity. It processes the 
 #data using a moving average filter and transmits it over a radio frequency communication module. 
-#The script is designed for use with a microcontroller and includes functions for sensor testing, data averaging, 
-#and non-acknowledgment data transmission. It also features a section for data logging, which is currently commented out.
+#The script is designed for use with a microcontroller and includes persistent sensor drivers, data averaging, 
+#and batched binary radio packets (radio_packets.py). It also features a section for data logging, which is currently commented out.
 
 
 # Import necessary libraries for communication and sensor operation
@@ -14,10 +14,12 @@ import busio
 import analogio
 import digitalio
 import time
-from adafruit_dps310.basic import DPS310
+from adafruit_dps310.advanced import DPS310_Advanced as DPS310, Mode as DPS310Mode, Rate, SampleCount
 import adafruit_sht4x
 import adafruit_rfm9x
-import ulab.numpy as np
+from streaming_filters import MovingAverage
+from radio_packets import RadioSender
+from sensor_manager import ManagedSensor, SensorManager
 
 # Initialize I2C communication
 i2c = busio.I2C(board.D25, board.D24)
@@ -39,21 +41,34 @@ rfm9x.tx_power = 23
 rfm9x.node = 1
 rfm9x.destination = 2
 
+# Readings packed into each radio packet, and whether to wait for the receiver's acknowledgement
+BATCH_SIZE = 8
+WITH_ACK = False
+# Binary packets batching several readings, queued until sent (and acknowledged with WITH_ACK)
+sender = RadioSender(rfm9x, rfm9x.node, batch_size=BATCH_SIZE, with_ack=WITH_ACK)
+
 # Define the window size for the moving average filter
 window_size = 10
 
-# Create a list to store ADC values
-adc_values = []
-
-# Function to test the DPS310 sensor and return temperature and pressure
-def test_dps310():
-    dps310 = DPS310(i2c)
-    return dps310.temperature, dps310.pressure
-
-# Function to test the SHT41 sensor and return temperature and humidity measurements
-def test_sht41():
-    sht = adafruit_sht4x.SHT4x(i2c)
-    return sht.measurements
+# Create the moving average filter
+adc_values = MovingAverage(window_size)
+
+# Environmental sensors: each driver is created and configured once and read between the ADC samples
+# of mean_adc(). The DPS310 measures continuously at the rate it is read (sensor_manager.READ_INTERVAL),
+# 16 times oversampled; the mode is set last so the measurements restart with these settings
+DPS310_SETTINGS = {
+    'pressure_oversample_count': SampleCount.COUNT_16,
+    'pressure_rate': Rate.RATE_1_HZ,
+    'temperature_oversample_count': SampleCount.COUNT_16,
+    'temperature_rate': Rate.RATE_1_HZ,
+    'mode': DPS310Mode.CONT_PRESTEMP,
+}
+sensors = SensorManager([
+    ManagedSensor('dps310', lambda: DPS310(i2c), lambda dps310: (dps310.temperature, dps310.pressure),
+                  settings=DPS310_SETTINGS),
+    ManagedSensor('sht41', lambda: adafruit_sht4x.SHT4x(i2c), lambda sht: sht.measurements,
+                  settings={'mode': adafruit_sht4x.Mode.NOHEAT_HIGHPRECISION}),
+])
 
 # Function to read ADC value, apply calibration, and convert to tension and microns
 def lire_adc():
@@ -75,14 +90,10 @@ def mean_adc():
         tensions, microns = lire_adc()
         microns_values.append(microns)
         tensions_values.append(tensions)
-        time.sleep(0.08)
+        # Read the environmental sensors in the pause between samples
+        sensors.idle(0.08)
     return sum(microns_values) / len(microns_values), sum(tensions_values) / len(tensions_values)
 
-# Function to send data via radio without waiting for an acknowledgment
-def send_data_without_ack(data):
-    rfm9x.send(data)
-    print("Data sent without waiting for acknowledgement")
-
 # Function to save the mean microns value to a file
 def save_mean_microns(mean_microns):
     # Open a file in append mode
@@ -96,24 +107,19 @@ while True:
     start_time = time.monotonic()  # Get the start time
     # Get mean ADC values, temperature, and pressure from sensors
     mean_microns, mean_tensions = mean_adc()
-    temperature_dps310, pression = test_dps310()
-    temperature_sht41, humidite = test_sht41()
-
-    # Add the ADC value to the list for moving average calculation
-    adc_values.append(mean_microns)
-
-    # If enough values are collected, apply the moving average filter
-    if len(adc_values) > window_size:
-        # Remove the oldest value
-        adc_values.pop(0)
-
-        # Calculate the average of the values in the window
-        filtered_value = np.mean(adc_values)
-
-        # Prepare and send the data packet via radio
-        data = f"Filtered Microns: {filtered_value}, Mean Tensions: {mean_tensions}, DPS310 Temperature: {temperature_dps310}, Pressure: {pression}, SHT41 Temperature: {temperature_sht41}, Humidity: {humidite}"
-        send_data_without_ack(bytes(data, "UTF-8"))
-        print(f"Filtered value: {filtered_value}")
+    temperature_dps310, pression = sensors.latest('dps310', (None, None))
+    temperature_sht41, humidite = sensors.latest('sht41', (None, None))
+
+    # Add the ADC value to the moving average filter
+    filtered_value = adc_values.update(mean_microns)
+
+    # Once the window is full, use the filtered value
+    if adc_values.ready:
+        # Queue the reading, a packet goes out once BATCH_SIZE readings are collected
+        sender.add((time.time(), filtered_value, mean_tensions, temperature_dps310, pression,
+                    temperature_sht41, humidite))
+        sent = sender.service()
+        print(f"Filtered value: {filtered_value}, packets sent: {sent}, queued: {len(sender.queue)}")
         # Code to save the mean microns value is commented out
 
     end_time = time.monotonic()  # Get the end time
@@ -7,7 +7,7 @@ import board
 import busio
 import analogio
 import time
-import ulab.numpy as np
+from streaming_filters import MovingAverage
 
 # Initialize I2C communication
 i2c = busio.I2C(board.D25, board.D24)
@@ -17,8 +17,8 @@ adc = analogio.AnalogIn(board.A1)
 # Define the window size for the moving average filter
 window_size = 10
 
-# Create a list to store ADC values
-adc_values = []
+# Create the moving average filter
+adc_values = MovingAverage(window_size)
 
 # Function to read ADC value, apply calibration, and convert to voltage and microns
 def read_adc():
@@ -56,16 +56,11 @@ while True:
     # Get mean ADC values
     mean_microns, mean_voltage = mean_adc()
 
-    # Add the ADC value to the list for moving average calculation
-    adc_values.append(mean_microns)
+    # Add the ADC value to the moving average filter
+    filtered_value = adc_values.update(mean_microns)
 
-    # If enough values are collected, apply the moving average filter
-    if len(adc_values) > window_size:
-        # Remove the oldest value
-        adc_values.pop(0)
-
-        # Calculate the average of the values in the window
-        filtered_value = np.mean(adc_values)
+    # Once the window is full, use the filtered value
+    if adc_values.ready:
         
         print(f"Filtered Microns: {filtered_value}, Mean Voltage: {mean_voltage}")
         # Save the filtered value to a file
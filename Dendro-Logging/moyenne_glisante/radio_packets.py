@@ -0,0 +1,203 @@
+# Date: October 18, 2026
+# Compact binary packets for the RFM9x LoRa link. Readings are packed as fixed-point integers and
+# batched several to a packet behind a small header, instead of one long text line per reading.
+# Uses only the struct functions (CircuitPython has no struct.Struct) so it runs on the board as well
+# as on the receiving Pi.
+#
+# Packet (little endian):
+#   header   version (B), node id (B), sequence number (H), base time in epoch seconds (I), readings (B)
+#   reading  seconds after the base time (H), microns x100 (i), tension in 0.1 mV (H),
+#            DPS310 temperature x100 (h), pressure in 0.1 hPa (H), SHT41 temperature x100 (h),
+#            humidity x100 (H)
+# A missing value is sent as the lowest value of signed fields and the highest of unsigned ones.
+
+import struct
+import time
+
+VERSION = 1
+HEADER = "<BBHIB"
+READING = "<HiHhHhH"
+HEADER_SIZE = struct.calcsize(HEADER)
+READING_SIZE = struct.calcsize(READING)
+MAX_PAYLOAD = 252  # RFM9x FIFO minus the 4 byte RadioHead header
+MAX_READINGS = (MAX_PAYLOAD - HEADER_SIZE) // READING_SIZE
+
+# Name and scale of each reading field after the time delta, the value standing for "missing" and
+# the range left for real values
+FIELDS = (
+    ('microns', 100, -2 ** 31, (-2 ** 31 + 1, 2 ** 31 - 1)),
+    ('tension', 10000, 0xFFFF, (0, 0xFFFE)),
+    ('temperature_dps310', 100, -2 ** 15, (-2 ** 15 + 1, 2 ** 15 - 1)),
+    ('pressure', 10, 0xFFFF, (0, 0xFFFE)),
+    ('temperature_sht41', 100, -2 ** 15, (-2 ** 15 + 1, 2 ** 15 - 1)),
+    ('humidity', 100, 0xFFFF, (0, 0xFFFE)),
+)
+
+
+def _fixed(value, scale, missing, limits):
+    if value is None:
+        return missing
+    return max(limits[0], min(limits[1], int(round(value * scale))))
+
+
+def encode_packet(node, sequence, readings):
+    """Pack readings (tuples of epoch time followed by the FIELDS values) into one packet"""
+    if not readings:
+        raise ValueError("A packet needs at least one reading")
+    if len(readings) > MAX_READINGS:
+        raise ValueError(f"At most {MAX_READINGS} readings fit in a packet")
+    base = int(readings[0][0])
+    parts = [struct.pack(HEADER, VERSION, node, sequence & 0xFFFF, base, len(readings))]
+    for reading in readings:
+        delta = max(0, min(0xFFFF, int(reading[0]) - base))
+        values = [_fixed(value, scale, missing, limits)
+                  for value, (_, scale, missing, limits) in zip(reading[1:], FIELDS)]
+        parts.append(struct.pack(READING, delta, *values))
+    return b"".join(parts)
+
+
+def decode_packet(data):
+    """Unpack a packet into a dict with node, sequence and a list of reading dicts"""
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Packet too short")
+    version, node, sequence, base, count = struct.unpack_from(HEADER, data, 0)
+    if version != VERSION:
+        raise ValueError(f"Unsupported packet version {version}")
+    if len(data) != HEADER_SIZE + count * READING_SIZE:
+        raise ValueError(f"Packet length does not match its {count} readings")
+    readings = []
+    for index in range(count):
+        raw = struct.unpack_from(READING, data, HEADER_SIZE + index * READING_SIZE)
+        reading = {'time': base + raw[0]}
+        for value, (name, scale, missing, _) in zip(raw[1:], FIELDS):
+            reading[name] = None if value == missing else value / scale
+        readings.append(reading)
+    return {'node': node, 'sequence': sequence, 'base': base, 'readings': readings}
+
+
+class RadioSender:
+    """Batch readings into packets and send them through a queue
+
+    Packets wait in the queue until sent; with `with_ack` a packet stays queued until the receiver
+    acknowledges it, and is dropped after `retries` failed attempts. When the queue is full the oldest
+    packet is dropped.
+    """
+
+    def __init__(self, rfm9x, node, batch_size=8, with_ack=False, retries=3, max_queue=32):
+        self.rfm9x = rfm9x
+        self.node = node
+        self.batch_size = max(1, min(batch_size, MAX_READINGS))
+        self.with_ack = with_ack
+        self.retries = retries
+        self.max_queue = max_queue
+        self.sequence = 0
+        self.batch = []
+        self.queue = []  # [packet, attempts]
+        self.stats = {'readings': 0, 'packets': 0, 'sent': 0, 'bytes': 0, 'retries': 0, 'dropped': 0}
+
+    def add(self, reading):
+        """Queue one reading (epoch time, microns, tension, DPS310 temperature, pressure,
+        SHT41 temperature, humidity); a packet is built once the batch is full"""
+        self.batch.append(reading)
+        self.stats['readings'] += 1
+        if len(self.batch) >= self.batch_size:
+            self.flush_batch()
+
+    def flush_batch(self):
+        """Turn the readings collected so far into a queued packet"""
+        if not self.batch:
+            return
+        packet = encode_packet(self.node, self.sequence, self.batch)
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        self.batch = []
+        self.stats['packets'] += 1
+        if len(self.queue) >= self.max_queue:
+            self.queue.pop(0)
+            self.stats['dropped'] += 1
+        self.queue.append([packet, 0])
+
+    def service(self, max_packets=None):
+        """Send queued packets, oldest first; stop at the first unacknowledged one"""
+        sent = 0
+        while self.queue and (max_packets is None or sent < max_packets):
+            entry = self.queue[0]
+            packet = entry[0]
+            if self.with_ack:
+                ok = self.rfm9x.send_with_ack(packet)
+            else:
+                self.rfm9x.send(packet)
+                ok = True
+            entry[1] += 1
+            if ok:
+                self.queue.pop(0)
+                self.stats['sent'] += 1
+                self.stats['bytes'] += len(packet)
+                sent += 1
+                continue
+            self.stats['retries'] += 1
+            if entry[1] > self.retries:
+                self.queue.pop(0)
+                self.stats['dropped'] += 1
+                continue
+            break  # Leave it for the next cycle
+        return sent
+
+
+class SequenceTracker:
+    """Receiver side bookkeeping: drop resent duplicates and count the packets that never arrived
+
+    A resent packet repeats both the sequence number and the base time of the original. A node that
+    reboots starts its sequence again at 0 with new base times, so its packets are not taken for
+    duplicates, and a sequence going back by more than the history counts as a restart.
+    """
+
+    def __init__(self, history=64):
+        self.history = history
+        self.recent = {}  # node -> list of recent (sequence number, base time)
+        self.expected = {}  # node -> next sequence number
+        self.duplicates = 0
+        self.missed = 0
+        self.restarts = 0
+
+    def accept(self, packet):
+        """True for a packet seen for the first time"""
+        node, sequence = packet['node'], packet['sequence']
+        key = (sequence, packet.get('base'))
+        recent = self.recent.setdefault(node, [])
+        if key in recent:
+            self.duplicates += 1
+            return False
+        expected = self.expected.get(node)
+        if expected is not None:
+            gap = (sequence - expected) & 0xFFFF
+            if gap < 0x8000:
+                self.missed += gap
+            elif 0x10000 - gap > self.history:
+                self.restarts += 1
+                recent.clear()
+        self.expected[node] = (sequence + 1) & 0xFFFF
+        recent.append(key)
+        if len(recent) > self.history:
+            recent.pop(0)
+        return True
+
+
+def receive(rfm9x, timeout=1.0):
+    """Wait for one packet and decode it, None on timeout or when it is not a valid packet"""
+    data = rfm9x.receive(timeout=timeout)
+    if data is None:
+        return None
+    try:
+        packet = decode_packet(bytes(data))
+    except ValueError as e:
+        print(f"Undecodable packet: {e}")
+        return None
+    packet['rssi'] = getattr(rfm9x, 'last_rssi', None)
+    return packet
+
+
+def format_reading(node, reading):
+    stamp = time.localtime(reading['time'])
+    values = ", ".join(f"{field[0]}={reading[field[0]]}" for field in FIELDS)
+    return (f"{stamp[0]:04d}-{stamp[1]:02d}-{stamp[2]:02d} {stamp[3]:02d}:{stamp[4]:02d}:{stamp[5]:02d} "
+            f"node {node}: {values}")
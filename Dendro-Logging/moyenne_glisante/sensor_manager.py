@@ -0,0 +1,110 @@
+# Date: October 18, 2026
+# Long-lived environmental sensor drivers (DPS310, SHT41, ...) read in the idle time of the dendrometer
+# sampling. Each driver is created and configured once; a failing sensor is recreated later with a
+# growing back-off, so it never holds up the dendrometer channel. Plain Python so it runs on CircuitPython.
+#
+#   sensors = SensorManager([
+#       ManagedSensor('dps310', lambda: DPS310(i2c), lambda d: (d.temperature, d.pressure)),
+#   ])
+#   sensors.idle(0.08)  # instead of time.sleep(0.08) between ADC samples
+#   temperature, pressure = sensors.latest('dps310', (None, None))
+
+import time
+
+READ_INTERVAL = 1.0  # Seconds between two readings of a sensor
+MAX_AGE = 30.0  # Seconds after which a reading is considered stale
+RETRY_DELAY = 2.0  # First delay before recreating a failed driver
+MAX_RETRY_DELAY = 120.0
+
+
+class ManagedSensor:
+    """One sensor driver, created lazily, configured with `settings` and read every `interval` seconds"""
+
+    def __init__(self, name, factory, read, settings=None, interval=READ_INTERVAL, max_age=MAX_AGE):
+        self.name = name
+        self.factory = factory
+        self.read = read
+        self.settings = settings or {}
+        self.interval = interval
+        self.max_age = max_age
+        self.driver = None
+        self.value = None
+        self.updated = None  # time.monotonic() of the last good reading
+        self.next_due = 0.0
+        self.retry_delay = RETRY_DELAY
+        self.stats = {'reads': 0, 'errors': 0, 'creates': 0}
+
+    def _create(self):
+        driver = self.factory()
+        for attribute, value in self.settings.items():
+            setattr(driver, attribute, value)
+        self.stats['creates'] += 1
+        return driver
+
+    def due(self, now):
+        return now >= self.next_due
+
+    def poll(self, now=None):
+        """Read the sensor if it is due; returns True when the bus was used"""
+        now = time.monotonic() if now is None else now
+        if not self.due(now):
+            return False
+        try:
+            if self.driver is None:
+                self.driver = self._create()
+            self.value = self.read(self.driver)
+        except Exception as e:
+            # Drop the driver and try again later, waiting longer after each failure
+            print(f"{self.name} error: {e}")
+            self.stats['errors'] += 1
+            self.driver = None
+            self.next_due = now + self.retry_delay
+            self.retry_delay = min(self.retry_delay * 2, MAX_RETRY_DELAY)
+            return True
+        self.stats['reads'] += 1
+        self.updated = now
+        self.retry_delay = RETRY_DELAY
+        self.next_due = now + self.interval
+        return True
+
+    def latest(self, default=None, now=None):
+        """Last good reading, or `default` if there is none younger than max_age"""
+        now = time.monotonic() if now is None else now
+        if self.updated is None or now - self.updated > self.max_age:
+            return default
+        return self.value
+
+
+class SensorManager:
+    """Round-robin polling of several ManagedSensor, at most one sensor per call"""
+
+    def __init__(self, sensors):
+        self.sensors = list(sensors)
+        self.by_name = {sensor.name: sensor for sensor in self.sensors}
+        self.next_index = 0
+
+    def poll(self, now=None):
+        """Read the next due sensor, if any; returns True when the bus was used"""
+        now = time.monotonic() if now is None else now
+        for offset in range(len(self.sensors)):
+            index = (self.next_index + offset) % len(self.sensors)
+            if self.sensors[index].due(now):
+                self.next_index = index + 1
+                return self.sensors[index].poll(now)
+        return False
+
+    def idle(self, seconds):
+        """Spend `seconds` reading due sensors, sleeping for whatever time is left"""
+        deadline = time.monotonic() + seconds
+        while self.poll():
+            if time.monotonic() >= deadline:
+                return
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def latest(self, name, default=None):
+        return self.by_name[name].latest(default)
+
+    def stats(self):
+        return {sensor.name: sensor.stats for sensor in self.sensors}
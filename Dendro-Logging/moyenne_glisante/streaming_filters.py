@@ -0,0 +1,258 @@
+# Date: October 18, 2026
+# Streaming filters built on fixed-size ring buffers, shared by the Pi scripts and the CircuitPython boards.
+# Each filter is updated one value at a time; the moving average and the EMA cost the same per update
+# whatever the window size; the running median and the Hampel filter keep a sorted copy of the window,
+# found by binary search but shifted on insertion, so their updates grow linearly with the window. Only
+# plain Python is used so the module also runs under CircuitPython (which has no math.fsum).
+
+import math
+
+# Scale factor turning a median absolute deviation into a standard deviation estimate for normal data
+MAD_SCALE = 1.4826
+# Exactly rounded sum where available; CircuitPython only has the built-in sum
+_fsum = getattr(math, 'fsum', sum)
+
+
+class RingBuffer:
+    """Fixed-size circular buffer of floats"""
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("Ring buffer size must be at least 1")
+        self.size = size
+        self.data = [0.0] * size
+        self.index = 0  # Next slot to write
+        self.count = 0
+
+    def push(self, value):
+        """Store a value and return the value it evicted, or None while the buffer is filling"""
+        evicted = self.data[self.index] if self.count == self.size else None
+        self.data[self.index] = value
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+        return evicted
+
+    def values(self):
+        """Return the stored values, oldest first"""
+        if self.count < self.size:
+            return self.data[:self.count]
+        return self.data[self.index:] + self.data[:self.index]
+
+    @property
+    def full(self):
+        return self.count == self.size
+
+    def reset(self):
+        self.index = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+
+class MovingAverage:
+    """Moving average over the last `window` values using a running sum"""
+
+    def __init__(self, window):
+        self.buffer = RingBuffer(window)
+        self.total = 0.0
+        self.value = None
+
+    def update(self, x):
+        evicted = self.buffer.push(x)
+        self.total += x
+        if evicted is not None:
+            self.total -= evicted
+        # Recompute the sum once per lap of the buffer so floating point error cannot accumulate
+        if self.buffer.index == 0:
+            self.total = _fsum(self.buffer.data[:self.buffer.count])
+        self.value = self.total / self.buffer.count
+        return self.value
+
+    @property
+    def ready(self):
+        return self.buffer.full
+
+    def reset(self):
+        self.buffer.reset()
+        self.total = 0.0
+        self.value = None
+
+
+class ExponentialMovingAverage:
+    """Exponential moving average, seeded with the first value"""
+
+    def __init__(self, alpha=None, span=None):
+        if alpha is None:
+            if span is None:
+                raise ValueError("Give either alpha or span")
+            alpha = 2.0 / (span + 1.0)
+        if not (0.0 < alpha <= 1.0):
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.value = None
+        self.count = 0
+
+    def update(self, x):
+        if self.value is None:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        self.count += 1
+        return self.value
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def reset(self):
+        self.value = None
+        self.count = 0
+
+
+def _bisect_left(values, x):
+    """Index of the first element of the sorted list not less than x"""
+    lo, hi = 0, len(values)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if values[mid] < x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class RunningMedian:
+    """Median of the last `window` values, kept in a sorted copy of the ring buffer
+
+    The position of a value is found by binary search, but the list insertion and deletion shift the
+    elements after it, so an update costs O(window).
+    """
+
+    def __init__(self, window):
+        self.buffer = RingBuffer(window)
+        self.sorted = []
+        self.value = None
+
+    def update(self, x):
+        evicted = self.buffer.push(x)
+        if evicted is not None:
+            del self.sorted[_bisect_left(self.sorted, evicted)]
+        self.sorted.insert(_bisect_left(self.sorted, x), x)
+        self.value = self.median()
+        return self.value
+
+    def median(self):
+        n = len(self.sorted)
+        if n == 0:
+            return None
+        mid = n // 2
+        if n % 2:
+            return self.sorted[mid]
+        return (self.sorted[mid - 1] + self.sorted[mid]) / 2.0
+
+    def median_absolute_deviation(self):
+        """Median of |x - median| over the window, found without building the deviations"""
+        n = len(self.sorted)
+        if n == 0:
+            return None
+        med = self.median()
+        split = _bisect_left(self.sorted, med)
+        mid = n // 2
+        if n % 2:
+            return self._kth_deviation(med, split, mid)
+        return (self._kth_deviation(med, split, mid - 1) + self._kth_deviation(med, split, mid)) / 2.0
+
+    def _kth_deviation(self, med, split, k):
+        """k-th smallest (0-based) absolute deviation from med
+
+        Deviations below the split grow leftwards and deviations above it grow rightwards, so this is
+        the k-th element of two merged sorted sequences, found by binary search on the left count.
+        """
+        values = self.sorted
+        n_left = split
+        n_right = len(values) - split
+        # Take i deviations from the left side and k + 1 - i from the right side
+        lo = max(0, k + 1 - n_right)
+        hi = min(k + 1, n_left)
+        while lo < hi:
+            i = (lo + hi) // 2
+            j = k + 1 - i
+            left_next = med - values[split - i - 1]  # (i + 1)-th smallest left deviation
+            right_last = values[split + j - 1] - med  # j-th smallest right deviation
+            if left_next < right_last:
+                lo = i + 1
+            else:
+                hi = i
+        i = lo
+        j = k + 1 - i
+        left_last = med - values[split - i] if i > 0 else -1.0
+        right_last = values[split + j - 1] - med if j > 0 else -1.0
+        return max(left_last, right_last)
+
+    @property
+    def ready(self):
+        return self.buffer.full
+
+    def reset(self):
+        self.buffer.reset()
+        self.sorted = []
+        self.value = None
+
+
+class HampelFilter:
+    """Replace values further than n_sigmas scaled MADs from the window median by the median"""
+
+    def __init__(self, window, n_sigmas=3.0):
+        self.median = RunningMedian(window)
+        self.n_sigmas = n_sigmas
+        self.value = None
+        self.outliers = 0
+
+    def update(self, x):
+        med = self.median.update(x)
+        threshold = self.n_sigmas * MAD_SCALE * self.median.median_absolute_deviation()
+        if self.median.buffer.count > 2 and abs(x - med) > threshold:
+            self.outliers += 1
+            self.value = med
+        else:
+            self.value = x
+        return self.value
+
+    @property
+    def ready(self):
+        return self.median.ready
+
+    def reset(self):
+        self.median.reset()
+        self.value = None
+        self.outliers = 0
+
+
+class FilterChain:
+    """Apply several filters one after the other"""
+
+    def __init__(self, *filters):
+        self.filters = filters
+        self.value = None
+
+    def update(self, x):
+        for stage in self.filters:
+            x = stage.update(x)
+        self.value = x
+        return x
+
+    @property
+    def ready(self):
+        return all(stage.ready for stage in self.filters)
+
+    def reset(self):
+        for stage in self.filters:
+            stage.reset()
+        self.value = None
+
+
+def channel_filters(channels, factory):
+    """Create an independent filter for each channel, e.g. channel_filters(range(4), lambda: MovingAverage(10))"""
+    return {chan: factory() for chan in channels}
@@ -0,0 +1,138 @@
+import time
+from abc import ABC, abstractmethod
+
+MAIN_SIZE = (2592, 1944)
+LORES_SIZE = (640, 480)
+WARMUP = 2.0  # Seconds for exposure and white balance to settle after the camera is opened
+RESUME_SETTLE = 0.5  # Shorter settle when restarting an already configured camera
+
+
+class CameraBackend(ABC):
+    """Interface of the cameras used by the camera service
+
+    open() configures the camera once and waits for it to settle; pause() and resume() stop and restart
+    streaming between distant frames without configuring again.
+    """
+
+    @abstractmethod
+    def open(self):
+        """Configure the camera and wait for it to settle"""
+
+    @abstractmethod
+    def capture(self, path):
+        """Save a full resolution JPEG to the absolute `path`"""
+
+    @abstractmethod
+    def capture_lores(self):
+        """Return the low resolution stream frame as an array (height x width x channels)"""
+
+    def pause(self):
+        pass
+
+    def resume(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Picamera2Backend(CameraBackend):
+    """Raspberry Pi camera through picamera2, configured once for stills with a low resolution stream"""
+
+    def __init__(self, main_size=MAIN_SIZE, lores_size=LORES_SIZE, warmup=WARMUP, resume_settle=RESUME_SETTLE):
+        self.main_size = main_size
+        self.lores_size = lores_size
+        self.warmup = warmup
+        self.resume_settle = resume_settle
+        self.camera = None
+        self.running = False
+
+    def open(self):
+        from picamera2 import Picamera2, Preview
+
+        self.camera = Picamera2()
+        camera_config = self.camera.create_still_configuration(main={"size": self.main_size},
+                                                               lores={"size": self.lores_size}, display="lores")
+        self.camera.configure(camera_config)
+        self.camera.start_preview(Preview.NULL)
+        self.camera.start()
+        self.running = True
+        time.sleep(self.warmup)
+
+    def capture(self, path):
+        self.resume()
+        self.camera.capture_file(path)
+
+    def capture_lores(self):
+        self.resume()
+        return self.camera.capture_array("lores")
+
+    def pause(self):
+        if self.running:
+            self.camera.stop()
+            self.running = False
+
+    def resume(self):
+        if not self.running:
+            self.camera.start()
+            self.running = True
+            time.sleep(self.resume_settle)
+
+    def close(self):
+        if self.camera is not None:
+            self.camera.close()
+            self.camera = None
+            self.running = False
+
+
+class StubCamera(CameraBackend):
+    """Camera stand-in for tests and benchmarks: writes placeholder JPEGs after a simulated delay"""
+
+    def __init__(self, capture_time=0.0, warmup=0.0, size=64 * 1024, lores_size=LORES_SIZE):
+        self.capture_time = capture_time
+        self.warmup = warmup
+        self.size = size
+        self.lores_size = lores_size
+        self.opened = 0
+        self.captures = 0
+        self.pauses = 0
+        self.resumes = 0
+        self.running = False
+        self.frame = None  # Array returned by capture_lores, a flat grey image unless set
+
+    def open(self):
+        self.opened += 1
+        self.running = True
+        time.sleep(self.warmup)
+
+    def capture(self, path):
+        if not self.running:
+            self.resume()
+        time.sleep(self.capture_time)
+        # Start and end of image markers around filler, enough for file handling code
+        with open(path, 'wb') as f:
+            f.write(b"\xff\xd8" + b"\0" * max(self.size - 4, 0) + b"\xff\xd9")
+        self.captures += 1
+
+    def capture_lores(self):
+        import numpy as np
+
+        if not self.running:
+            self.resume()
+        if self.frame is None:
+            width, height = self.lores_size
+            return np.full((height, width, 3), 128, dtype=np.uint8)
+        return self.frame
+
+    def pause(self):
+        if self.running:
+            self.running = False
+            self.pauses += 1
+
+    def resume(self):
+        if not self.running:
+            self.running = True
+            self.resumes += 1
+
+    def close(self):
+        self.running = False
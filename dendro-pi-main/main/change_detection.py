@@ -0,0 +1,89 @@
+import numpy as np
+
+from camera_backends import LORES_SIZE
+
+GRID = (24, 32)  # Rows and columns of the block means compared between frames
+THRESHOLD = 4.0  # Mean absolute difference of the block means, in grey levels, or differing hash bits
+MAX_INTERVAL = 24 * 3600.0  # Store a picture at least this often, changed or not
+
+
+def luma(frame, height=LORES_SIZE[1]):
+    """Grey image from a lores frame: the Y plane of YUV420 (height * 3/2 x width) or the mean of RGB(A)"""
+    frame = np.asarray(frame)
+    if frame.ndim == 3:
+        return frame[..., :3].mean(axis=2, dtype=np.float32)
+    # picamera2 returns YUV420 lores frames as one plane, Y on top of the subsampled U and V
+    return frame[:height].astype(np.float32)
+
+
+def block_means(grey, grid=GRID):
+    """Average of each block of a grid over the image, cropping the edges that do not fill a block"""
+    rows, columns = grid
+    height, width = grey.shape[0] // rows * rows, grey.shape[1] // columns * columns
+    blocks = grey[:height, :width].reshape(rows, height // rows, columns, width // columns)
+    return blocks.mean(axis=(1, 3))
+
+
+def difference(reference, blocks):
+    """Mean absolute difference of two block mean grids, after matching their overall brightness
+
+    Exposure changes between hours move every block together, so the median offset is removed first.
+    """
+    delta = blocks - reference
+    return float(np.abs(delta - np.median(delta)).mean())
+
+
+def difference_hash(blocks):
+    """Perceptual hash: one bit per horizontally adjacent pair of blocks, set where brightness increases"""
+    return blocks[:, 1:] > blocks[:, :-1]
+
+
+def hash_distance(reference, bits):
+    return int(np.count_nonzero(reference != bits))
+
+
+class ChangeDetector:
+    """Decide from the lores frame whether a full resolution picture is worth storing
+
+    The frame is compared with the one of the last stored picture, not the last one seen, so slow drifts
+    add up until they pass the threshold.
+    """
+
+    def __init__(self, threshold=THRESHOLD, max_interval=MAX_INTERVAL, method='difference', grid=GRID,
+                 height=LORES_SIZE[1]):
+        if method not in ('difference', 'hash'):
+            raise ValueError(f"Unknown change detection method {method!r}")
+        self.threshold = threshold
+        self.max_interval = max_interval
+        self.method = method
+        self.grid = grid
+        self.height = height
+        self.reference = None
+        self.stored_at = None
+        self.last_score = None
+        self.stats = {'checked': 0, 'stored': 0, 'skipped': 0}
+
+    def signature(self, frame):
+        blocks = block_means(luma(frame, self.height), self.grid)
+        return difference_hash(blocks) if self.method == 'hash' else blocks
+
+    def score(self, signature):
+        if self.method == 'hash':
+            return hash_distance(self.reference, signature)
+        return difference(self.reference, signature)
+
+    def changed(self, frame, when):
+        """True if the picture at datetime `when` should be stored; the frame becomes the new reference"""
+        signature = self.signature(frame)
+        self.stats['checked'] += 1
+        if self.reference is None or (when - self.stored_at).total_seconds() >= self.max_interval:
+            self.last_score = None
+        else:
+            self.last_score = self.score(signature)
+            if self.last_score < self.threshold:
+                self.stats['skipped'] += 1
+                return False
+        self.reference = signature
+        self.stored_at = when
+        self.stats['stored'] += 1
+        return True
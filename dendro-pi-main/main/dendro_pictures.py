@@ -1,37 +1,213 @@
+import argparse
 import os
-
-from picamera2 import Picamera2, Preview
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from camera_backends import Picamera2Backend, StubCamera
+from change_detection import ChangeDetector
+from picture_pipeline import PicturePipeline, picture_stem, unique_path
 
 PICTURES_PATH = r"/home/madlab/dendro-pi-main/pictures/"
 CAMERA_NAME = "DorvalTest"  # Edit this to change name picture file
+IDLE_PAUSE = 120.0  # Stop the camera stream when the next frame is more than this many seconds away
+MAX_SLEEP = 60.0  # Longest single sleep, so wall clock changes are noticed
+
+def get_filename(when=None):
+    """Sortable name to the second, e.g. DorvalTest_20250222-150000"""
+    return picture_stem(CAMERA_NAME, when or datetime.now())
+
+def take_picture(backend=None, directory=PICTURES_PATH, pipeline=None):
+    """Open the camera, take one picture and close it again (one-shot use from cron)"""
+    backend = backend or Picamera2Backend()
+    directory = os.path.abspath(directory)
+    os.makedirs(directory, exist_ok=True)
+    backend.open()
+    try:
+        when = datetime.now()
+        path = unique_path(directory, get_filename(when))
+        backend.capture(path)
+    finally:
+        backend.close()
+    if pipeline is not None:
+        pipeline.submit(path, when)
+    return path
+
+
+def parse_duration(text):
+    """'90', '90s', '15m' or '3h' to seconds"""
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    if text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+def parse_hours(text):
+    """'6-22' to (6, 22): frames are taken from 6:00 until 22:00, not included"""
+    start, end = (int(v) for v in text.split('-', 1))
+    if not 0 <= start < end <= 24:
+        raise ValueError(f"Invalid hour range {text!r}")
+    return start, end
+
+def parse_burst(text):
+    """'3x2s' to (3, 2.0): three frames two seconds apart"""
+    count, _, spacing = text.partition('x')
+    return int(count), parse_duration(spacing) if spacing else 0.0
+
+
+class TimelapseSchedule:
+    """Frames every `every` seconds from start_hour, until end_hour
+
+    Each frame can be a burst of `burst` pictures `burst_spacing` seconds apart.
+    """
+
+    def __init__(self, every=3600.0, start_hour=0, end_hour=24, burst=1, burst_spacing=0.0):
+        if every <= 0:
+            raise ValueError("The time-lapse interval must be positive")
+        self.every = every
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.burst = burst
+        self.burst_spacing = burst_spacing
+
+    def next_after(self, when):
+        """First scheduled frame strictly after the datetime `when`"""
+        midnight = when.replace(hour=0, minute=0, second=0, microsecond=0)
+        elapsed = (when - midnight).total_seconds()
+        start = self.start_hour * 3600.0
+        end = self.end_hour * 3600.0
+        # Slots are start + k * every within the active hours
+        k = (elapsed - start) // self.every + 1 if elapsed >= start else 0
+        slot = start + k * self.every
+        if slot >= end:
+            return midnight + timedelta(days=1, seconds=start)
+        return midnight + timedelta(seconds=slot)
+
+
+class CameraService:
+    """Resident time-lapse: the camera is opened once and frames are taken on the schedule"""
+
+    def __init__(self, backend, schedule, directory=PICTURES_PATH, name=CAMERA_NAME, idle_pause=IDLE_PAUSE,
+                 now=datetime.now, sleep=time.sleep, pipeline=None, detector=None):
+        self.backend = backend
+        self.schedule = schedule
+        self.directory = os.path.abspath(directory)
+        self.name = name
+        self.idle_pause = idle_pause
+        self.now = now
+        self.sleep = sleep
+        self.pipeline = pipeline  # PicturePipeline receiving every picture after capture, or None
+        self.detector = detector  # ChangeDetector to skip frames where the scene did not change, or None
+        self.stats = {'frames': 0, 'capture_time': 0.0, 'late': 0.0, 'bytes': 0, 'skipped': 0, 'check_time': 0.0}
+
+    def filename(self, when, index=0):
+        stem = picture_stem(self.name, when, index if self.schedule.burst > 1 else None)
+        return unique_path(self.directory, stem)
+
+    def scene_changed(self, when):
+        """Compare the lores frame with the last stored one; always True without a detector"""
+        if self.detector is None:
+            return True
+        start = time.monotonic()
+        changed = self.detector.changed(self.backend.capture_lores(), when)
+        self.stats['check_time'] += time.monotonic() - start
+        if not changed:
+            self.stats['skipped'] += self.schedule.burst
+        return changed
 
-def get_filename():
-    return CAMERA_NAME + get_date_and_time()
+    def savings(self):
+        """Storage and capture time not spent on skipped pictures, estimated from the stored ones"""
+        frames = self.stats['frames']
+        skipped = self.stats['skipped']
+        average_size = self.stats['bytes'] / frames if frames else 0
+        average_capture = self.stats['capture_time'] / frames if frames else 0.0
+        return {
+            'stored': frames,
+            'skipped': skipped,
+            'bytes_saved': int(skipped * average_size),
+            'capture_time_saved': skipped * average_capture - self.stats['check_time'],
+        }
 
-def get_date_and_time():
-    return str(datetime.now().year) + "-" + \
-        str(datetime.now().month) + "-" + \
-        str(datetime.now().day) + "-" + \
-        str(datetime.now().hour)
+    def shoot(self, when):
+        """Take the burst of one scheduled frame, return the paths written"""
+        paths = []
+        if not self.scene_changed(when):
+            return paths
+        for index in range(self.schedule.burst):
+            if index:
+                self.sleep(self.schedule.burst_spacing)
+            path = self.filename(when, index)
+            start = time.monotonic()
+            self.backend.capture(path)
+            self.stats['capture_time'] += time.monotonic() - start
+            self.stats['frames'] += 1
+            self.stats['bytes'] += os.path.getsize(path)
+            if self.pipeline is not None:
+                self.pipeline.submit(path, when + timedelta(seconds=index * self.schedule.burst_spacing))
+            paths.append(path)
+        return paths
 
-def take_picture():
-    picam2 = Picamera2()
-    camera_config = picam2.create_still_configuration(main={"size": (2592, 1944)}, lores={"size": (640, 480)}, display="lores")
+    def wait_until(self, target):
+        while True:
+            remaining = (target - self.now()).total_seconds()
+            if remaining <= 0:
+                return -remaining
+            self.sleep(min(remaining, MAX_SLEEP))
 
-    picam2.configure(camera_config)
+    def run(self, frames=None):
+        """Take frames until stopped, or until `frames` scheduled frames were taken"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.backend.open()
+        taken = 0
+        try:
+            while frames is None or taken < frames:
+                target = self.schedule.next_after(self.now())
+                if (target - self.now()).total_seconds() > self.idle_pause:
+                    self.backend.pause()
+                self.stats['late'] = max(self.stats['late'], self.wait_until(target))
+                paths = self.shoot(target)
+                for path in paths:
+                    print(f"Saved {path}", flush=True)
+                if not paths:
+                    print(f"Skipped {target:%Y-%m-%d %H:%M}, change {self.detector.last_score:.2f}", flush=True)
+                taken += 1
+        finally:
+            self.backend.close()
+            if self.detector is not None:
+                print(f"Change detection savings: {self.savings()}", flush=True)
 
-    picam2.start_preview(Preview.NULL)
-    picam2.start()
-    time.sleep(2)
-    file_name = get_filename()
 
-    # Capture the file
-    os.chdir(PICTURES_PATH)
-    picam2.capture_file(file_name + ".jpeg")
+def main():
+    parser = argparse.ArgumentParser(description="Take dendrometer pictures, once or as a resident time-lapse")
+    parser.add_argument('--service', action='store_true', help="Keep the camera open and follow the schedule")
+    parser.add_argument('--every', default="1h", help="Time-lapse interval, e.g. 15m or 3h (default 1h)")
+    parser.add_argument('--hours', default="0-24", help="Active hours, e.g. 6-22 (default all day)")
+    parser.add_argument('--burst', default="1", help="Pictures per frame and their spacing, e.g. 3x2s")
+    parser.add_argument('--directory', default=PICTURES_PATH, help="Where pictures are saved")
+    parser.add_argument('--stub', action='store_true', help="Use the stub camera instead of picamera2")
+    parser.add_argument('--change-threshold', type=float,
+                        help="Only store frames whose lores image changed this much (grey levels, or bits with --hash)")
+    parser.add_argument('--hash', action='store_true', help="Compare frames by perceptual hash")
+    parser.add_argument('--max-interval', default="24h", help="Store a frame at least this often (default 24h)")
+    parser.add_argument('--no-pipeline', action='store_true', help="Skip thumbnails, reduced copies and indexing")
+    args = parser.parse_args()
 
-    picam2.close()
+    backend = StubCamera() if args.stub else Picamera2Backend()
+    pipeline = None if args.no_pipeline else PicturePipeline(args.directory)
+    if pipeline is not None:
+        pipeline.start()  # Before the camera is opened
+    try:
+        if not args.service:
+            print(f"Saved {take_picture(backend, args.directory, pipeline)}")
+            return
+        burst, spacing = parse_burst(args.burst)
+        schedule = TimelapseSchedule(parse_duration(args.every), *parse_hours(args.hours), burst, spacing)
+        detector = None
+        if args.change_threshold is not None:
+            detector = ChangeDetector(args.change_threshold, parse_duration(args.max_interval),
+                                      'hash' if args.hash else 'difference')
+        CameraService(backend, schedule, args.directory, pipeline=pipeline, detector=detector).run()
+    finally:
+        if pipeline is not None:
+            pipeline.close()
 
 
 # def setup_camera(camera):
@@ -41,4 +217,7 @@ def take_picture():
 
 
 if __name__ == '__main__':
-    take_picture()
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nCamera service stopped by user")
@@ -0,0 +1,254 @@
+import argparse
+import multiprocessing
+import os
+import re
+import time
+from datetime import datetime
+
+THUMBNAIL_SIZE = (320, 240)
+REDUCED_SIZE = (1296, 972)
+REDUCED_QUALITY = 80
+ORIGINAL_QUALITY = None  # Recompress the full resolution pictures at this JPEG quality, None keeps them as-is
+# Thumbnails, reduced copies and the index are kept next to the pictures directory, not in it: the Dropbox
+# upload sends the pictures and deletes them, the derived copies stay on the Pi for browsing
+DERIVED_DIR = "pictures_derived"
+THUMBNAIL_DIR = "thumbnails"
+REDUCED_DIR = "reduced"
+INDEX_NAME = ".picture_index"
+NAME_WIDTH = 96
+TIME_FORMAT = "%Y%m%d-%H%M%S"
+# Time in a picture name, before the burst index and the collision counter added by unique_path
+PICTURE_TIME = re.compile(r"_(\d{8}-\d{6})(?:-\d{2})?(?:_\d+)?\.jpeg$")
+
+
+def derived_directory(directory):
+    """Directory of the copies and index derived from the pictures in `directory`, beside it"""
+    return os.path.join(os.path.dirname(os.path.abspath(directory)), DERIVED_DIR)
+
+
+def picture_stem(camera_name, when, index=None):
+    """Sortable picture name without extension: DorvalTest_20250222-150000 (-01 for a burst)"""
+    stem = camera_name + "_" + when.strftime(TIME_FORMAT)
+    if index is not None:
+        stem += f"-{index:02d}"
+    return stem
+
+
+def unique_path(directory, stem, extension=".jpeg"):
+    """Absolute path for a new picture, with a counter added if the name is already taken"""
+    path = os.path.join(directory, stem + extension)
+    counter = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{stem}_{counter}{extension}")
+        counter += 1
+    return path
+
+
+class PictureIndex:
+    """Fixed-width text records "<epoch seconds> <file name>", sorted by time
+
+    Every record has the same length, so a time range is found by binary search with seeks instead of
+    listing the pictures directory.
+    """
+
+    RECORD = 18 + 1 + NAME_WIDTH + 1  # Time, space, padded name, newline
+
+    def __init__(self, path):
+        self.path = path
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self.path) // self.RECORD
+        except OSError:
+            return 0
+
+    def _record(self, timestamp, name):
+        if len(name) > NAME_WIDTH:
+            raise ValueError(f"Picture name longer than {NAME_WIDTH} characters: {name}")
+        return f"{timestamp:018.3f} {name:<{NAME_WIDTH}}\n".encode()
+
+    def _read(self, f, position):
+        f.seek(position * self.RECORD)
+        record = f.read(self.RECORD)
+        return float(record[:18]), record[19:19 + NAME_WIDTH].decode().rstrip()
+
+    def append(self, timestamp, name):
+        """Add a picture; an out of order timestamp (clock change) is inserted at its place"""
+        count = len(self)
+        with open(self.path, 'ab+') as f:
+            if count and self._read(f, count - 1)[0] > timestamp:
+                entries = [self._read(f, i) for i in range(count)] + [(timestamp, name)]
+                entries.sort()
+                f.seek(0)
+                f.truncate()
+                f.write(b"".join(self._record(t, n) for t, n in entries))
+            else:
+                f.write(self._record(timestamp, name))
+
+    def _bisect(self, f, count, timestamp):
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self._read(f, middle)[0] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, start=None, end=None):
+        """(epoch seconds, name) of the pictures taken from `start` up to, not including, `end`"""
+        count = len(self)
+        if count == 0:
+            return []
+        with open(self.path, 'rb') as f:
+            first = 0 if start is None else self._bisect(f, count, start)
+            last = count if end is None else self._bisect(f, count, end)
+            return [self._read(f, i) for i in range(first, last)]
+
+
+def _resize(image, size, path, quality):
+    from PIL import Image
+
+    copy = image.copy()
+    copy.thumbnail(size, Image.LANCZOS if hasattr(Image, 'LANCZOS') else Image.ANTIALIAS)
+    copy.save(path, "JPEG", quality=quality, optimize=True)
+
+
+def process_picture(path, directory, settings):
+    """Make the thumbnail and reduced copy of one picture under `directory`, recompressing it if configured"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return False  # Pillow missing: the picture is still indexed
+    name = os.path.basename(path)
+    with Image.open(path) as image:
+        # Decode at a fraction of the resolution when that is enough for the largest copy
+        if settings['original_quality'] is None:
+            image.draft('RGB', settings['reduced_size'])
+        image.load()
+        _resize(image, settings['thumbnail_size'], os.path.join(directory, THUMBNAIL_DIR, name), 75)
+        _resize(image, settings['reduced_size'], os.path.join(directory, REDUCED_DIR, name),
+                settings['reduced_quality'])
+        if settings['original_quality'] is not None:
+            temporary = path + ".tmp"
+            image.save(temporary, "JPEG", quality=settings['original_quality'], optimize=True)
+            os.replace(temporary, path)
+    return True
+
+
+def worker(jobs, directory, settings):
+    """Worker process: derive copies into `directory` and index every picture put on the `jobs` queue"""
+    index = PictureIndex(os.path.join(directory, INDEX_NAME))
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        path, timestamp = job
+        try:
+            process_picture(path, directory, settings)
+        except Exception as e:
+            print(f"Processing {path} failed: {e}", flush=True)
+        index.append(timestamp, os.path.basename(path))
+
+
+class PicturePipeline:
+    """Post-capture processing in a separate process, so capturing never waits for it"""
+
+    def __init__(self, directory, thumbnail_size=THUMBNAIL_SIZE, reduced_size=REDUCED_SIZE,
+                 reduced_quality=REDUCED_QUALITY, original_quality=ORIGINAL_QUALITY, derived=None):
+        self.directory = os.path.abspath(directory)
+        self.derived = os.path.abspath(derived) if derived else derived_directory(directory)
+        self.settings = {
+            'thumbnail_size': thumbnail_size,
+            'reduced_size': reduced_size,
+            'reduced_quality': reduced_quality,
+            'original_quality': original_quality,
+        }
+        # Spawned rather than forked, so the worker never inherits the open camera
+        self.context = multiprocessing.get_context('spawn')
+        self.jobs = None
+        self.process = None
+        self.submitted = 0
+
+    def start(self):
+        for sub_directory in (THUMBNAIL_DIR, REDUCED_DIR):
+            os.makedirs(os.path.join(self.derived, sub_directory), exist_ok=True)
+        self.jobs = self.context.Queue()
+        self.process = self.context.Process(target=worker, args=(self.jobs, self.derived, self.settings),
+                                            name="picture-pipeline", daemon=True)
+        self.process.start()
+
+    def submit(self, path, when):
+        """Queue a freshly captured picture; returns immediately"""
+        self.jobs.put((path, when.timestamp()))
+        self.submitted += 1
+
+    def close(self, timeout=60.0):
+        """Let the worker finish the queued pictures and stop it"""
+        if self.process is None:
+            return
+        self.jobs.put(None)
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
+
+    def index(self):
+        return PictureIndex(os.path.join(self.derived, INDEX_NAME))
+
+
+def rebuild_index(directory, derived=None):
+    """Rebuild the index from the pictures in a directory (names, or modification times for old names)
+
+    Pictures already uploaded and deleted are still listed through their reduced copies.
+    """
+    derived = derived or derived_directory(directory)
+    path = os.path.join(derived, INDEX_NAME)
+    files = {}
+    for folder in (os.path.join(derived, REDUCED_DIR), directory):
+        if os.path.isdir(folder):
+            files.update((name, os.path.join(folder, name))
+                         for name in os.listdir(folder) if name.endswith(".jpeg"))
+    entries = []
+    for name, file in files.items():
+        match = PICTURE_TIME.search(name)
+        try:
+            timestamp = datetime.strptime(match.group(1), TIME_FORMAT).timestamp()
+        except (AttributeError, ValueError):
+            timestamp = os.path.getmtime(file)
+        entries.append((timestamp, name))
+    os.makedirs(derived, exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+    index = PictureIndex(path)
+    with open(path, 'wb') as f:
+        f.write(b"".join(index._record(t, n) for t, n in sorted(entries)))
+    return index
+
+
+def _parse_time(text):
+    return datetime.fromisoformat(text).timestamp() if text else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up pictures by time in the picture index")
+    parser.add_argument('directory', help="Pictures directory")
+    parser.add_argument('--start', help="ISO date/time, e.g. 2025-02-22T06:00")
+    parser.add_argument('--end', help="ISO date/time, not included")
+    parser.add_argument('--derived', help=f"Copies and index directory (default {DERIVED_DIR} beside the pictures)")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the index from the directory first")
+    args = parser.parse_args()
+
+    derived = args.derived or derived_directory(args.directory)
+    if args.rebuild:
+        rebuild_index(args.directory, derived)
+    start = time.monotonic()
+    found = PictureIndex(os.path.join(derived, INDEX_NAME)).find(_parse_time(args.start),
+                                                                       _parse_time(args.end))
+    for timestamp, name in found:
+        print(datetime.fromtimestamp(timestamp).isoformat(sep=' ', timespec='seconds'), name)
+    print(f"{len(found)} pictures in {(time.monotonic() - start) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,138 @@
 import os
 import sys
+import tempfile
 import unittest
+from datetime import datetime, timedelta
 
 sys.path.append("../main")
 import dendro_pictures
+import numpy as np
+from camera_backends import StubCamera
+from change_detection import ChangeDetector
+from picture_pipeline import PictureIndex, PicturePipeline, rebuild_index
 
 class TestDendro(unittest.TestCase):
     def test_picture(self):
         dendro_pictures.take_picture()
 
 
+class FakeClock:
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def sleep(self, seconds):
+        self.current += timedelta(seconds=seconds)
+
+
+class TestCameraService(unittest.TestCase):
+    def test_schedule_stays_in_active_hours(self):
+        schedule = dendro_pictures.TimelapseSchedule(3 * 3600, 9, 19)
+        self.assertEqual(schedule.next_after(datetime(2025, 3, 8, 7, 30)), datetime(2025, 3, 8, 9))
+        self.assertEqual(schedule.next_after(datetime(2025, 3, 8, 9)), datetime(2025, 3, 8, 12))
+        self.assertEqual(schedule.next_after(datetime(2025, 3, 8, 18)), datetime(2025, 3, 9, 9))
+
+    def test_camera_opened_once(self):
+        clock = FakeClock(datetime(2025, 3, 8, 8, 59, 50))
+        camera = StubCamera(size=16)
+        schedule = dendro_pictures.TimelapseSchedule(15 * 60, 9, 10, burst=2, burst_spacing=1.0)
+        with tempfile.TemporaryDirectory() as directory:
+            service = dendro_pictures.CameraService(camera, schedule, directory, name="Test",
+                                                    now=clock.now, sleep=clock.sleep)
+            service.run(frames=5)
+            pictures = sorted(os.listdir(directory))
+        self.assertEqual(camera.opened, 1)
+        self.assertEqual(len(pictures), 10)
+        self.assertEqual(pictures[0], "Test_20250308-090000-00.jpeg")
+        self.assertEqual(pictures[-1], "Test_20250309-090000-01.jpeg")
+        # Between frames the camera stream is paused, not closed
+        self.assertEqual(camera.pauses, 4)
+        self.assertEqual(camera.resumes, 4)
+
+
+class TestPicturePipeline(unittest.TestCase):
+    def test_names_are_unique(self):
+        schedule = dendro_pictures.TimelapseSchedule()
+        with tempfile.TemporaryDirectory() as directory:
+            service = dendro_pictures.CameraService(StubCamera(size=16), schedule, directory, name="Test")
+            service.backend.open()
+            first = service.shoot(datetime(2025, 3, 8, 9))
+            second = service.shoot(datetime(2025, 3, 8, 9))
+        self.assertNotEqual(first, second)
+        self.assertEqual(os.path.basename(second[0]), "Test_20250308-090000_1.jpeg")
+
+    def test_index_range(self):
+        with tempfile.TemporaryDirectory() as directory:
+            index = PictureIndex(os.path.join(directory, "index"))
+            for hour in (9, 10, 12, 11, 13):  # 11 arrives late and is put back in order
+                index.append(datetime(2025, 3, 8, hour).timestamp(), f"Test_{hour}.jpeg")
+            found = index.find(datetime(2025, 3, 8, 10).timestamp(), datetime(2025, 3, 8, 13).timestamp())
+            self.assertEqual(len(index), 5)
+        self.assertEqual([name for _, name in found], ["Test_10.jpeg", "Test_11.jpeg", "Test_12.jpeg"])
+
+    def test_pipeline_indexes_pictures(self):
+        clock = FakeClock(datetime(2025, 3, 8, 8, 59, 50))
+        schedule = dendro_pictures.TimelapseSchedule(3600, 9, 12)
+        with tempfile.TemporaryDirectory() as directory:
+            pictures = os.path.join(directory, "pictures")
+            pipeline = PicturePipeline(pictures)
+            pipeline.start()
+            service = dendro_pictures.CameraService(StubCamera(size=16), schedule, pictures, name="Test",
+                                                    now=clock.now, sleep=clock.sleep, pipeline=pipeline)
+            service.run(frames=3)
+            pipeline.close()
+            found = pipeline.index().find(datetime(2025, 3, 8, 10).timestamp())
+            # Only the pictures are in the uploaded directory, the index and copies are beside it
+            uploaded = sorted(os.listdir(pictures))
+            self.assertTrue(os.path.exists(os.path.join(directory, "pictures_derived", ".picture_index")))
+        self.assertEqual([name for _, name in found], ["Test_20250308-100000.jpeg", "Test_20250308-110000.jpeg"])
+        self.assertEqual(uploaded, ["Test_20250308-090000.jpeg", "Test_20250308-100000.jpeg",
+                                    "Test_20250308-110000.jpeg"])
+
+    def test_rebuild_index_reads_collision_names(self):
+        names = ["Test_20250308-090000.jpeg", "Test_20250308-090000_1.jpeg", "Test_20250308-100000-01_2.jpeg"]
+        with tempfile.TemporaryDirectory() as directory:
+            pictures = os.path.join(directory, "pictures")
+            reduced = os.path.join(directory, "pictures_derived", "reduced")
+            os.makedirs(pictures)
+            os.makedirs(reduced)
+            for number, name in enumerate(names):
+                # The first picture was uploaded and deleted, its reduced copy is left
+                path = os.path.join(reduced if number == 0 else pictures, name)
+                open(path, 'wb').close()
+                os.utime(path, (0, 0))  # The time has to come from the name
+            found = rebuild_index(pictures).find(datetime(2025, 3, 8).timestamp())
+        self.assertEqual(found, [(datetime(2025, 3, 8, 9).timestamp(), names[0]),
+                                 (datetime(2025, 3, 8, 9).timestamp(), names[1]),
+                                 (datetime(2025, 3, 8, 10).timestamp(), names[2])])
+
+
+class TestChangeDetection(unittest.TestCase):
+    def test_unchanged_frames_are_skipped(self):
+        clock = FakeClock(datetime(2025, 3, 8, 8, 59, 50))
+        camera = StubCamera(size=1000)
+        schedule = dendro_pictures.TimelapseSchedule(3600)
+        detector = ChangeDetector(threshold=4.0, max_interval=6 * 3600)
+        with tempfile.TemporaryDirectory() as directory:
+            service = dendro_pictures.CameraService(camera, schedule, directory, name="Test",
+                                                    now=clock.now, sleep=clock.sleep, detector=detector)
+            service.run(frames=3)
+            # Brighter overall (exposure) is not a change, a new shape in the frame is
+            camera.frame = np.full((480, 640, 3), 150, dtype=np.uint8)
+            service.run(frames=1)
+            camera.frame[100:300, 200:400] = 30
+            service.run(frames=1)
+            service.run(frames=6)  # The sixth hour without change is stored anyway
+            pictures = sorted(os.listdir(directory))
+        self.assertEqual(len(pictures), 3)
+        self.assertEqual(pictures[1], "Test_20250308-130000.jpeg")
+        self.assertEqual(pictures[2], "Test_20250308-190000.jpeg")
+        savings = service.savings()
+        self.assertEqual(savings['skipped'], 8)
+        self.assertEqual(savings['bytes_saved'], 8000)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,8 +1,9 @@
 #!/bin/bash
 
 # --- Upload pictures ---
+# Only the pictures: thumbnails, reduced copies and the picture index stay in ~/dendro-pi-main/pictures_derived
 cd ~/Dropbox-Uploader
-./dropbox_uploader.sh upload ~/dendro-pi-main/pictures/* / | grep "file exists with the same hash" > already_uploaded.txt
+./dropbox_uploader.sh upload ~/dendro-pi-main/pictures/*.jpeg / | grep "file exists with the same hash" > already_uploaded.txt
 
 while IFS= read -r line; do
   FILENAME=$(echo "$line" | cut -d'"' -f 2)